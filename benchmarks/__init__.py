@@ -0,0 +1 @@
+""" Benchmarks for FOV-Changer, run them from the repository root, e.g. `python -m benchmarks.startup imports` """
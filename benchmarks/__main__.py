@@ -0,0 +1,154 @@
+"""
+Benchmarks of the hot paths, they run without Minecraft (also on Linux) against a simulated memory
+
+Usage (from the repository root):
+```
+python -m benchmarks run [--out results.json] [--filter listener] [--repeat 7]
+python -m benchmarks compare benchmarks/baseline.json results.json [--threshold 0.25]
+```
+
+'run' prints the median time per call of every case and optionally saves them as json,
+'compare' exits with 1 if a case got slower than the baseline by more than the threshold.
+Timings depend on the machine, only compare results from the same one.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+
+
+# pynput needs a display on Linux, but no case listens for real keys
+if sys.platform.startswith("linux") and not os.environ.get("DISPLAY"):
+    os.environ.setdefault("PYNPUT_BACKEND", "dummy")
+
+
+def run_case(f, number: int, repeat: int) -> dict:
+    """ Time a case
+    :param f: the case function
+    :param number: (int) calls per repeat
+    :param repeat: (int) number of repeats
+    :returns: (dict) the result, times are in µs per call
+    """
+    times = []
+
+    for _ in range(repeat):
+        call = f(number)
+
+        start = time.perf_counter()
+        for _ in range(number):
+            call()
+
+        times.append((time.perf_counter() - start) / number * 1e6)
+
+    return {
+        "median_us": statistics.median(times),
+        "min_us": min(times),
+        "number": number,
+        "repeat": repeat
+    }
+
+
+def run(name_filter: str, repeat: int) -> dict:
+    """ Run all cases
+    :param name_filter: (str) only cases containing it
+    :param repeat: (int) number of repeats
+    :returns: (dict) {name: result}, skipped cases have a 'skipped' reason
+    """
+    from benchmarks.cases import CASES
+
+    results = {}
+
+    for name, (f, number) in CASES.items():
+        if name_filter and name_filter not in name:
+            continue
+
+        try:
+            results[name] = result = run_case(f, number, repeat)
+            print(f"{name:<40}{result['median_us']:>12.2f} µs   (min {result['min_us']:.2f} µs)")
+
+        # E.g. pynput without a backend
+        except ImportError as e:
+            results[name] = {"skipped": str(e).splitlines()[0]}
+            print(f"{name:<40}{'skipped':>12}   ({results[name]['skipped']})")
+
+    return results
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list:
+    """ Compare two results
+    :param baseline: (dict) the baseline results
+    :param current: (dict) the current results
+    :param threshold: (float) allowed slowdown, 0.25 means 25%
+    :returns: (list) names of the regressed cases
+    """
+    regressions = []
+
+    print(f"{'case':<40}{'baseline':>12}{'current':>12}{'change':>10}")
+
+    for name, result in current.items():
+        before = baseline.get(name, {})
+
+        if "median_us" not in result or "median_us" not in before:
+            print(f"{name:<40}{'-':>12}{'-':>12}{'n/a':>10}")
+            continue
+
+        change = result["median_us"] / before["median_us"] - 1
+        regressed = change > threshold
+
+        if regressed:
+            regressions.append(name)
+
+        print(f"{name:<40}{before['median_us']:>12.2f}{result['median_us']:>12.2f}{change:>+10.1%}"
+              f"{'   REGRESSION' if regressed else ''}")
+
+    return regressions
+
+
+def main():
+    """ Command line interface
+    """
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="run the cases")
+    run_parser.add_argument("--out", help="save the results as json")
+    run_parser.add_argument("--filter", default="", help="only cases containing this")
+    run_parser.add_argument("--repeat", type=int, default=7)
+
+    compare_parser = subparsers.add_parser("compare", help="flag regressions against a baseline")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.25)
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        results = run(args.filter, args.repeat)
+
+        if args.out:
+            with open(args.out, "w") as f:
+                json.dump({
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "results": results
+                }, f, indent=4)
+
+    else:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+
+        with open(args.current) as f:
+            current = json.load(f)["results"]
+
+        if regressions := compare(baseline, current, args.threshold):
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}!")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,528 @@
+"""
+The benchmark cases, see benchmarks/__main__.py
+
+A case is a function decorated with @case, it does the setup and returns the callable that gets timed.
+It is called again for every repeat with the number of calls, so that it can prepare fresh inputs.
+"""
+
+import atexit
+import copy
+import json
+import os
+import random
+import tempfile
+import threading
+
+from src import events, frontend, thread
+from src.processing import executor, pointers, scanner, snapshots, storage, values
+from src.processing.gateway import Gateway
+from src.processing.pool import GatewayPool
+from src.processing.memory import SimulatedMemory
+
+
+# {name: (function, number of calls per repeat)}
+CASES = {}
+
+# Storage files of the cases, removed on exit
+TEMP_DIR = tempfile.TemporaryDirectory(prefix="fov-benchmarks-")
+
+# Feature counts, the first one is what the api currently serves
+SCALES = (4, 64, 1024)
+
+# Like the features inside storage.json, offsets of a real version
+FEATURES = {
+    "0": {"available": True, "offsets": [0x4A0D0B8, 0x10, 0x1D0, 0xF0], "name": "FOV", "enabled": True,
+          "key": "c", "settings": {"before": 70.0, "after": 30.0}, "children": ["1", "2"]},
+    "1": {"available": True, "offsets": [0x4A0D0B8, 0x10, 0x1D0, 0x1C8], "name": "Hide Hand", "enabled": True,
+          "key": None, "settings": {"before": 0, "after": 1}, "children": []},
+    "2": {"available": True, "offsets": [0x4A0C8F0, 0x8, 0x38, 0x18], "name": "Sensitivity", "enabled": True,
+          "key": None, "settings": {"before": 50.0, "after": 16.0}, "children": []},
+    "3": {"available": True, "offsets": [[0x4A12340, 0x28, 0x8, 0x0], [0x4A12340, 0x28, 0x8, 0x20]],
+          "name": "Discord", "enabled": True, "settings": {"show_server": True, "show_version": True},
+          "children": []}
+}
+
+
+def case(name: str, number: int):
+    """ Decorator for registering a case
+    :param name: (str) unique name, used in the baseline
+    :param number: (int) calls per repeat
+    """
+
+    def inner(f):
+        CASES[name] = (f, number)
+        return f
+
+    return inner
+
+
+class ScaledFeatures(storage.Features):
+    """ Features with cloned presets, so that more than the vanilla features can be parsed
+        Use scaled() for a subclass with the wanted number of presets
+    """
+    COUNT = len(FEATURES)
+
+    def __init__(self, references: dict):
+        """ Initialize
+        :param references: the references
+        """
+        super().__init__(references)
+
+        for i in range(len(self.presets), self.COUNT):
+            self.presets[str(i)] = {**self.presets[str(i % 3)], "c": []}
+
+    @classmethod
+    def scaled(cls, count: int) -> type:
+        """ Subclass with count presets
+        :param count: (int) number of presets
+        """
+        return type(f"{cls.__name__}{count}", (cls,), {"COUNT": count})
+
+
+def scaled_features(count: int, *, response: bool = False) -> dict:
+    """ Feature data with count features
+    :param count: (int) number of features
+    :param response: (bool) in the format of the api, with short keys
+    :returns: (dict) the features
+    """
+    features = copy.deepcopy(FEATURES)
+
+    for i in range(len(features), count):
+        clone = copy.deepcopy(FEATURES[str(i % 3)])
+        clone.update({"key": chr(ord("a") + i % 26), "children": []})
+        features[str(i)] = clone
+
+    if response:
+        return {feature_id: {"a": value["available"], "o": value["offsets"]} for feature_id, value in features.items()}
+
+    return features
+
+
+def create_references(*, attached: bool = False, instances: int = 1) -> dict:
+    """ Create storage (inside a temporary directory), gateway and pool with a no-op frontend
+    :param attached: (bool) attach the gateway to a simulated Minecraft
+    :param instances: (int) number of simulated instances, all get attached
+    :returns: (dict) the references
+    """
+    directory = tempfile.mkdtemp(dir=TEMP_DIR.name)
+    path = os.path.join(directory, "storage.json")
+
+    with open(path, "w") as f:
+        json.dump({**storage.Storage.STORAGE_TEMPLATE, "mc_version": "1.21.0.3", "features": FEATURES}, f)
+
+    references = {}
+    events.EventBus(references)
+    frontend.Frontend(references)
+
+    # Own subclass, instead of changing the path for everything else
+    type("BenchmarkStorage", (storage.Storage,), {"STORAGE_PATH": path})(references)
+
+    memory = SimulatedMemory()
+    gateway = Gateway(references, memory)
+    pool = GatewayPool(references)
+
+    if attached:
+        for instance in [memory] + [memory.spawn() for _ in range(instances - 1)]:
+            instance.open_process_from_name("Minecraft.Windows.exe")
+
+            # Every offset chain points to a valid value
+            for feature_id, value in FEATURES.items():
+                for offsets in (value["offsets"] if isinstance(value["offsets"][0], list) else [value["offsets"]]):
+                    instance.build_pointer_chain(offsets)
+
+        gateway.check_version()
+        gateway.get_addresses()
+        pool.attach_all()
+
+    return references
+
+
+for count in SCALES:
+    @case(f"features.parse_features[{count}]", number=max(10, 4000 // count))
+    def parse_features(number: int, count=count):
+        features = ScaledFeatures.scaled(count)(create_references())
+        responses = iter([scaled_features(count, response=True) for _ in range(number)])
+
+        return lambda: storage.Features.parse_features(features, next(responses), shorten_keys=True)
+
+    @case(f"features.from_storage_file[{count}]", number=max(10, 4000 // count))
+    def from_storage_file(number: int, count=count):
+        references = create_references()
+        features_class = ScaledFeatures.scaled(count)
+        data = scaled_features(count)
+
+        return lambda: features_class.from_storage_file(references, data)
+
+    @case(f"listener.register_keys[{count}]", number=max(10, 20000 // count))
+    def register_keys(number: int, count=count):
+        from src.processing import listener
+
+        references = create_references()
+        references["Storage"].features = ScaledFeatures.scaled(count).from_storage_file(references,
+                                                                                       scaled_features(count))
+
+        return listener.Listener(references).register_keys
+
+
+@case("listener.inner[bound key]", number=5000)
+def listener_inner(number: int):
+    from pynput import keyboard
+    from src.processing import listener
+
+    references = create_references(attached=True)
+    key_listener = listener.Listener(references)
+    key_listener.register_keys()
+    key = keyboard.KeyCode.from_vk(ord("C"))
+
+    def run():
+        # One zoom, writes FOV, hide hand and sensitivity twice
+        key_listener.on_press(key)
+        key_listener.on_release(key)
+
+    return run
+
+
+@case("listener.inner[unbound key]", number=20000)
+def listener_inner_unbound(number: int):
+    from pynput import keyboard
+    from src.processing import listener
+
+    references = create_references(attached=True)
+    key_listener = listener.Listener(references)
+    key_listener.register_keys()
+    key = keyboard.KeyCode.from_vk(ord("X"))
+
+    return lambda: key_listener.on_press(key)
+
+
+@case("listener.on_scroll[zooming]", number=20000)
+def listener_on_scroll(number: int):
+    from pynput import keyboard
+    from src.processing import listener
+
+    references = create_references(attached=True)
+    references["Storage"].settings.data["scroll_zoom"] = True
+
+    key_listener = listener.Listener(references)
+    key_listener.register_keys()
+    key_listener.on_press(keyboard.KeyCode.from_vk(ord("C")))
+    atexit.register(key_listener.scroll_zoom.stop)
+
+    # The hook thread only updates the target, the writer thread writes at most once per frame
+    ticks = iter([1, -1] * number)
+
+    return lambda: key_listener.on_scroll(0, 0, 0, next(ticks))
+
+
+@case("enforcer.check[zooming]", number=20000)
+def enforcer_check(number: int):
+    from pynput import keyboard
+    from src.processing import listener
+
+    references = create_references(attached=True)
+    references["Storage"].settings.data["enforce_zoom"] = True
+
+    key_listener = listener.Listener(references)
+    key_listener.register_keys()
+    key_listener.on_press(keyboard.KeyCode.from_vk(ord("C")))
+
+    # One check of the loop, in the usual case where nothing drifted, without the thread
+    enforcer = key_listener.enforcer
+    enforcer.stopped.set()
+    enforcer.join()
+
+    return enforcer.check
+
+
+@case("watch.poll[listener features]", number=20000)
+def watch_poll(number: int):
+    from src.processing import watch
+
+    references = create_references(attached=True)
+
+    # Without the thread, one poll in the usual case where nothing changed
+    watcher = watch.Watcher(references)
+    watch.SettingsSync(references).subscribe_all()
+    watcher.poll()
+
+    return watcher.poll
+
+
+@case("gateway.get_address", number=5000)
+def get_address(number: int):
+    gateway = create_references(attached=True)["Gateway"]
+
+    return lambda: gateway.get_address("0", log=False)
+
+
+@case("gateway.get_addresses", number=200)
+def get_addresses(number: int):
+    return create_references(attached=True)["Gateway"].get_addresses
+
+
+@case("pool.write_addresses[3 instances]", number=2000)
+def write_addresses(number: int):
+    pool = create_references(attached=True, instances=3)["GatewayPool"]
+    writes = [("0", 30.0), ("1", 1), ("2", 16.0)]
+
+    return lambda: pool.write_addresses(writes)
+
+
+@case("storage.update_file", number=200)
+def update_file(number: int):
+    return create_references()["Storage"].update_file
+
+
+@case("storage.validate", number=20000)
+def validate(number: int):
+    storage_ = create_references()["Storage"]
+
+    return lambda: storage_.validate(storage_.data, storage_.STORAGE_TEMPLATE)
+
+
+class QueueThread(thread.Thread):
+    """ Thread without any scheduled methods and waiting
+    """
+    scheduled_methods = set()
+
+    def at_start(self):
+        pass
+
+    def at_end(self):
+        pass
+
+
+@case("thread.queue[1000 tasks]", number=20)
+def queue_throughput(number: int):
+    def run():
+        queue_thread = QueueThread({}, "QueueThread", 0)
+        queue_thread.queue.extend({"cmd": len, "params": [()], "kwargs": {}} for _ in range(999))
+        queue_thread.queue.append({"cmd": "stop", "params": [], "kwargs": {}})
+
+        # Runs the loop in this thread until the last task
+        queue_thread.run()
+
+    return run
+
+
+@case("thread.offload[100 operations]", number=5)
+def offload_throughput(number: int):
+    def run():
+        queue_thread = QueueThread({}, "QueueThread", 0)
+        done = []
+
+        def stop(operation):
+            done.append(operation)
+
+            # Completions are handled inside the thread, the last one ends the loop
+            if len(done) == 100:
+                queue_thread.stop()
+
+        # Own keys, so that none gets skipped
+        for i in range(100):
+            queue_thread.offload(len, (), key=str(i), callback=stop)
+
+        queue_thread.run()
+
+    return run
+
+
+# Process pool of the executor cases
+EXECUTOR = None
+
+# The shipped signatures, they match FEATURES, see scanner
+SIGNATURES = scanner.load_signatures((os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                                   "res", "signatures.json"),))
+
+
+def synthetic_module(size: int) -> SimulatedMemory:
+    """ A module of random bytes, containing the code matched by SIGNATURES near its end
+    :param size: (int) size of the module
+    """
+    memory = SimulatedMemory(module_size=size)
+    memory.open_process_from_name("Minecraft.Windows.exe")
+
+    module = memory.regions[memory.module_base_address]
+    module[:] = random.Random(size).randbytes(size)
+
+    codes = [
+        (bytes.fromhex("48 8B 05 00000000 48 8B 48 10 48 8B 81 D0010000 F3 0F 10 80"), 3, 0x4A0D0B8),
+        (bytes.fromhex("C7 80 C8010000 01 00 00 00 EB 07 48 8B 0D"), None, None),
+        (bytes.fromhex("48 8B 0D 00000000 48 8B 49 08 48 8B 41 38 F3 0F 10 40 18"), 3, 0x4A0C8F0),
+        (bytes.fromhex("48 8D 15 00000000 4C 8B 42 28 4D 8B 48 08"), 3, 0x4A12340)
+    ]
+
+    offset = size - 0x10000
+    for code, at, target in codes:
+        module[offset:offset + len(code)] = code
+
+        if at is not None:
+            module[offset + at:offset + at + 4] = (target - offset - 7).to_bytes(4, "little", signed=True)
+
+        offset += 0x1000
+
+    return memory
+
+
+@case("scanner.scan_features[100 MB]", number=1)
+def scan_features(number: int):
+    module_scanner = scanner.Scanner(synthetic_module(100 * 1024 * 1024))
+    feature_ids = list(FEATURES)
+
+    return lambda: module_scanner.scan_features(SIGNATURES, feature_ids)
+
+
+@case("executor.scan_features[100 MB]", number=1)
+def scan_features_parallel(number: int):
+    global EXECUTOR
+
+    # Started once, so that starting the workers isn't timed
+    if EXECUTOR is None:
+        references = {}
+        events.EventBus(references)
+        frontend.Frontend(references)
+        EXECUTOR = executor.ScanExecutor(references)
+        EXECUTOR.start_pool()
+        atexit.register(EXECUTOR.shutdown)
+
+    module_scanner = scanner.Scanner(synthetic_module(100 * 1024 * 1024), EXECUTOR)
+    feature_ids = list(FEATURES)
+
+    return lambda: module_scanner.scan_features(SIGNATURES, feature_ids)
+
+
+@case("values.first_scan[100 MB]", number=1)
+def first_scan(number: int):
+    value_scanner = values.ValueScanner(synthetic_module(100 * 1024 * 1024))
+
+    return lambda: value_scanner.first_scan("float", 69.5, 70.5)
+
+
+@case("values.next_scan[16 MB, every float]", number=1)
+def next_scan(number: int):
+    value_scanner = values.ValueScanner(synthetic_module(16 * 1024 * 1024))
+    value_scanner.first_scan("float", -3.4e38, 3.4e38)
+
+    return lambda: value_scanner.next_scan("unchanged")
+
+
+def pointer_heap(memory: SimulatedMemory, size: int, density: float) -> int:
+    """ Add a heap region full of pointers into itself, like the structures of the game
+    :param memory: (SimulatedMemory) the memory
+    :param size: (int) size of the heap
+    :param density: (float) share of the aligned values that are pointers
+    :returns: (int) address of the heap
+    """
+    import numpy as np
+
+    address = memory.allocate(size)
+    rng = np.random.default_rng(size)
+
+    slots = np.frombuffer(memory.regions[address], np.uint64)
+    chosen = rng.random(len(slots)) < density
+    slots[chosen] = rng.integers(address, address + size, int(chosen.sum()), np.uint64) & ~np.uint64(7)
+    del slots
+
+    return address
+
+
+@case("pointers.build[100 MB + 16 MB heap]", number=1)
+def build_pointer_map(number: int):
+    memory = synthetic_module(100 * 1024 * 1024)
+    pointer_heap(memory, 16 * 1024 * 1024, 0.01)
+
+    return lambda: pointers.PointerMap.build(memory)
+
+
+@case("pointers.search[depth 4]", number=1)
+def search_pointers(number: int):
+    memory = synthetic_module(100 * 1024 * 1024)
+    pointer_heap(memory, 16 * 1024 * 1024, 0.01)
+
+    target = memory.build_pointer_chain(FEATURES["0"]["offsets"])
+    pointer_map = pointers.PointerMap.build(memory)
+
+    return lambda: pointer_map.search(target, depth=4, max_offset=0x400, limit=100)
+
+
+@case("snapshots.take[100 MB]", number=1)
+def take_snapshot(number: int):
+    memory = synthetic_module(100 * 1024 * 1024)
+    store = snapshots.SnapshotStore(os.path.join(TEMP_DIR.name, "snapshots"))
+
+    # Same name, so that only one snapshot is on the disk
+    if "take" in store.names():
+        store.remove("take")
+
+    return lambda: store.take(memory, "take")
+
+
+@case("snapshots.diff[100 MB]", number=1)
+def diff_snapshots(number: int):
+    memory = synthetic_module(100 * 1024 * 1024)
+    store = snapshots.SnapshotStore(os.path.join(TEMP_DIR.name, "snapshots"))
+
+    for name in ("before", "after"):
+        if name in store.names():
+            store.remove(name)
+
+    before = store.take(memory, "before")
+    memory.write_float(memory.base_address + 0x1000, 90.0)
+    after = store.take(memory, "after")
+
+    return lambda: snapshots.diff(before, after)
+
+
+# Stand-in for the api of the sync case, started on first use
+API_SERVER = None
+
+
+def api_server(versions: int) -> str:
+    """ A local api serving the manifest and the offsets of versions, like the real one (see network.sync)
+    :param versions: (int) number of versions
+    :returns: (str) url of the api
+    """
+    global API_SERVER
+    import http.server
+
+    offsets = {str(11610201 + i): json.dumps(scaled_features(len(FEATURES), response=True)) for i in range(versions)}
+    manifest = json.dumps({"status": 200, "versions": {x: storage.OffsetsCache.hash_offsets(y)
+                                                       for x, y in offsets.items()}}).encode()
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        # Keep alive, like the real api, headers and body are separate writes
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            name = self.path.rsplit("/", 1)[-1]
+            body = manifest if name == "manifest" else json.dumps({"status": 200, "offsets": offsets[name]}).encode()
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    API_SERVER = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=API_SERVER.serve_forever, daemon=True).start()
+    atexit.register(API_SERVER.shutdown)
+
+    return f"http://127.0.0.1:{API_SERVER.server_address[1]}/api/"
+
+
+@case("sync.offsets[100 versions]", number=1)
+def sync_offsets(number: int):
+    import requests
+    from src.network import network, sync
+
+    api = f"http://127.0.0.1:{API_SERVER.server_address[1]}/api/" if API_SERVER else api_server(100)
+
+    # Empty cache, so everything gets downloaded
+    references = create_references()
+    network.Network(references).cache.directory = tempfile.mkdtemp(dir=TEMP_DIR.name)
+
+    return sync.OffsetsSync(references, api=api, session=requests.Session()).sync
@@ -0,0 +1,352 @@
+"""
+Key storm benchmark, the time from a key event until its values are written, while the other threads are busy
+
+Usage (from the repository root):
+```
+python -m benchmarks.latency [--scenario toggle] [--events 600] [--no-load] [--json latency.json] [--budget 10]
+```
+
+Synthetic key events are injected into Listener.on_press() / on_release() from their own thread,
+like the hook thread of pynput, at a fixed rate:
+'toggle' zooms in and out as fast as possible, 'repeat' holds the key with the auto repeat of the OS,
+'multi' switches between several bound keys, while the previous one is still held.
+Every scenario runs once idle and once while the Tk queue, the logger and a scheduler are busy,
+against a simulated memory. Exits with 1 if the p99 latency under load is above the budget in ms.
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import logging
+import argparse
+import threading
+import collections
+import logging.handlers
+
+# pynput needs a display on Linux, but no real keys are listened to
+if sys.platform.startswith("linux") and not os.environ.get("DISPLAY"):
+    os.environ.setdefault("PYNPUT_BACKEND", "dummy")
+
+from src import events, thread, tracing
+from src.logger import GuiHandler
+from benchmarks import cases
+
+
+# {name: (events per second, number of bound keys)}
+SCENARIOS = {
+    "toggle": (200, 1),
+    "repeat": (33, 1),
+    "multi": (200, 4)
+}
+
+# Key repeats per held key of the 'repeat' scenario
+REPEATS = 10
+
+
+def create_storm_references(keys: int) -> dict:
+    """ Attached references with a number of bound keys
+    :param keys: (int) bound keys, the first one is 'c' of the FOV, then 'e', 'f', ...
+    :returns: (dict) the references
+    """
+    references = cases.create_references(attached=True)
+
+    if keys > 1:
+        count = len(cases.FEATURES) + keys - 1
+        references["Storage"].features = cases.ScaledFeatures.scaled(count).from_storage_file(
+            references, cases.scaled_features(count))
+        references["Gateway"].get_addresses()
+
+    return references
+
+
+def key_events(scenario: str, number: int, keys: int) -> list:
+    """ The key events of a scenario
+    :param scenario: (str) name of the scenario
+    :param number: (int) number of events
+    :param keys: (int) number of bound keys
+    :returns: (list) (pressed, vk) pairs
+    """
+    vks = [ord("C")] + [ord("E") + i for i in range(keys - 1)]
+    result = [(True, vks[0])] if scenario == "multi" else []
+
+    while len(result) < number:
+        if scenario == "toggle":
+            result += [(True, vks[0]), (False, vks[0])]
+
+        # The OS repeats the press while the key is held
+        elif scenario == "repeat":
+            result += [(True, vks[0])] * (REPEATS + 1) + [(False, vks[0])]
+
+        # The next key is pressed before the previous one is released
+        else:
+            i = (len(result) - 1) // 2
+            result += [(True, vks[(i + 1) % keys]), (False, vks[i % keys])]
+
+    return result[:number]
+
+
+class LoadThread(thread.Thread):
+    """ Scheduler under load: polls the values like the watcher, checks the status and saves the storage
+    """
+
+    def __init__(self, references: dict):
+        """ Initialize
+        :param references: the references
+        """
+        super().__init__(references, "LoadThread", 0.005)
+
+        self.gateway = references["Gateway"]
+        self.storage = references["Storage"]
+
+    def at_start(self):
+        """ Saves on every change, like the processing thread
+        """
+        self.references["EventBus"].subscribe(events.SettingsChanged,
+                                              lambda _: self.offload_latest(self.storage.update_file),
+                                              dispatch=self.call_soon)
+
+    def at_end(self):
+        """ Cancel a running save
+        """
+        self.cancel_operations()
+
+    @thread.Thread.schedule(0)
+    def poll(self):
+        """ Read every address
+        """
+        for feature_id in self.gateway.features.addresses:
+            self.gateway.read_address(feature_id)
+
+    @thread.Thread.schedule(0.05)
+    def check_status(self):
+        """ Publishes StatusChanged, rendered by the Tk queue
+        """
+        self.gateway.status_check()
+
+
+class TkQueue(threading.Thread):
+    """ Runs callbacks one after another, like root.after(0, ...) of the mainloop, see RootThread.call_soon()
+        There is no display in CI, the rendering is formatting the text of the widgets
+    """
+
+    def __init__(self):
+        """ Initialize
+        """
+        super().__init__(name="TkQueue", daemon=True)
+
+        self.queue = queue.SimpleQueue()
+        self.rendered = collections.deque(maxlen=100)
+
+    def call_soon(self, callback, *args):
+        """ Like RootThread.call_soon()
+        :param callback: called inside the thread
+        :param args: its arguments
+        """
+        self.queue.put((callback, args))
+
+    def render(self, event: events.Event):
+        """ Text of the widgets
+        :param event: (Event) the event
+        """
+        self.rendered.append("\n".join(f"{name:<20}{value!s:>10}" for name, value in vars(event).items()))
+
+    def stop(self):
+        """ Stop after the queued callbacks
+        """
+        self.queue.put(None)
+
+    def run(self) -> None:
+        while (task := self.queue.get()) is not None:
+            task[0](*task[1])
+
+
+class Load:
+    """ Background load of the Tk queue, the logger and the scheduler
+    """
+
+    def __init__(self, references: dict, directory: str, *, settings_rate: float = 50, log_rate: float = 200):
+        """ Initialize
+        :param references: the references
+        :param directory: (str) for the log file
+        :param settings_rate: (float) SettingsChanged per second, saved by the scheduler and rendered by Tk
+        :param log_rate: (float) log records per second
+        """
+        self.references = references
+        self.settings_rate = settings_rate
+        self.log_rate = log_rate
+        self.stopped = threading.Event()
+
+        self.tk_queue = TkQueue()
+        self.load_thread = LoadThread(references)
+
+        event_bus = references["EventBus"]
+        event_bus.subscribe(events.StatusChanged, self.tk_queue.render, dispatch=self.tk_queue.call_soon)
+        event_bus.subscribe(events.SettingsChanged, self.tk_queue.render, dispatch=self.tk_queue.call_soon)
+
+        # Like the logging config of the app, a queue in front of the file and the buffer of the log tab
+        self.logger = logging.getLogger(f"{__name__}.load")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+
+        self.log_queue = queue.SimpleQueue()
+        self.log_listener = logging.handlers.QueueListener(
+            self.log_queue, logging.FileHandler(os.path.join(directory, "log.txt"), delay=True), GuiHandler())
+        self.logger.handlers = [logging.handlers.QueueHandler(self.log_queue)]
+
+        self.producers = [threading.Thread(target=self.produce, args=(rate, f), daemon=True) for rate, f in (
+            (self.settings_rate, lambda: event_bus.publish(events.SettingsChanged(features=("0",)))),
+            (self.log_rate, lambda: self.logger.info("Status rendered %d times", len(self.tk_queue.rendered)))
+        )]
+
+    def produce(self, rate: float, f):
+        """ Call a function at a rate until stopped
+        :param rate: (float) calls per second
+        :param f: the function
+        """
+        while not self.stopped.wait(1 / rate):
+            f()
+
+    def start(self):
+        """ Start all threads
+        """
+        self.log_listener.start()
+        self.tk_queue.start()
+        self.load_thread.start()
+
+        for producer in self.producers:
+            producer.start()
+
+    def stop(self):
+        """ Stop all threads
+        """
+        self.stopped.set()
+
+        for producer in self.producers:
+            producer.join()
+
+        self.load_thread.stop()
+        self.load_thread.join()
+
+        self.tk_queue.stop()
+        self.tk_queue.join()
+
+        self.log_listener.stop()
+
+        for handler in self.log_listener.handlers:
+            handler.close()
+
+
+def storm(scenario: str, number: int, *, load: bool) -> dict:
+    """ Run a scenario
+    :param scenario: (str) name of the scenario
+    :param number: (int) number of key events
+    :param load: (bool) with background load
+    :returns: (dict) counts and the latency percentiles in µs
+    """
+    from pynput import keyboard
+    from src.processing import listener
+
+    rate, keys = SCENARIOS[scenario]
+    references = create_storm_references(keys)
+
+    key_listener = listener.Listener(references)
+    key_listener.register_keys()
+
+    # Every typed write goes through write_bytes()
+    memory = references["Gateway"].memory
+    write_bytes = memory.write_bytes
+    writes = []
+
+    def timed_write_bytes(address: int, data: bytes):
+        write_bytes(address, data)
+        writes.append(time.perf_counter_ns())
+
+    memory.write_bytes = timed_write_bytes
+
+    background = Load(references, os.path.dirname(references["Storage"].STORAGE_PATH)) if load else None
+    inputs = []
+
+    def inject():
+        """ The hook thread, the times are taken when the listener gets the event """
+        start = time.perf_counter()
+
+        for i, (pressed, vk) in enumerate(key_events(scenario, number, keys)):
+            if (wait := start + i / rate - time.perf_counter()) > 0:
+                time.sleep(wait)
+
+            key = keyboard.KeyCode.from_vk(vk)
+            inputs.append(time.perf_counter_ns())
+            (key_listener.on_press if pressed else key_listener.on_release)(key)
+
+    if background:
+        background.start()
+
+        # Everything is running
+        time.sleep(0.2)
+
+    try:
+        hook_thread = threading.Thread(target=inject, name="HookThread")
+        hook_thread.start()
+        hook_thread.join()
+
+    finally:
+        if background:
+            background.stop()
+
+        key_listener.scroll_zoom.stop()
+        key_listener.enforcer.stop()
+
+    # Back to the record format of a trace
+    records = sorted([(tracing.KEY_PRESS, at, b"") for at in inputs] + [(tracing.WRITE, at, b"") for at in writes],
+                     key=lambda x: x[1])
+    latencies = [x / 1000 for x in tracing.latencies(records) if x is not None]
+
+    return {
+        "events": len(inputs),
+        "writing_events": len(latencies),
+        "writes": len(writes),
+        "rate": rate,
+        "keys": keys,
+        "latency_us": tracing.percentiles(latencies)
+    }
+
+
+def main():
+    """ Command line interface
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", choices=SCENARIOS, action="append", help="defaults to all")
+    parser.add_argument("--events", type=int, default=600, help="key events per scenario")
+    parser.add_argument("--no-load", action="store_true", help="only idle, without background load")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--budget", type=float, default=10, help="maximal p99 latency under load in ms")
+
+    args = parser.parse_args()
+    results = {}
+    over_budget = []
+
+    for scenario in args.scenario or SCENARIOS:
+        for load in (False,) if args.no_load else (False, True):
+            name = f"{scenario}[{'load' if load else 'idle'}]"
+            results[name] = result = storm(scenario, args.events, load=load)
+            latency = result["latency_us"]
+
+            print(f"{name:<16}{result['writing_events']:>6}/{result['events']:<6} events wrote   " +
+                  "".join(f"{key} {value:>9.1f} µs   " for key, value in latency.items()))
+
+            if load and latency and latency["p99"] > args.budget * 1000:
+                over_budget.append(name)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=4)
+
+    if over_budget:
+        print(f"\np99 latency above {args.budget} ms: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
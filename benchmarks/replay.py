@@ -0,0 +1,87 @@
+"""
+Replay of a recorded session, see src/tracing.py
+
+Usage (from the repository root):
+```
+python -m benchmarks.replay info session.fovtrace
+python -m benchmarks.replay replay session.fovtrace [--max-speed] [--json report.json]
+```
+
+'info' summarizes the trace, 'replay' feeds its key events through the real Listener and Gateway against
+a SimulatedMemory made of the recorded values, at the original times or as fast as possible,
+and compares the latencies from each key event to its write.
+"""
+
+import os
+import json
+import argparse
+import collections
+
+os.environ.setdefault("PYNPUT_BACKEND", "dummy")
+
+from src import tracing
+
+
+def print_percentiles(name: str, values: dict):
+    """ Print a line of percentiles
+    :param name: (str) what they are of
+    :param values: (dict) see tracing.percentiles()
+    """
+    if not values:
+        print(f"{name:<36} -")
+        return
+
+    print(f"{name:<36}" + "".join(f"{key} {value:>10.1f}   " for key, value in values.items()))
+
+
+def main():
+    """ Command line interface
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    info_parser = subparsers.add_parser("info", help="number of records per kind")
+    info_parser.add_argument("trace")
+
+    replay_parser = subparsers.add_parser("replay", help="replay the key events and compare the latencies")
+    replay_parser.add_argument("trace")
+    replay_parser.add_argument("--max-speed", action="store_true", help="without waiting between the events")
+    replay_parser.add_argument("--json", help="also write the report to this file")
+
+    args = parser.parse_args()
+
+    with open(args.trace, "rb") as f:
+        records = tracing.read_trace(f)
+
+    if args.command == "info":
+        kinds = {value: name for name, value in vars(tracing).items() if name.isupper() and isinstance(value, int)
+                 and name not in ("MAX_VALUE",)}
+        counts = collections.Counter(kinds.get(kind, str(kind)) for kind, _, _ in records)
+
+        print(f"{len(records)} records over {records[-1][1] / 1e9 if records else 0:.1f} s\n")
+        for name, count in counts.most_common():
+            print(f"{name:<15}{count:>10}")
+
+    else:
+        report = tracing.Replayer(records).run(max_speed=args.max_speed)
+
+        print(f"{report['events']} key events, {report['original_duration_s']:.1f} s recorded, "
+              f"replayed in {report['replay_duration_s']:.1f} s")
+        print(f"writes {report['writes']['original']} -> {report['writes']['replay']}, "
+              f"reads {report['reads']['original']} -> {report['reads']['replay']}\n")
+
+        print("Key event to write (µs)")
+        for name, values in report["latency_us"].items():
+            print_percentiles(f"  {name}", values)
+
+        print("\nTasks of the recorded session (µs)")
+        for name, values in report["tasks_us"].items():
+            print_percentiles(f"  {name}", values)
+
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(report, f, indent=4)
+
+
+if __name__ == '__main__':
+    main()
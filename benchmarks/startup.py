@@ -0,0 +1,156 @@
+"""
+Startup benchmark, cold start is the first thing every user sees
+
+Usage (from the repository root):
+```
+python -m benchmarks.startup imports [--module src.core] [--top 15]
+python -m benchmarks.startup launch [--exe dist/FOV-Changer.exe] [--runs 3]
+```
+
+'imports' shows the `-X importtime` breakdown of the top-level packages,
+'launch' starts the app and measures the time until the tray icon is visible and the window got rendered
+by watching log.txt, so that it works for the frozen exe too.
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+import statistics
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Log messages marking the milestones
+MILESTONES = {
+    "tray": "Tray icon is visible!",
+    "window": "Rendered window!"
+}
+
+
+def import_times(module: str) -> tuple[float, dict]:
+    """ Import a module in a fresh interpreter with -X importtime
+    :param module: (str) the module to import
+    :returns: (tuple) wall time in ms and {top-level package: cumulative ms}
+    """
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=ROOT_DIR, capture_output=True, text=True)
+    wall = (time.perf_counter() - start) * 1000
+
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing '{module}' failed:\n{result.stderr[-2000:]}")
+
+    # Lines are in post-order, children come before their parent with one more indent
+    entries = []
+    for line in result.stderr.splitlines():
+        # Format: 'import time: self [us] | cumulative | imported package'
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((depth, name.strip(), int(cumulative) / 1000))
+
+    def key(module: str) -> str:
+        """ Our own modules are shown on their own, everything else by its top-level package """
+        return module if module.startswith("src") else module.split(".")[0]
+
+    # Sum only at package boundaries, otherwise nested imports would be counted twice
+    packages = {}
+    pending = []
+    for depth, name, cumulative in entries:
+        children = [x for x in pending if x[0] == depth + 1]
+        pending = [x for x in pending if x[0] <= depth] + [(depth, name, cumulative)]
+
+        for _, child_name, child_cumulative in children:
+            if key(child_name) != key(name):
+                packages[key(child_name)] = packages.get(key(child_name), 0) + child_cumulative
+
+    for depth, name, cumulative in pending:
+        packages[key(name)] = packages.get(key(name), 0) + cumulative
+
+    return wall, packages
+
+
+def launch(cmd: list, timeout: float) -> dict:
+    """ Launch the app once and wait for all milestones
+    :param cmd: (list) command to start the app
+    :param timeout: (float) seconds to wait
+    :returns: (dict) {milestone: ms since launch}
+    """
+    times = {}
+
+    # log.txt gets written into the working directory
+    with tempfile.TemporaryDirectory() as cwd:
+        log_path = os.path.join(cwd, "log.txt")
+
+        start = time.perf_counter()
+        process = subprocess.Popen(cmd, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        try:
+            while len(times) < len(MILESTONES) and time.perf_counter() - start < timeout:
+                if process.poll() is not None:
+                    break
+
+                if os.path.exists(log_path):
+                    with open(log_path, encoding="utf-8", errors="replace") as f:
+                        content = f.read()
+
+                    for name, marker in MILESTONES.items():
+                        if name not in times and marker in content:
+                            times[name] = (time.perf_counter() - start) * 1000
+
+                time.sleep(0.005)
+
+        finally:
+            process.terminate()
+            process.wait()
+
+    return times
+
+
+def main():
+    """ Command line interface
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    imports_parser = subparsers.add_parser("imports", help="-X importtime breakdown")
+    imports_parser.add_argument("--module", default="src.core")
+    imports_parser.add_argument("--top", type=int, default=15)
+
+    launch_parser = subparsers.add_parser("launch", help="time to tray icon and first rendered window")
+    launch_parser.add_argument("--exe", help="frozen exe, defaults to run.py from source")
+    launch_parser.add_argument("--runs", type=int, default=3)
+    launch_parser.add_argument("--timeout", type=float, default=60)
+
+    args = parser.parse_args()
+
+    if args.command == "imports":
+        wall, packages = import_times(args.module)
+
+        print(f"Importing {args.module} took {wall:.0f} ms (including interpreter startup)\n")
+        print(f"{'package':<30}{'cumulative ms':>15}")
+        for name, ms in sorted(packages.items(), key=lambda x: x[1], reverse=True)[:args.top]:
+            print(f"{name:<30}{ms:>15.1f}")
+
+    else:
+        cmd = [os.path.abspath(args.exe)] if args.exe else [sys.executable, os.path.join(ROOT_DIR, "run.py")]
+        runs = [launch(cmd, args.timeout) for _ in range(args.runs)]
+
+        for name in MILESTONES:
+            values = [run[name] for run in runs if name in run]
+
+            if not values:
+                print(f"{name:<10} not reached")
+                continue
+
+            print(f"{name:<10} median {statistics.median(values):>8.0f} ms   "
+                  f"min {min(values):>8.0f} ms   max {max(values):>8.0f} ms   ({len(values)}/{len(runs)} runs)")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,10 +2,14 @@
 Copyright 2020-2025 XroixHD
 
 Main entry point that gets ported to an exe with pyinstaller
+Use `--headless` to run without the gui and the tray
 """
 
-from src import core
+import sys
+import multiprocessing
+
 from src.logger import start_logging, stop_logging
+from src.profiler import start_profiling, stop_profiling
 
 
 VERSION = "1.1.7-alpha"
@@ -13,10 +17,25 @@ DEBUG = False
 
 
 if __name__ == '__main__':
-    start_logging()
+    # The workers of the memory scans start this executable again, see executor.ScanExecutor
+    multiprocessing.freeze_support()
 
-    tray = core.SystemTray()
-    tray.run()
+    headless = "--headless" in sys.argv[1:]
 
-    stop_logging()
+    start_logging(gui=not headless)
+    start_profiling()
+
+    # Imported here, so that the headless mode doesn't load tkinter, PIL and pystray
+    if headless:
+        from src.headless import Headless
+
+        Headless().run()
 
+    else:
+        from src import core
+
+        tray = core.SystemTray()
+        tray.run()
+
+    stop_profiling()
+    stop_logging()
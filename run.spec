@@ -8,7 +8,8 @@ a = Analysis(
     binaries=[],
     datas=[('res\\logo.ico', '.'),
            ('res\\logo-title.png', '.'),
-           ('res\\logo-full.png', '.')],
+           ('res\\logo-full.png', '.'),
+           ('res\\signatures.json', '.')],
     hiddenimports=[],
     hookspath=[],
     runtime_hooks=[],
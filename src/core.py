@@ -8,7 +8,7 @@ import pystray as ps
 from PIL import Image
 
 from src import logger
-from src import ui, exceptions
+from src import ui, events, exceptions, profiler, tracing
 from src.processing import storage, processing
 
 
@@ -28,6 +28,15 @@ class SystemTray:
         # ** Add new references in its init (at the end to avoid not created attributes) ! **
         self.references = {"SystemTray": self}
 
+        # Components notify each other through it
+        events.EventBus(self.references)
+
+        # Records the session, if FOV_RECORD is set
+        tracing.Recorder.from_environment(self.references)
+
+        # What the engine uses to talk to the UI
+        self.frontend = ui.TkFrontend(self.references)
+
         # UI
         self.root_thread = ui.RootThread(self.references)
 
@@ -42,9 +51,13 @@ class SystemTray:
         self.states = {
             "Enabled": False
         }
+
+        # Text of the menu item for cancelling a running memory scan, None if there is none
+        self.scan_text = None
         self.actions = {
             "Open Window": self.open_root,
             "Enabled": self.start_button,
+            "Dump Profile": profiler.dump_profile,
             "Exit": self.stop_tray
         }
 
@@ -79,6 +92,14 @@ class SystemTray:
         """
         pass
 
+    def cancel_scan(self, icon, item):
+        """ Cancel the running memory scans
+        :param icon: the icon
+        :param item: the item
+        """
+        if "ScanExecutor" in self.references:
+            self.references["ScanExecutor"].cancel()
+
     def stop_tray(self, *args, **kwargs):
         """ Stop the tray
         """
@@ -102,7 +123,9 @@ class SystemTray:
                 ps.Menu.SEPARATOR,
                 ps.MenuItem("Open Window", self.action),
                 ps.MenuItem("Enabled", self.action, checked=lambda item: self.states["Enabled"]),
+                ps.MenuItem(lambda item: self.scan_text, self.cancel_scan, visible=lambda item: self.scan_text is not None),
                 ps.Menu.SEPARATOR,
+                ps.MenuItem("Dump Profile", self.action, visible=profiler.is_profiling()),
                 ps.MenuItem("Exit", self.action)
             ))
 
@@ -114,7 +137,7 @@ class SystemTray:
 
             # Start tray
             logger.info("+ System Tray")
-            self.tray.run()
+            self.tray.run(setup=self.on_tray_ready)
             logger.info("- System Tray")
 
             self.on_shutdown()
@@ -122,16 +145,27 @@ class SystemTray:
         except Exception:
             exceptions.handle_error(self.references)
 
+    @staticmethod
+    def on_tray_ready(icon: ps.Icon):
+        """ Gets called inside its own thread, once the tray is set up
+        :param icon: the tray icon
+        """
+        icon.visible = True
+        logger.info("Tray icon is visible!")
+
     def on_shutdown(self):
         """ Will get executed when the tray stops
         """
         # Stop processing
-        self.processing_thread.running = False
+        self.processing_thread.stop()
 
         # Save storage
         if "Storage" in self.references:
             self.references["Storage"].update_file()
 
+        if "Recorder" in self.references:
+            self.references["Recorder"].close()
+
         if self.root_thread and self.root_thread.root:
             # Stop the GUI
             try:
@@ -0,0 +1,110 @@
+"""
+Typed publish / subscribe between the components, instead of flags that get polled
+
+```python
+from src import events
+
+event_bus = references["EventBus"]
+event_bus.subscribe(events.SettingsChanged, on_settings_changed, dispatch=processing_thread.call_soon)
+event_bus.publish(events.SettingsChanged(features=("0",)))
+```
+Every subscriber is called on its own thread, given by its dispatch function, e.g. Thread.call_soon()
+or RootThread.call_soon() for tkinter. Without one, it gets called right away on the publishing thread.
+"""
+
+import logging
+import threading
+import dataclasses
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass(frozen=True)
+class Event:
+    """ Base of all events, subscribing to it means subscribing to all
+    """
+
+
+@dataclasses.dataclass(frozen=True)
+class SettingsChanged(Event):
+    """ Settings or features of the storage changed, so the file needs to be saved
+    """
+    # Ids of the changed features
+    features: tuple = ()
+
+    # Names of the changed settings
+    settings: tuple = ()
+
+    # The publisher, so that it can ignore its own changes
+    source: object = None
+
+
+@dataclasses.dataclass(frozen=True)
+class KeysChanged(Event):
+    """ The bindings of the listener changed, e.g. a key or the 'toggle_zoom' setting
+    """
+
+
+@dataclasses.dataclass(frozen=True)
+class StatusChanged(Event):
+    """ The status of the gateway (and of the other instances) was checked
+    """
+    # {name: True, False or None}
+    status: dict
+
+
+@dataclasses.dataclass(frozen=True)
+class Attached(Event):
+    """ Attached to or detached from Minecraft, also when the game was closed
+    """
+    attached: bool
+
+
+class EventBus:
+    """ Delivers published events to their subscribers
+    """
+
+    def __init__(self, references: dict):
+        """ Initialize
+        :param references: the references
+        """
+        self.references = references
+
+        # {event type: [(callback, dispatch)]}
+        self.subscribers = {}
+        self.lock = threading.Lock()
+
+        self.references.update({"EventBus": self})
+        logger.info("+ EventBus")
+
+    def subscribe(self, event_type: type, callback, *, dispatch=None):
+        """ Subscribe to events of a type, including its subclasses
+        :param event_type: (type) subclass of Event
+        :param callback: called with the event
+        :param dispatch: called with the callback and the event instead, to call it on another thread
+        """
+        with self.lock:
+            self.subscribers.setdefault(event_type, []).append((callback, dispatch))
+
+    def unsubscribe(self, event_type: type, callback):
+        """ Unsubscribe a callback
+        :param event_type: (type) subclass of Event
+        :param callback: the callback
+        """
+        with self.lock:
+            self.subscribers[event_type] = [x for x in self.subscribers.get(event_type, []) if x[0] != callback]
+
+    def publish(self, event: Event):
+        """ Publish an event, can be called from any thread
+        :param event: (Event) the event
+        """
+        with self.lock:
+            subscribers = [x for event_type in type(event).__mro__ for x in self.subscribers.get(event_type, ())]
+
+        for callback, dispatch in subscribers:
+            if dispatch is None:
+                callback(event)
+
+            else:
+                dispatch(callback, event)
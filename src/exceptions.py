@@ -1,18 +1,9 @@
-import sys
-import time
 import logging
-import traceback
-import tkinter as tk
-from tkinter import messagebox
 
 
 logger = logging.getLogger(__name__)
 
 
-# Override tkinter exception handler
-tk.Tk.report_callback_exception = lambda self, exc, val, tb: handle_error(self.references)
-
-
 class MessageHandlingError(Exception):
     """ A exception to passes on a message to except clause
     """
@@ -24,6 +15,26 @@ class MessageHandlingError(Exception):
         self.message = message
 
 
+class GatewayError(Exception):
+    """ Base of all errors while accessing the memory of Minecraft, see processing.memory
+    """
+
+
+class ProcessNotFound(GatewayError):
+    """ The process isn't running or could not be opened
+    """
+
+
+class MemoryReadError(GatewayError):
+    """ Reading the memory failed
+    """
+
+
+class MemoryWriteError(GatewayError):
+    """ Writing the memory failed
+    """
+
+
 def handle_error(references: dict):
     """ Handle a exception
     :param references: (dict) the references
@@ -40,8 +51,5 @@ def handle_error(references: dict):
         stack_info=True
     )
 
-    # Notify user
-    messagebox.showerror(title="Critical Error", message="FOV-Changer crashed! Check log.txt for more insight.\n\nIf you need help, feel free to join our Discord or open up an issue on GitHub. Please make sure to include the log.txt file created next to FOV-Changer.")
-
-    # Kill all
-    references["SystemTray"].stop_tray()
+    # Notify user and kill all
+    references["Frontend"].crash()
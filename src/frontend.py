@@ -0,0 +1,128 @@
+""" The interface between the engine (storage, gateway, listener, ...) and whatever displays it """
+
+import logging
+
+from src import events
+
+
+logger = logging.getLogger(__name__)
+
+
+class Frontend:
+    """ Everything the engine wants to show to or ask from the user
+        Nothing happens in this base class, so that it can be used as a no-op frontend
+        Note: the methods get called from the processing and listener threads,
+              the ones of events are called through dispatch()
+    """
+
+    def __init__(self, references: dict):
+        """ Initialize
+        :param references: the references, containing the event bus
+        """
+        self.references = references
+
+        event_bus = references["EventBus"]
+        event_bus.subscribe(events.StatusChanged, lambda e: self.render_status(e.status), dispatch=self.dispatch)
+        event_bus.subscribe(events.Attached, lambda e: self.set_attached(e.attached), dispatch=self.dispatch)
+        event_bus.subscribe(events.SettingsChanged, self.settings_changed, dispatch=self.dispatch)
+
+        # Add to references
+        self.references.update({"Frontend": self})
+
+    def dispatch(self, callback, event: events.Event):
+        """ Call the subscriber of an event on the thread of the frontend, right away in this base class
+        :param callback: the subscriber
+        :param event: (Event) the event
+        """
+        callback(event)
+
+    def create_widgets(self):
+        """ Create the basic ui, so that events can be displayed
+        """
+        pass
+
+    def create_content(self):
+        """ Create the content, storage and gateway are ready at this point
+        """
+        pass
+
+    def create_tab_features(self, features, callback):
+        """ (Re-)create the features after new ones were fetched
+        :param features: (Features) the features object
+        :param callback: called without arguments afterwards
+        """
+        callback()
+
+    def render_status(self, status: dict):
+        """ Display the status of the gateway, see events.StatusChanged
+        :param status: (dict) the status
+        """
+        pass
+
+    def alert(self, msg: str, *, warning=False):
+        """ Show a short message
+        :param msg: (str) the message
+        :param warning: (bool) if it is a warning
+        """
+        pass
+
+    def quit(self, msg: str, title: str):
+        """ Show a fatal error and then close the application
+        :param msg: (str) the message
+        :param title: (str) the title
+        """
+        pass
+
+    def hide(self):
+        """ Hide the application, because the user wants to start minimized
+        """
+        pass
+
+    def after_render(self, cmd):
+        """ Call something once the frontend is ready, e.g. auto attaching
+        :param cmd: called without arguments
+        """
+        cmd()
+
+    def begin_attach(self) -> bool:
+        """ Attaching or detaching starts
+        :returns: (bool) False if it is not allowed right now, e.g. because of the cooldown
+        """
+        return True
+
+    def end_attach(self, attached: bool, cooldown: int):
+        """ Attaching or detaching has finished
+        :param attached: (bool) if attached now
+        :param cooldown: (int) milliseconds until the next begin_attach() is allowed
+        """
+        pass
+
+    def set_attached(self, attached: bool):
+        """ Show if attached, also when the game was closed, see events.Attached
+        :param attached: (bool) if attached now
+        """
+        pass
+
+    def settings_changed(self, event: events.SettingsChanged):
+        """ Settings or features changed, e.g. read from memory or reloaded from the storage file
+        :param event: (SettingsChanged) the event
+        """
+        pass
+
+    def scan_progress(self, name: str, progress: float | None):
+        """ Show the progress of a memory scan, see executor.ScanExecutor
+            The user can cancel it with ScanExecutor.cancel()
+        :param name: (str) name of the scan
+        :param progress: (float) between 0 and 1, None once it has finished
+        """
+        pass
+
+    def bell(self):
+        """ Get the attention of the user
+        """
+        pass
+
+    def crash(self):
+        """ Something unhandled happened and was logged, tear everything down
+        """
+        pass
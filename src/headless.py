@@ -0,0 +1,137 @@
+"""
+Headless mode, runs the engine (storage, attach, listener and presence) without tkinter, PIL and the tray
+Everything the gui would display gets logged instead
+
+Start it with `python run.py --headless` and stop it with Ctrl+C, it waits for Minecraft to start
+"""
+
+import logging
+import threading
+
+from src import events, frontend, tracing
+from src.processing import processing
+
+
+logger = logging.getLogger(__name__)
+
+
+class ConsoleFrontend(frontend.Frontend):
+    """ Frontend for the headless mode, logs instead of displaying
+        Note: alerts are not logged again, the engine already logs them
+    """
+
+    def __init__(self, references: dict):
+        """ Initialize
+        :param references: the references
+        """
+        super().__init__(references)
+
+        # Instead of the disabled start button
+        self.attaching = False
+
+    def render_status(self, status: dict):
+        """ See Frontend
+        """
+        logger.debug("Status: " + ", ".join(f"{name}={state}" for name, state in status.items()))
+
+    def quit(self, msg: str, title: str):
+        """ See Frontend
+        """
+        logger.error(f"{title}: {msg}")
+        self.references["Headless"].stop()
+
+    def begin_attach(self) -> bool:
+        """ See Frontend
+        """
+        if self.attaching:
+            return False
+
+        self.attaching = True
+        return True
+
+    def end_attach(self, attached: bool, cooldown: int):
+        """ See Frontend, no cooldown needed without a button
+        """
+        self.attaching = False
+
+    def set_attached(self, attached: bool):
+        """ See Frontend
+        """
+        logger.info("Attached!" if attached else "Not attached!")
+
+    def scan_progress(self, name: str, progress: float | None):
+        """ See Frontend, scans get cancelled by stopping
+        """
+        if progress is not None:
+            logger.info(f"{name}: {progress:.0%}")
+
+    def crash(self):
+        """ See Frontend
+        """
+        self.references["Headless"].stop()
+
+
+class Headless:
+    """ The counterpart to core.SystemTray, without any gui
+    """
+
+    def __init__(self):
+        """ Initialize
+        """
+        # References, see core.SystemTray
+        self.references = {"Headless": self}
+
+        # Components notify each other through it
+        events.EventBus(self.references)
+
+        # Records the session, if FOV_RECORD is set
+        tracing.Recorder.from_environment(self.references)
+
+        self.frontend = ConsoleFrontend(self.references)
+
+        # Processing
+        self.processing_thread = processing.ProcessingThread(self.references)
+
+        self.stopped = threading.Event()
+
+    def stop(self):
+        """ Stop the headless mode, can be called from any thread
+        """
+        self.stopped.set()
+
+    def run(self) -> None:
+        """ Start everything and block until stopped
+        """
+        logger.info("+ Headless")
+        self.processing_thread.start()
+
+        # There is no start button, so attach as soon as Minecraft is running
+        self.processing_thread.queue.append({"cmd": "discover", "params": [], "kwargs": {}})
+
+        try:
+            # Wait in steps, so that Ctrl+C gets through on Windows
+            while not self.stopped.wait(0.5):
+                pass
+
+        except KeyboardInterrupt:
+            pass
+
+        logger.info("- Headless")
+        self.on_shutdown()
+
+    def on_shutdown(self):
+        """ Stop processing and the listener, save the storage
+        """
+        self.processing_thread.stop()
+
+        if "Listener" in self.references:
+            self.references["Listener"].stop()
+
+        if self.processing_thread.is_alive():
+            self.processing_thread.join()
+
+        if "Storage" in self.references:
+            self.references["Storage"].update_file()
+
+        if "Recorder" in self.references:
+            self.references["Recorder"].close()
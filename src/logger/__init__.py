@@ -8,12 +8,12 @@ logger = logging.getLogger(__name__)
 ```
 """
 
-import queue
+import copy
+import collections
 import time
 import logging
 import logging.config
 import threading
-import tkinter as tk
 
 
 CONFIG = {
@@ -79,13 +79,25 @@ CONFIG = {
 }
 
 
-def start_logging():
+def start_logging(*, gui=True):
     """ Required to be called at the start, so that logging works
+    :param gui: (bool) if there is a "Log" tab, else no records get buffered for it (headless)
     """
-    logging.config.dictConfig(CONFIG)
+    config = CONFIG
+
+    if not gui:
+        config = copy.deepcopy(CONFIG)
+        del config["handlers"]["gui"]
+        config["handlers"]["queue_handler"]["handlers"].remove("gui")
+
+    logging.config.dictConfig(config)
 
     # Enable the QueueListener-Thread, which writes our messages non-blockingly
-    logging.getHandlerByName("queue_handler").listener.start()
+    listener = logging.getHandlerByName("queue_handler").listener
+    listener.start()
+
+    # Named, so that it can be told apart e.g. in profiles
+    listener._thread.name = "QueueListener"
 
     # Set higher requirement for loggers from third-party libraries
     logging.getLogger("PIL").setLevel(logging.ERROR)
@@ -105,51 +117,62 @@ class GuiHandler(logging.Handler):
     """ Custom handler to add log records to the "Log" tab inside the ui
     """
 
+    # Records kept for the tab, it is only built once viewed and released again while the window is hidden
+    HISTORY = 1000
+
     def __init__(self, level = 0):
-        """ Until this object receives its target tk.Text widget, it will buffer all messages
+        """ Until this object receives its target tk.Text widget, it will buffer the last messages
         """
         super().__init__(level)
 
         self.references: dict = None
-        self.widget: logging.LogRecord | None = None
-        self.queue = queue.Queue()
+        self.widget: "tk.Text | None" = None
+        self.records = collections.deque(maxlen=self.HISTORY)
 
-    def set_widget(self, references: dict, widget: tk.Text):
+    def set_widget(self, references: dict, widget: "tk.Text"):
         """ Requires the target tk.Text widget to add the log records
         :param references:
         :param widget: said tk.Text
         """
-        self.references = references
-        self.widget = widget
+        # Locked, so that no record gets lost or added twice in between
+        with self.lock:
+            self.references = references
+            self.widget = widget
+            records = list(self.records)
 
         def in_root_thread():
-            self.widget.config(state="normal")
+            widget.config(state="normal")
 
-            while self.queue.qsize() != 0:
-                old_record = self.queue.get()
+            for old_record in records:
+                widget.insert("end", f"{self.format(old_record)}\n")
 
-                self.widget.insert("end", f"{self.format(old_record)}\n")
-
-            self.widget.config(state="disabled")
+            widget.config(state="disabled")
 
         # Log all log records that have been saved prior
         if self.references and self.references["RootThread"].is_mainloop_running:
-            self.widget.after(0, in_root_thread)
+            widget.after(0, in_root_thread)
+
+    def release_widget(self):
+        """ The tk.Text widget gets destroyed, buffer again until the next one
+        """
+        with self.lock:
+            self.widget = None
 
     def emit(self, record: logging.LogRecord):
         """ Get called with passed on log record
         :param record: the log record
         """
-        # The tk.Text widget is only created after some time,
-        # until then we buffer all log records
-        if not self.widget or not self.references:
-            self.queue.put(record)
+        self.records.append(record)
+
+        # The tk.Text widget is only created once the tab is viewed,
+        # until then the records are only kept
+        if not (widget := self.widget) or not self.references:
             return
 
         def in_root_thread():
-            self.widget.config(state="normal")
-            self.widget.insert("end", f"{self.format(record)}\n")
-            self.widget.config(state="disabled")
+            widget.config(state="normal")
+            widget.insert("end", f"{self.format(record)}\n")
+            widget.config(state="disabled")
 
         if self.references and self.references["RootThread"].is_mainloop_running:
-            self.widget.after(0, in_root_thread)
+            widget.after(0, in_root_thread)
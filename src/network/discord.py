@@ -1,8 +1,6 @@
 import time
 import logging
 
-import pypresence
-
 
 logger = logging.getLogger(__name__)
 
@@ -11,19 +9,14 @@ class Discord:
     """ Handles the discord rich presence
     """
 
-    def __init__(self, references: dict, loop):
+    def __init__(self, references: dict):
         """ Initialize
         :param references: (dict) the references
         """
         self.references = references
 
-        try:
-            self.rpc = pypresence.Presence(client_id="733376215737434204", loop=loop)
-            self.rpc.connect()
-
-        # Discord not open (or not installed)
-        except Exception:
-            self.rpc = None
+        # Connected inside the event loop of the processing thread, see connect()
+        self.rpc = None
 
         self.last_server = None
         self.last_time = None
@@ -46,6 +39,22 @@ class Discord:
         self.references.update({"Discord": self})
         logger.info("+ Discord")
 
+    async def connect(self):
+        """ Connect to discord, awaited inside the event loop of the processing thread
+        """
+        # Imported here, as it isn't needed for the tray icon to show up
+        import asyncio
+        import pypresence
+
+        try:
+            rpc = pypresence.AioPresence(client_id="733376215737434204", loop=asyncio.get_running_loop())
+            await rpc.connect()
+            self.rpc = rpc
+
+        # Discord not open (or not installed)
+        except Exception:
+            self.rpc = None
+
     @staticmethod
     def get_server_part(server) -> str:
         """ Get the needed part from server ip / domain for the partner_servers hash table
@@ -54,7 +63,7 @@ class Discord:
         """
         return ".".join(server.split(".")[-1:-3:-1][::-1])
 
-    def update(self, connected: bool, server: str, version: str):
+    async def update(self, connected: bool, server: str, version: str):
         """ Updates the rich presence
         :param connected: if fov changer started and connected
         :param server: server domain
@@ -95,9 +104,9 @@ class Discord:
 
             state = {"state": f"on {version}"} if version and self.feature["settings"]["show_version"] else {}
 
-            self.rpc.update(details=details, large_image="logo-full", large_text="Using FOV Changer",
-                            small_image="mc", small_text="Minecraft Bedrock",
-                            start=self.last_time, **state)
+            await self.rpc.update(details=details, large_image="logo-full", large_text="Using FOV Changer",
+                                  small_image="mc", small_text="Minecraft Bedrock",
+                                  start=self.last_time, **state)
 
         else:
-            self.rpc.update(state="Ready to start", large_image="logo-full", large_text="Using FOV Changer")
+            await self.rpc.update(state="Ready to start", large_image="logo-full", large_text="Using FOV Changer")
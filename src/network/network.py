@@ -3,9 +3,6 @@
 import json
 import logging
 
-import requests
-
-from src import ui
 from src.processing import storage
 from src.exceptions import MessageHandlingError
 
@@ -25,24 +22,59 @@ class Network:
 
         self.storage = references["Storage"]
 
+        # Keeps connections to the api alive, see warm_up()
+        import requests
+        self.session = requests.Session()
+
+        # Offsets of already fetched versions
+        self.cache = storage.OffsetsCache(self.storage.FEATURES_DIR)
+
+        # Version ids with offsets found by signatures, these don't get cached
+        self.scanned = set()
+
         # Add to references
         self.references.update({"Network": self})
         logger.info("+ Network")
 
-    def fetch_features(self, current_version: str) -> bool:
-        """ Fetch the data from the api
-        :param current_version: current mc version
-        :returns: if succeed
+    def warm_up(self):
+        """ Connect to the api in advance, so that fetching at attach doesn't need a new (TLS) connection
         """
-        version_id = "".join(current_version.split("."))
-        logger.info(f"Getting features for '{version_id}'")
+        import requests
+
+        if not self.storage.data:
+            return
+
+        try:
+            self.session.head(self.storage.get("api"), timeout=5)
+            logger.info("Connected to the api")
+
+        except requests.exceptions.RequestException:
+            logger.info("Couldn't connect to the api in advance")
+
+    def fetch_offsets(self, version_id: str, memory=None) -> str | None:
+        """ Get the offsets of a version, from the cache or the api
+            If the api doesn't support it yet, they get searched with signatures
+            Errors get displayed
+        :param version_id: (str) the version id, e.g. '11610201'
+        :param memory: (Memory) memory of the game to search, defaults to the one of the gateway
+        :returns: (str) the offsets, just like the api returns them, or None
+        """
+        # Only needed once attaching, so not imported at startup
+        import requests
+
+        # Fetched once before?
+        cached = self.cache.get(version_id)
+        if cached is not None:
+            logger.info(f"Using cached features for '{version_id}'")
+            return cached
 
-        # Retry certain times
         data = None
+
+        # Retry certain times
         tries = 0
-        while tries <= 3:
+        while not data and tries <= 3:
             try:
-                resp = requests.get(f"{self.storage.get('api')}offsets/{version_id}")
+                resp = self.session.get(f"{self.storage.get('api')}offsets/{version_id}")
                 logger.info(f"Feature request number {tries}")
 
                 # Too many request
@@ -58,6 +90,9 @@ class Network:
 
                 # Not found, there are no offsets for that version
                 if status_code == 404:
+                    if (scanned := self.scan_offsets(version_id, memory)) is not None:
+                        return scanned
+
                     raise MessageHandlingError("Minecraft version is unsupported!")
 
                 # Success
@@ -74,38 +109,114 @@ class Network:
             # Alert message
             except MessageHandlingError as e:
                 logger.info(e.message)
-                ui.queue_alert_message(self.references, e.message, warning=True)
-                return False
+                self.references["Frontend"].alert(e.message, warning=True)
+                return None
 
             tries += 1
 
         if not data:
             logger.info("Couldn't communicate with the server!")
-            ui.queue_alert_message(self.references, "Couldn't communicate with the server!", warning=True)
+            self.references["Frontend"].alert("Couldn't communicate with the server!", warning=True)
+            return None
+
+        return data["offsets"]
+
+    def scan_offsets(self, version_id: str, memory=None) -> str | None:
+        """ Search the offsets with the signatures (res/signatures.json) inside the memory of the game
+        :param version_id: (str) the version id
+        :param memory: (Memory) the memory, defaults to the one of the gateway
+        :returns: (str) the offsets, just like the api returns them, or None if nothing was found
+        """
+        from src.processing import scanner
+
+        if memory is None:
+            memory = self.references["Gateway"].memory
+
+        if not memory.process_handle or (signatures := scanner.load_signatures()) is None:
+            return None
+
+        logger.info(f"Searching offsets for '{version_id}' by signatures")
+
+        try:
+            module_scanner = scanner.Scanner(memory, self.references.get("ScanExecutor"))
+            features = module_scanner.scan_features(signatures, storage.Features(self.references).presets)
+
+        except (KeyError, TypeError, ValueError):
+            logger.info("Invalid signatures!")
+            return None
+
+        # A worker of the scan executor failed
+        except Exception as e:
+            logger.info(f"Signature scan failed: {e!r}")
+            return None
+
+        if not any(x["a"] for x in features.values()):
+            return None
+
+        self.scanned.add(version_id)
+        return json.dumps(features)
+
+    def parse_offsets(self, version_id: str, offsets: str):
+        """ Parse offsets into features, the settings of the stored features are kept
+            Errors get displayed, valid offsets get cached
+        :param version_id: (str) the version id
+        :param offsets: (str) the offsets, just like the api returns them
+        :returns: (Features) the features or None
+        """
+        try:
+            features = storage.Features.from_server_response(self.references, json.loads(offsets),
+                                                             saved_features=self.storage.features if self.storage.features else None)
+
+        except json.JSONDecodeError:
+            logger.info("Invalid response from server!")
+            self.references["Frontend"].alert("Invalid response from server!", warning=True)
+            return None
+
+        except MessageHandlingError as e:
+            logger.info(e.message)
+            self.references["Frontend"].alert("Invalid offsets!", warning=True)
+            return None
+
+        if version_id not in self.cache and version_id not in self.scanned:
+            self.cache.put(version_id, offsets)
+
+        return features
+
+    def fetch_features(self, current_version: str) -> bool:
+        """ Fetch the data from the api
+        :param current_version: current mc version
+        :returns: if succeed
+        """
+        version_id = "".join(current_version.split("."))
+        logger.info(f"Getting features for '{version_id}'")
+
+        if (offsets := self.fetch_offsets(version_id)) is None:
             return False
 
-        else:
-            # Parse
-            try:
-                offs = json.loads(data["offsets"])
+        # Parse
+        if (features := self.parse_offsets(version_id, offsets)) is None:
+            return False
 
-                # Parse server response
-                self.storage.features = storage.Features.from_server_response(self.references, offs, saved_features=self.storage.features if self.storage.features else None)
+        self.storage.features = features
+        self.storage.set("features", self.storage.features.for_json)
+        self.storage.set("mc_version", current_version)
 
-            except json.JSONDecodeError:
-                logger.info("Invalid response from server!")
-                ui.queue_alert_message(self.references, "Invalid response from server!", warning=True)
-                return False
+        self.storage.update_file()
 
-            except MessageHandlingError as e:
-                logger.info(e.message)
-                ui.queue_alert_message(self.references, "Invalid offsets!", warning=True)
-                return False
+        logger.info("Saved new features and version")
+        return True
 
-            self.storage.set("features", self.storage.features.for_json)
-            self.storage.set("mc_version", current_version)
+    def features_for_version(self, version: str, memory=None):
+        """ Features of another version, without changing the stored ones
+            E.g. for another instance of the game
+        :param version: (str) the mc version
+        :param memory: (Memory) memory of that instance, for searching the offsets with signatures
+        :returns: (Features) the features or None
+        """
+        version_id = "".join(version.split("."))
+        logger.info(f"Getting features for '{version_id}'")
 
-            self.storage.update_file()
+        if (offsets := self.fetch_offsets(version_id, memory)) is None:
+            return None
 
-            logger.info("Saved new features and version")
-            return True
+        return self.parse_offsets(version_id, offsets)
@@ -0,0 +1,184 @@
+"""
+Keeps a local mirror of the offsets of all versions, e.g. for machines without internet access at attach
+
+The api lists every version with a hash of its offsets at {api}offsets/manifest:
+```
+{"status": 200, "versions": {"11610201": "<sha256 of the offsets, hex>", ...}}
+```
+Only versions whose hash differs from the cached offsets get downloaded, each one from {api}offsets/{version_id}
+like Network.fetch_offsets(). Every version is cached as soon as it is downloaded, so an interrupted sync
+continues where it stopped. The api can be any server, e.g. a local one for testing.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+
+from src.exceptions import MessageHandlingError
+from src.processing import storage
+
+
+logger = logging.getLogger(__name__)
+
+
+class OffsetsSync(threading.Thread):
+    """ Syncs the offsets cache with the api in the background, while the 'offsets_sync' setting is enabled
+    """
+
+    # Seconds between two syncs
+    INTERVAL = 6 * 60 * 60
+
+    # Seconds until a failed sync is retried
+    RETRY_INTERVAL = 10 * 60
+
+    # Time of the last complete sync, inside the features directory
+    STATE_NAME = "sync.json"
+
+    def __init__(self, references: dict, *, api: str = None, session=None):
+        """ Initialize
+        :param references: the references
+        :param api: (str) url of the api, defaults to the one of the storage
+        :param session: (Session) for the requests, defaults to an own one, sessions aren't thread safe
+        """
+        super().__init__(name=self.__class__.__name__, daemon=True)
+        self.references = references
+        self.storage = references["Storage"]
+        self.network = references["Network"]
+        self.cache = self.network.cache
+
+        self.api = api
+
+        if session is None:
+            import requests
+            session = requests.Session()
+
+        self.session = session
+
+        self.stopped = threading.Event()
+
+        self.references.update({"OffsetsSync": self})
+        logger.info("+ OffsetsSync")
+
+    @property
+    def state_path(self) -> str:
+        """ Path of the state file
+        """
+        return os.path.join(self.cache.directory, self.STATE_NAME)
+
+    def last_sync(self) -> float:
+        """ Time of the last complete sync, 0 if never
+        """
+        try:
+            with open(self.state_path) as f:
+                return float(json.load(f)["last_sync"])
+
+        except (FileNotFoundError, json.JSONDecodeError, KeyError, TypeError, ValueError):
+            return 0
+
+    def get(self, path: str) -> dict:
+        """ Request something from the api
+        :param path: (str) path after the api url
+        :returns: (dict) the response
+        :raises MessageHandlingError: on failure
+        """
+        import requests
+
+        api = self.api if self.api is not None else self.storage.get("api")
+
+        try:
+            resp = self.session.get(f"{api}{path}", timeout=10)
+
+        except requests.exceptions.RequestException:
+            raise MessageHandlingError("Couldn't communicate with the server!")
+
+        if resp.status_code != 200:
+            raise MessageHandlingError(f"Server responded with {resp.status_code}!")
+
+        try:
+            data = resp.json()
+
+        except ValueError:
+            raise MessageHandlingError("Invalid response from server!")
+
+        if not isinstance(data, dict) or data.get("status") != 200:
+            raise MessageHandlingError("Server responded with an error!")
+
+        return data
+
+    def sync(self) -> int:
+        """ Download the new and changed offsets
+        :returns: (int) number of downloaded versions
+        :raises MessageHandlingError: if the manifest couldn't be fetched, invalid versions are only skipped
+        """
+        versions = self.get("offsets/manifest").get("versions")
+
+        if not isinstance(versions, dict):
+            raise MessageHandlingError("Invalid manifest!")
+
+        outdated = [(version_id, offsets_hash) for version_id, offsets_hash in versions.items()
+                    if self.cache.hash(version_id) != offsets_hash]
+        downloaded = 0
+
+        for version_id, offsets_hash in outdated:
+            if self.stopped.is_set():
+                break
+
+            try:
+                offsets = self.get(f"offsets/{version_id}")["offsets"]
+
+                # Changed in between or broken, next time again
+                if not isinstance(offsets, str) or self.cache.hash_offsets(offsets) != offsets_hash:
+                    raise MessageHandlingError("Hash doesn't match!")
+
+                # Same check as for the offsets of the current version
+                storage.Features.parse_features(storage.Features(self.references), json.loads(offsets),
+                                                shorten_keys=True)
+
+            # Also invalid json
+            except (MessageHandlingError, KeyError, ValueError, AttributeError, TypeError) as e:
+                logger.info(f"- Skipped offsets of '{version_id}': {getattr(e, 'message', repr(e))}")
+                continue
+
+            self.cache.put(version_id, offsets)
+            downloaded += 1
+
+        # Complete, so there is nothing to resume
+        if not self.stopped.is_set():
+            storage.OffsetsCache.write_file(self.state_path, {"last_sync": time.time(), "versions": len(versions)})
+
+        logger.info(f"Synced offsets: {downloaded} of {len(outdated)} outdated versions downloaded")
+        return downloaded
+
+    def stop(self):
+        """ Stop the thread, a running sync stops after the current version
+        """
+        self.stopped.set()
+
+    def run(self) -> None:
+        """ Sync whenever it is due
+        """
+        while not self.stopped.is_set():
+            wait = self.last_sync() + self.INTERVAL - time.time()
+
+            if wait <= 0 and self.storage.settings["offsets_sync"]:
+                try:
+                    self.sync()
+
+                except MessageHandlingError as e:
+                    logger.info(f"- Couldn't sync offsets: {e.message}")
+                    wait = self.RETRY_INTERVAL
+
+                # E.g. the cache couldn't be written, the thread has to keep running
+                except Exception as e:
+                    logger.info(f"- Couldn't sync offsets: {e!r}")
+                    wait = self.RETRY_INTERVAL
+
+                else:
+                    wait = self.INTERVAL
+
+            # The setting is checked again from time to time
+            self.stopped.wait(min(max(wait, 0) or self.RETRY_INTERVAL, self.RETRY_INTERVAL))
+
+        self.session.close()
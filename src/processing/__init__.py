@@ -2,4 +2,13 @@
 and more!
 """
 
-from src.processing.processing import Gateway
+
+def __getattr__(name):
+    """ Lazy re-export, the gateway isn't needed before attaching
+    :param name: the attribute name
+    """
+    if name == "Gateway":
+        from src.processing.gateway import Gateway
+        return Gateway
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,400 @@
+"""
+Watches for Minecraft to start, so that auto attach works even if the game isn't running yet
+
+The search is fast right after it got started and backs off while nothing is found,
+while the user is away (no input) it only searches rarely.
+"""
+
+import os
+import sys
+import time
+import logging
+import threading
+
+
+logger = logging.getLogger(__name__)
+
+
+class ProcessFinder:
+    """ Finds a process by its name
+        Remembers the names of the process ids it has seen, so that a search doesn't need to look up
+        every process again and a found process can be checked without a search
+    """
+
+    def __init__(self):
+        """ Initialize
+        """
+        # {process id: name}
+        self.names = {}
+
+    def scan(self) -> dict:
+        """ All running processes
+        :returns: (dict) {process id: name}
+        """
+        raise NotImplementedError("Must override scan() method!")
+
+    def is_running(self, process_id: int, name: str) -> bool:
+        """ If the process is still running, under that name (process ids get reused)
+        :param process_id: (int) the process id
+        :param name: (str) its name
+        """
+        raise NotImplementedError("Must override is_running() method!")
+
+    @staticmethod
+    def same_name(a: str, b: str) -> bool:
+        """ Compare process names
+        """
+        return a == b
+
+    def find(self, name: str) -> int | None:
+        """ Find a running process
+        :param name: (str) the name, e.g. 'Minecraft.Windows.exe'
+        :returns: (int) its process id or None
+        """
+        # Found before?
+        for process_id, cached_name in list(self.names.items()):
+            if self.same_name(cached_name, name) and self.is_running(process_id, name):
+                return process_id
+
+        self.names = self.scan()
+
+        for process_id, process_name in self.names.items():
+            if self.same_name(process_name, name):
+                return process_id
+
+        return None
+
+
+class ProcFinder(ProcessFinder):
+    """ Linux, using /proc, e.g. for running the game with wine or for tests
+    """
+
+    def __init__(self, proc_dir: str = "/proc"):
+        """ Initialize
+        :param proc_dir: (str) where procfs is mounted
+        """
+        super().__init__()
+        self.proc_dir = proc_dir
+
+    def read_name(self, process_id: int) -> str | None:
+        """ Name of a process, the name of the executable in its command line
+            Note: /proc/<pid>/comm is cut after 15 characters
+        :param process_id: (int) the process id
+        :returns: (str) the name or None if it exited
+        """
+        try:
+            with open(os.path.join(self.proc_dir, str(process_id), "cmdline"), "rb") as f:
+                executable = f.read().split(b"\0", 1)[0].decode(errors="replace")
+
+        except OSError:
+            return None
+
+        # Wine shows windows paths
+        return executable.replace("\\", "/").rsplit("/", 1)[-1]
+
+    def scan(self) -> dict:
+        """ See ProcessFinder, only new process ids get looked up
+        """
+        names = {}
+
+        for entry in os.listdir(self.proc_dir):
+            if not entry.isdigit():
+                continue
+
+            process_id = int(entry)
+
+            if (name := self.names.get(process_id)) is None:
+                name = self.read_name(process_id)
+
+            if name is not None:
+                names[process_id] = name
+
+        return names
+
+    def is_running(self, process_id: int, name: str) -> bool:
+        """ See ProcessFinder
+        """
+        return self.read_name(process_id) == name
+
+
+class WindowsFinder(ProcessFinder):
+    """ Windows, using a toolhelp snapshot for searching and a process handle for checking
+    """
+
+    TH32CS_SNAPPROCESS = 0x2
+    PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+    STILL_ACTIVE = 259
+
+    def __init__(self):
+        """ Initialize
+        """
+        super().__init__()
+
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESSENTRY32W(ctypes.Structure):
+            _fields_ = [
+                ("dwSize", wintypes.DWORD),
+                ("cntUsage", wintypes.DWORD),
+                ("th32ProcessID", wintypes.DWORD),
+                ("th32DefaultHeapID", ctypes.c_size_t),
+                ("th32ModuleID", wintypes.DWORD),
+                ("cntThreads", wintypes.DWORD),
+                ("th32ParentProcessID", wintypes.DWORD),
+                ("pcPriClassBase", wintypes.LONG),
+                ("dwFlags", wintypes.DWORD),
+                ("szExeFile", wintypes.WCHAR * 260)
+            ]
+
+        self.ctypes = ctypes
+        self.wintypes = wintypes
+        self.kernel32 = ctypes.windll.kernel32
+        self.entry_type = PROCESSENTRY32W
+
+        self.kernel32.CreateToolhelp32Snapshot.restype = wintypes.HANDLE
+        self.kernel32.OpenProcess.restype = wintypes.HANDLE
+
+    @staticmethod
+    def same_name(a: str, b: str) -> bool:
+        """ See ProcessFinder, names are case insensitive on windows
+        """
+        return a.lower() == b.lower()
+
+    def scan(self) -> dict:
+        """ See ProcessFinder
+        """
+        names = {}
+
+        snapshot = self.kernel32.CreateToolhelp32Snapshot(self.TH32CS_SNAPPROCESS, 0)
+        if not snapshot or snapshot == self.wintypes.HANDLE(-1).value:
+            return names
+
+        # Handles don't fit into the default c_int arguments on 64 bit
+        snapshot = self.wintypes.HANDLE(snapshot)
+
+        try:
+            entry = self.entry_type()
+            entry.dwSize = self.ctypes.sizeof(entry)
+
+            more = self.kernel32.Process32FirstW(snapshot, self.ctypes.byref(entry))
+            while more:
+                names[entry.th32ProcessID] = entry.szExeFile
+                more = self.kernel32.Process32NextW(snapshot, self.ctypes.byref(entry))
+
+        finally:
+            self.kernel32.CloseHandle(snapshot)
+
+        return names
+
+    def is_running(self, process_id: int, name: str) -> bool:
+        """ See ProcessFinder
+        """
+        handle = self.kernel32.OpenProcess(self.PROCESS_QUERY_LIMITED_INFORMATION, False, process_id)
+        if not handle:
+            return False
+
+        handle = self.wintypes.HANDLE(handle)
+
+        try:
+            exit_code = self.wintypes.DWORD()
+            if not self.kernel32.GetExitCodeProcess(handle, self.ctypes.byref(exit_code)) or \
+                    exit_code.value != self.STILL_ACTIVE:
+                return False
+
+            size = self.wintypes.DWORD(1024)
+            buffer = self.ctypes.create_unicode_buffer(size.value)
+            if not self.kernel32.QueryFullProcessImageNameW(handle, 0, buffer, self.ctypes.byref(size)):
+                return False
+
+            return self.same_name(buffer.value.rsplit("\\", 1)[-1], name)
+
+        finally:
+            self.kernel32.CloseHandle(handle)
+
+
+def create_finder() -> ProcessFinder:
+    """ The finder for this platform
+    """
+    return WindowsFinder() if sys.platform == "win32" else ProcFinder()
+
+
+def idle_seconds() -> float:
+    """ Seconds since the last user input, 0 if unknown (not on windows)
+    """
+    if sys.platform != "win32":
+        return 0
+
+    import ctypes
+    from ctypes import wintypes
+
+    class LASTINPUTINFO(ctypes.Structure):
+        _fields_ = [("cbSize", wintypes.UINT), ("dwTime", wintypes.DWORD)]
+
+    info = LASTINPUTINFO()
+    info.cbSize = ctypes.sizeof(info)
+
+    if not ctypes.windll.user32.GetLastInputInfo(ctypes.byref(info)):
+        return 0
+
+    return ((ctypes.windll.kernel32.GetTickCount() - info.dwTime) & 0xFFFFFFFF) / 1000
+
+
+def lower_priority():
+    """ Lower the priority of the calling thread
+    """
+    try:
+        if sys.platform == "win32":
+            import ctypes
+
+            # THREAD_PRIORITY_LOWEST
+            ctypes.windll.kernel32.SetThreadPriority(ctypes.windll.kernel32.GetCurrentThread(), -2)
+
+        # On linux the nice value is per thread
+        elif sys.platform.startswith("linux"):
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+
+    except OSError:
+        pass
+
+
+class Discovery(threading.Thread):
+    """ Searches for Minecraft and queues an attach, once found
+        It pauses afterwards, resume() it to search again, e.g. after the game was closed, or retry() it after
+        a failed attach
+    """
+
+    PROCESS_NAME = "Minecraft.Windows.exe"
+
+    # Seconds between searches, growing from FAST to MAX
+    FAST_INTERVAL = 0.5
+    MAX_INTERVAL = 5
+    BACKOFF = 1.5
+
+    # Without user input for IDLE_AFTER seconds, search every IDLE_INTERVAL seconds
+    IDLE_AFTER = 120
+    IDLE_INTERVAL = 30
+
+    # A just started game needs a moment until it can be attached to
+    SETTLE_TIME = 3
+
+    # Seconds until searching again after a failed attach
+    RETRY_INTERVAL = 20
+
+    def __init__(self, references: dict, finder: ProcessFinder = None):
+        """ Initialize
+        :param references: the references
+        :param finder: (ProcessFinder) defaults to the one of this platform
+        """
+        super().__init__(name=self.__class__.__name__, daemon=True)
+        self.references = references
+
+        self.finder = finder if finder is not None else create_finder()
+        self.interval = self.FAST_INTERVAL
+
+        # Set while searching
+        self.searching = threading.Event()
+
+        # Ends the current wait
+        self.wake = threading.Event()
+        self.stopped = False
+
+        # Waits for the interval before searching, see retry()
+        self.delayed = False
+
+        # Add to references
+        self.references.update({"Discovery": self})
+        logger.info("+ Discovery")
+
+    def resume(self):
+        """ Start searching (again), fast at first
+        """
+        if not self.is_alive():
+            self.start()
+
+        self.interval = self.FAST_INTERVAL
+        self.delayed = False
+        self.searching.set()
+        self.wake.set()
+
+    def retry(self):
+        """ Search again after a failed attach, not before RETRY_INTERVAL seconds (unless resumed)
+        """
+        if not self.is_alive():
+            self.start()
+
+        self.interval = self.RETRY_INTERVAL
+        self.delayed = True
+        self.searching.set()
+
+    def pause(self):
+        """ Stop searching
+        """
+        self.searching.clear()
+
+    def stop(self):
+        """ Stop the thread
+        """
+        self.stopped = True
+        self.searching.set()
+        self.wake.set()
+
+    def run(self) -> None:
+        """ Search, whenever not paused
+        """
+        lower_priority()
+
+        while True:
+            self.searching.wait()
+            if self.stopped:
+                break
+
+            self.wake.clear()
+
+            if self.delayed:
+                self.delayed = False
+                self.sleep()
+                continue
+
+            if process_id := self.finder.find(self.PROCESS_NAME):
+                # Attached already, e.g. by the start button
+                if self.references["Gateway"].process_handle:
+                    self.pause()
+                    continue
+
+                logger.info(f"Found Minecraft [{process_id}]!")
+
+                if self.wake.wait(self.SETTLE_TIME) or not self.finder.is_running(process_id, self.PROCESS_NAME):
+                    continue
+
+                self.pause()
+                self.references["ProcessingThread"].queue.append({"cmd": "attach", "params": [], "kwargs": {}})
+                continue
+
+            self.back_off()
+            self.sleep()
+
+    def back_off(self):
+        """ Next interval
+        """
+        if idle_seconds() >= self.IDLE_AFTER:
+            self.interval = self.IDLE_INTERVAL
+
+        else:
+            self.interval = min(self.interval * self.BACKOFF, self.MAX_INTERVAL)
+
+    def sleep(self):
+        """ Wait for the interval, ends early if woken or if the user is back while idling
+        """
+        deadline = time.monotonic() + self.interval
+
+        while (remaining := deadline - time.monotonic()) > 0:
+            if self.wake.wait(min(remaining, self.MAX_INTERVAL)):
+                break
+
+            # User is back, e.g. about to start the game
+            if self.interval == self.IDLE_INTERVAL and idle_seconds() < self.IDLE_AFTER:
+                self.interval = self.FAST_INTERVAL
+                break
+
+        self.wake.clear()
@@ -0,0 +1,154 @@
+"""
+Keeps the zoomed values written while zooming
+
+The game overwrites some of the values now and then (opening the settings, respawning, changing the dimension),
+so while a binding is active its values get checked a few dozen times per second and rewritten if they drifted.
+The targets get encoded into raw bytes once, every check is only a comparison of the read bytes,
+addresses inside the same page are read at once.
+"""
+
+import logging
+import threading
+
+from src import exceptions
+from src.processing.memory import Memory
+
+
+logger = logging.getLogger(__name__)
+
+
+class Enforcer(threading.Thread):
+    """ Rewrites drifted values of the active binding, at the rate of the 'enforce_rate' setting
+    """
+
+    def __init__(self, references: dict):
+        """ Initialize
+        :param references: the references
+        """
+        super().__init__(name=self.__class__.__name__, daemon=True)
+        self.references = references
+        self.storage = references["Storage"]
+        self.pool = references["GatewayPool"]
+
+        # {feature id: new value} of the active binding
+        self.targets = {}
+
+        # [(memory, address, length, [(offset, size, raw bytes)])] reads of all checks, built from the targets
+        self.plan = []
+
+        # Held while checking, so that clear() can wait for a running check
+        self.lock = threading.Lock()
+
+        self.enforcing = threading.Event()
+        self.stopped = threading.Event()
+
+    @staticmethod
+    def encode(gateway, feature_id: str, new) -> bytes | None:
+        """ The bytes write_address() would write
+        :param gateway: (Gateway) the gateway
+        :param feature_id: (str) the feature
+        :param new: the new value
+        :returns: (bytes) the bytes, None if the feature has no fixed size
+        """
+        presets = gateway.features.presets[feature_id]
+
+        if presets["a_type"] not in Memory.FORMATS:
+            return None
+
+        new = presets["s_type"](new)
+
+        if "s_encode" in presets:
+            new = presets["s_encode"](new)
+
+        return Memory.FORMATS[presets["a_type"]].pack(new)
+
+    def build_plan(self) -> list:
+        """ Group the addresses of the targets into reads, per instance
+        :returns: (list) see plan
+        """
+        plan = []
+
+        for gateway in self.pool.targets():
+            items = []
+
+            for feature_id, new in self.targets.items():
+                if gateway.features.addresses.get(feature_id) and \
+                        (raw := self.encode(gateway, feature_id, new)) is not None:
+                    items.append((gateway.features.addresses[feature_id][0], len(raw), raw))
+
+            plan.extend((gateway.memory, *read) for read in Memory.group_reads(items))
+
+        return plan
+
+    def enforce(self, writes: list):
+        """ Start enforcing or update some of the targets, e.g. after scrolling
+        :param writes: (list) (feature id, new value) pairs, as written
+        """
+        settings = self.storage.settings
+
+        if not settings["enforce_zoom"]:
+            return
+
+        with self.lock:
+            self.targets.update(writes)
+            self.plan = self.build_plan()
+
+        self.enforcing.set()
+
+        if not self.is_alive():
+            self.start()
+
+    def clear(self):
+        """ Stop enforcing, waits for a running check so that it can't overwrite the reset
+        """
+        self.enforcing.clear()
+
+        with self.lock:
+            self.targets = {}
+            self.plan = []
+
+    def stop(self):
+        """ Stop the thread
+        """
+        self.clear()
+
+        self.stopped.set()
+        self.enforcing.set()
+
+    def check(self) -> int:
+        """ Read the values of the plan and rewrite the drifted ones
+        :returns: (int) number of rewritten values
+        :raises GatewayError: if an instance was closed
+        """
+        rewritten = 0
+
+        for memory, address, length, values in self.plan:
+            data = memory.read_bytes(address, length)
+
+            for offset, size, raw in values:
+                if data[offset:offset + size] != raw:
+                    memory.write_bytes(address + offset, raw)
+                    rewritten += 1
+
+        return rewritten
+
+    def run(self) -> None:
+        """ Check while enforcing
+        """
+        while True:
+            self.enforcing.wait()
+            if self.stopped.is_set():
+                break
+
+            with self.lock:
+                try:
+                    self.check()
+
+                # Closed in the meantime, the listener notices it on the next key event
+                except exceptions.GatewayError:
+                    logger.info("- Stopped enforcing, an instance was closed!")
+                    self.targets = {}
+                    self.plan = []
+                    self.enforcing.clear()
+
+            self.stopped.wait(1 / min(max(self.storage.settings["enforce_rate"], 1), 240))
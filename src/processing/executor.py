@@ -0,0 +1,355 @@
+"""
+Scans the memory of the game on all cores, without blocking the processing thread
+
+The readable regions get split into chunks, which overlap so that a match crossing a boundary is still found.
+A dispatcher thread reads every chunk into a free shared memory block and a process pool scans it,
+so the chunks don't need to be pickled. The results are merged in the order of the chunks,
+so they don't depend on which worker finished first.
+
+A scan function is a module level function (it gets pickled by name) like
+`function(data: memoryview, address: int, end: int, *args) -> list`, that only reports matches
+starting before data[end], the rest gets reported by the next chunk.
+"""
+
+import os
+import time
+import queue
+import logging
+import threading
+import itertools
+
+from src import exceptions
+
+
+logger = logging.getLogger(__name__)
+
+
+# Shared memory blocks, attached inside a worker process {name: SharedMemory}
+_attached = {}
+
+
+def attach_block(name: str):
+    """ Attach to a shared memory block of the executor, inside a worker process
+    :param name: (str) name of the block
+    :returns: (SharedMemory) the block
+    """
+    from multiprocessing import shared_memory
+
+    # Note: the workers share the resource tracker of the executor, so attaching doesn't add another owner
+    if (block := _attached.get(name)) is None:
+        block = _attached[name] = shared_memory.SharedMemory(name)
+
+    return block
+
+
+def scan_chunk(name: str, length: int, address: int, end: int, function, args: tuple) -> list:
+    """ Scan a chunk, runs inside a worker process
+    :param name: (str) name of the block containing the chunk
+    :param length: (int) length of the chunk
+    :param address: (int) address of the chunk
+    :param end: (int) length without the overlap
+    :param function: the scan function
+    :param args: (tuple) additional arguments for it
+    :returns: (list) its results
+    """
+    data = attach_block(name).buf[:length]
+
+    try:
+        return function(data, address, end, *args)
+
+    finally:
+        data.release()
+
+
+def scan_sequential(memory, function, args: tuple = (), *, regions: list = None, overlap: int = 0) -> list:
+    """ Like ScanExecutor.scan(), but inside this thread, e.g. without an executor
+    :param memory: (Memory) an opened memory
+    :param function: the scan function
+    :param args: (tuple) additional arguments for it
+    :param regions: (list) (address, size) pairs, defaults to all readable regions
+    :param overlap: (int) see ScanExecutor.split()
+    :returns: (list) the results of all chunks in order
+    """
+    results = []
+
+    for address, length, end in ScanExecutor.split(memory.readable_regions() if regions is None else regions,
+                                                   overlap):
+        try:
+            data = memory.read_bytes(address, length)
+
+        # Unmapped in the meantime
+        except exceptions.MemoryReadError:
+            continue
+
+        results.extend(function(memoryview(data), address, end, *args))
+
+    return results
+
+
+class ScanJob:
+    """ A running scan, can be waited for and cancelled
+    """
+
+    def __init__(self, name: str, total: int):
+        """ Initialize
+        :param name: (str) shown to the user
+        :param total: (int) number of chunks
+        """
+        self.name = name
+        self.total = total
+        self.done = 0
+
+        self.results = [None] * total
+        self.error = None
+
+        # Chunks finish inside the threads of the process pool
+        self.lock = threading.Lock()
+
+        self.cancelled = threading.Event()
+        self.finished = threading.Event()
+
+    @property
+    def progress(self) -> float:
+        """ Between 0 and 1
+        """
+        return self.done / self.total if self.total else 1
+
+    def chunk_done(self, i: int, results: list):
+        """ A chunk was scanned
+        :param i: (int) index of the chunk
+        :param results: (list) its results
+        """
+        with self.lock:
+            self.results[i] = results
+            self.done += 1
+
+    def cancel(self):
+        """ Stop the scan, chunks already being scanned still finish
+        """
+        self.cancelled.set()
+
+    def wait(self, timeout: float = None) -> list | None:
+        """ Wait for the results
+        :param timeout: (float) seconds
+        :returns: (list) the results of all chunks in order, None if cancelled or timed out
+        :raises: the error of a worker
+        """
+        if not self.finished.wait(timeout):
+            return None
+
+        # A failed worker cancels the job too
+        if self.error is not None:
+            raise self.error
+
+        if self.cancelled.is_set():
+            return None
+
+        return list(itertools.chain.from_iterable(self.results))
+
+
+class ScanExecutor:
+    """ Fans the chunks of a scan out to a process pool, the pool is started with the first scan
+    """
+
+    CHUNK_SIZE = 4 * 1024 * 1024
+
+    # Maximum overlap of the chunks, e.g. the length of the longest pattern - 1
+    MAX_OVERLAP = 4096
+
+    # Seconds between progress updates of the frontend
+    PROGRESS_INTERVAL = 0.25
+
+    def __init__(self, references: dict, max_workers: int = None):
+        """ Initialize
+        :param references: the references
+        :param max_workers: (int) worker processes, defaults to the number of cores
+        """
+        self.references = references
+
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.pool = None
+
+        # All shared memory blocks + the free ones, two per worker so that reading and scanning overlap
+        self.blocks = []
+        self.free_blocks = queue.Queue()
+
+        # Running jobs
+        self.jobs = set()
+        self.lock = threading.Lock()
+
+        # Add to references
+        self.references.update({"ScanExecutor": self})
+        logger.info("+ ScanExecutor")
+
+    def start_pool(self):
+        """ Start the worker processes and create the blocks, if not done already
+        """
+        with self.lock:
+            if self.pool is not None:
+                return
+
+            import multiprocessing
+            import concurrent.futures
+            from multiprocessing import shared_memory
+
+            # Also on linux, forking a process with running threads (tkinter, pynput) isn't safe
+            self.pool = concurrent.futures.ProcessPoolExecutor(self.max_workers,
+                                                               mp_context=multiprocessing.get_context("spawn"))
+
+            for _ in range(self.max_workers * 2):
+                block = shared_memory.SharedMemory(create=True, size=self.CHUNK_SIZE + self.MAX_OVERLAP)
+                self.blocks.append(block)
+                self.free_blocks.put(block)
+
+            logger.info(f"Started {self.max_workers} scan workers")
+
+    @classmethod
+    def split(cls, regions: list, overlap: int) -> list:
+        """ Split regions into chunks
+        :param regions: (list) (address, size) pairs
+        :param overlap: (int) bytes every chunk overlaps with the next one of its region
+        :returns: (list) (address, length, end) of the chunks, end being the length without the overlap
+        """
+        chunks = []
+
+        for address, size in regions:
+            for offset in range(0, size, cls.CHUNK_SIZE):
+                end = min(cls.CHUNK_SIZE, size - offset)
+                chunks.append((address + offset, min(end + overlap, size - offset), end))
+
+        return chunks
+
+    def scan(self, memory, function, args: tuple = (), *, name: str = "Scan", regions: list = None,
+             overlap: int = 0, on_done=None) -> ScanJob:
+        """ Start a scan
+        :param memory: (Memory) an opened memory
+        :param function: the scan function, see the top of this module
+        :param args: (tuple) additional arguments for it, have to be picklable
+        :param name: (str) shown to the user
+        :param regions: (list) (address, size) pairs, defaults to all readable regions
+        :param overlap: (int) see split()
+        :param on_done: called with the job once it has finished, inside the dispatcher thread
+        :returns: (ScanJob) the job
+        :raises ValueError: if the overlap is too large
+        """
+        if overlap > self.MAX_OVERLAP:
+            raise ValueError(f"Overlap of {overlap} is larger than {self.MAX_OVERLAP}!")
+
+        self.start_pool()
+
+        chunks = self.split(memory.readable_regions() if regions is None else regions, overlap)
+        job = ScanJob(name, len(chunks))
+
+        with self.lock:
+            self.jobs.add(job)
+
+        threading.Thread(target=self.dispatch, args=(job, memory, chunks, function, args, on_done),
+                         name=f"{self.__class__.__name__}Dispatcher", daemon=True).start()
+
+        return job
+
+    def submit(self, function, *args):
+        """ Run any module level function on a worker, e.g. for searches that don't read memory
+        :param function: the function
+        :param args: its arguments, have to be picklable
+        :returns: (Future) its result
+        """
+        self.start_pool()
+
+        return self.pool.submit(function, *args)
+
+    def dispatch(self, job: ScanJob, memory, chunks: list, function, args: tuple, on_done):
+        """ Read the chunks and submit them, runs inside its own thread
+        """
+        frontend = self.references["Frontend"]
+        last_progress = 0
+        pending = threading.Semaphore(0)
+        submitted = 0
+
+        def chunk_done(future, i: int, block):
+            """ Collect the results of a chunk and free its block """
+            nonlocal last_progress
+            self.free_blocks.put(block)
+
+            if future.cancelled():
+                job.cancel()
+
+            elif (error := future.exception()) is not None:
+                job.error = error
+                job.cancel()
+
+            job.chunk_done(i, [] if future.cancelled() or future.exception() else future.result())
+
+            if time.monotonic() - last_progress >= self.PROGRESS_INTERVAL:
+                last_progress = time.monotonic()
+                frontend.scan_progress(job.name, job.progress)
+
+            pending.release()
+
+        try:
+            for i, (address, length, end) in enumerate(chunks):
+                if job.cancelled.is_set():
+                    break
+
+                block = self.free_blocks.get()
+
+                try:
+                    block.buf[:length] = memory.read_bytes(address, length)
+
+                # Unmapped in the meantime
+                except exceptions.MemoryReadError:
+                    self.free_blocks.put(block)
+                    job.chunk_done(i, [])
+                    continue
+
+                future = self.pool.submit(scan_chunk, block.name, length, address, end, function, args)
+                future.add_done_callback(lambda f, i=i, block=block: chunk_done(f, i, block))
+                submitted += 1
+
+            for _ in range(submitted):
+                pending.acquire()
+
+        except Exception as e:
+            job.error = e
+            job.cancel()
+
+        finally:
+            with self.lock:
+                self.jobs.discard(job)
+
+            if job.error is not None:
+                logger.info(f"{job.name} failed: {job.error!r}")
+
+            else:
+                logger.info(f"{job.name} {'cancelled' if job.cancelled.is_set() else 'finished'}!")
+            frontend.scan_progress(job.name, None)
+            job.finished.set()
+
+            if on_done:
+                on_done(job)
+
+    def cancel(self):
+        """ Cancel all running scans, e.g. by the user
+        """
+        with self.lock:
+            jobs = list(self.jobs)
+
+        for job in jobs:
+            job.cancel()
+
+    def shutdown(self):
+        """ Cancel all scans, stop the workers and remove the blocks
+        """
+        self.cancel()
+
+        if self.pool is None:
+            return
+
+        self.pool.shutdown(wait=True, cancel_futures=True)
+
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+
+        self.blocks.clear()
+        logger.info("- ScanExecutor")
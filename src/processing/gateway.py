@@ -0,0 +1,405 @@
+""" The gateway to the memory of Minecraft """
+import string
+import logging
+
+from src import events, exceptions
+from src.processing import memory as memory_
+
+
+logger = logging.getLogger(__name__)
+
+
+class Gateway:
+    """ The 'Gateway' to mc, it handles the memory editing
+    """
+
+    def __init__(self, references: dict, memory: memory_.Memory = None, *, features=None):
+        """ Handles memory thanks to pymem, especially their discord helps a lot
+        :param references: the references
+        :param memory: the memory backend, pymem by default
+        :param features: (Features) own features instead of the stored ones, e.g. for another instance
+        """
+        self.references = references
+        self.memory = memory if memory is not None else memory_.PymemMemory()
+
+        # Data components
+        self.storage = references["Storage"]
+        self.own_features = features
+        self.status = {
+            "Connected": False,
+            "Version": None,
+        }
+
+        # I just dont want to add strings every 20secs
+        self.valid_domain_letters = set(string.ascii_letters + string.digits + "-.")
+        self.fallback_server_address = None
+
+        self.current_mc_version = None
+
+        # Finish, gateways of other instances aren't registered
+        if features is None:
+            self.references.update({"Gateway": self})
+
+        logger.info("+ Gateway")
+
+    @property
+    def features(self):
+        """ The features, their addresses are the ones of this gateway
+        """
+        return self.own_features if self.own_features is not None else self.storage.features
+
+    @property
+    def process_handle(self):
+        """ Truthy while attached
+        """
+        return self.memory.process_handle
+
+    def open_process_from_name(self, name: str):
+        """ Attach to the game
+        :param name: (str) the process name
+        :raises ProcessNotFound: if it isn't running
+        """
+        self.memory.open_process_from_name(name)
+
+    def close_process(self):
+        """ Detach from the game
+        """
+        self.memory.close_process()
+
+    def clear_addresses(self):
+        """ Forget the addresses, e.g. after the game was closed
+        """
+        self.fallback_server_address = None
+
+        if self.features:
+            for feature_id in self.features.addresses:
+                self.status[feature_id] = None
+
+            self.features.addresses.clear()
+
+    def read_int(self, address: int) -> int:
+        """ Shortcut, used by the server checks
+        """
+        return self.memory.read_int(address)
+
+    def read_uint(self, address: int) -> int:
+        """ Shortcut, used by the server checks
+        """
+        return self.memory.read_uint(address)
+
+    def read_string(self, address: int, byte: int = 50) -> str:
+        """ Shortcut, used by the server checks
+        """
+        return self.memory.read_string(address, byte)
+
+    def get_address(self, feature_id: str, *, log=True):
+        """ Get one address
+        :param feature_id: the id of the following feature
+        :param log: if to log getting the address
+        """
+        feature = self.features[feature_id]
+        presets = self.features.presets[feature_id]
+        addresses = self.features.addresses
+        offset_outer = feature["offsets"]
+
+        try:
+            # If only one offset, so prepare list
+            if presets["o_count"] == 1 or not isinstance(offset_outer, list):
+                offset_outer = [offset_outer]
+
+            addresses.update({feature_id: []})
+
+            for i, offs in enumerate(offset_outer):
+                # Find the address
+                temp = self.memory.read_pointer(self.memory.base_address + offs[0])
+
+                for offset in offs[1:-1]:
+                    temp = self.memory.read_pointer(temp + offset)
+
+                # Add it
+                addresses[feature_id].append(temp + offs[-1])
+
+                if log:
+                    logger.info(
+                        f"+ Found {i}. address for {feature['name']} [{hex(self.features.addresses[feature_id][i])}]!")
+
+            status = True
+
+        except exceptions.MemoryReadError:
+            status = False
+
+            if log:
+                logger.info(f"- No address for {feature['name']}!")
+
+        self.status.update({
+            feature_id: status
+        })
+
+    def get_addresses(self):
+        """ Get the features from the pointers
+        """
+
+        def inner(_done: set, _feature_id: str, _feature_value: dict):
+            """ Handle a feature, separate method to avoid duplicates
+            :param _done: (set) keeping track list
+            :param _feature_id: (str) the id of the feature
+            :param _feature_value: (dict) the value of the feature
+            """
+            # It should be the original + available
+            if _feature_id not in _done:
+                if _feature_value["available"]:
+                    # Use the pointer
+                    self.get_address(_feature_id)
+
+                    # Get addresses for NoneTypes in feature settings values
+                    # Only for listener compatible features
+                    if self.features.presets[_feature_id]["g"].listener:
+                        for _key, _value in _feature_value["settings"].items():
+                            if not _value or _value == " ":
+                                _feature_value["settings"][_key] = str(self.read_address(_feature_id))
+                                changed.add(_feature_id)
+
+                    # Keep track
+                    _done.add(_feature_id)
+
+                else:
+                    self.status.update({
+                        _feature_id: None
+                    })
+
+        done = set()
+        changed = set()
+        for feature_id, value in self.features.data.items():
+
+            # Parse parent
+            inner(done, feature_id, value)
+
+            if value["children"]:
+                for child_key in value["children"]:
+                    # Parse child
+                    inner(done, child_key, self.features[child_key])
+
+        # Finally, check all again and update storage file
+        self.status_check()
+        self.references["EventBus"].publish(events.SettingsChanged(features=tuple(changed), source=self))
+
+    def read_address(self, feature_id: str, *, index: int = 0):
+        """ Read a address based on its feature id
+            Also decodes the new value
+        :param feature_id: (str) id of the feature requested
+        :param index: (int) which address should be used (1 feature can have multiple offsets)
+        """
+        if feature_id in self.features.addresses:
+            presets = self.features.presets[feature_id]
+
+            # Read and cast
+            value = getattr(self.memory, f"read_{presets['a_type']}")(self.features.addresses[feature_id][index],
+                                                                      **(presets["a_args"] if "a_args" in presets else {}))
+
+            # If it needs to be decoded
+            if "s_decode" in presets:
+                value = self.features.presets[feature_id]["s_decode"](value)
+
+            return value
+
+    def write_address(self, feature_id: str, new, *, index: int = 0):
+        """ Read a address based on its feature id,
+            Also encodes the new value
+        :param feature_id: (str) id of the feature requested
+        :param new: the new value written
+        :param index: (int) which address should be used (1 feature can have multiple offsets)
+        """
+        if feature_id in self.features.addresses:
+            presets = self.features.presets[feature_id]
+
+            # Cast into right type
+            new = presets["s_type"](new)
+
+            # If it needs to be encoded
+            if "s_encode" in presets:
+                new = self.features.presets[feature_id]["s_encode"](new)
+
+            # Write
+            return getattr(self.memory, f"write_{presets['a_type']}")(self.features.addresses[feature_id][index],
+                                                                       new, **(presets["a_args"] if "a_args" in presets else {}))
+
+    def is_domain(self, domain: str) -> bool:
+        """ Tests if given domain is valid
+        :param domain: (str) the domain
+        """
+        if "." not in domain or not set(domain).issubset(self.valid_domain_letters):
+            return False
+
+        return True
+
+    def server_address_check(self, *, log=True):
+        """ Checks if the addresses for the discord rich presence are available
+        :param log: if to log messages
+        """
+        if "3" in self.features.addresses:
+            if not self.process_handle:
+                return None
+
+            self.get_server()  # Load fallback address if needed
+
+            try:
+                # Server port
+                if self.read_int(self.features.addresses["3"][1]) == 0:
+                    return None
+
+                # Server ip
+                if self.fallback_server_address:
+                    self.read_string(self.fallback_server_address, 253)
+
+                elif (address := self.features.addresses["3"][0]) == 0:
+                    return None
+
+                else:
+                    self.read_string(address, 253)
+
+            # Something happened, but is not 100% sure
+            except (exceptions.GatewayError, UnicodeDecodeError, Exception) as e:
+                if log:
+                    logger.info(f"- Discord is unavailable!")
+                return False
+
+            return True
+
+        # No address loaded
+        else:
+            return None
+
+    def get_fallback_server_address(self) -> int:
+        """ Returns the fallback address for the connected server
+        :returns: the address
+        """
+        a = self.read_uint(self.features.addresses["3"][0])
+        b = self.read_uint(self.features.addresses["3"][0] + 4)
+
+        return int(str(hex(b))[2:] + str(hex(a))[2:].zfill(8), 16)
+
+    def get_server(self):
+        """ Returns the currently connected server:port
+        :returns: the server or None
+        """
+        if "3" in self.features.addresses:
+            try:
+                port = self.read_int(self.features.addresses["3"][1])
+
+                # Zero means no server connected
+                if port == 0:
+                    return None
+
+                # Use fallback address if needed
+                if self.fallback_server_address:
+                    address = self.fallback_server_address
+
+                else:
+                    address = self.features.addresses["3"][0]
+
+                # Means it wasn't connected the first time
+                # try to get address again
+                if address == 0:
+                    self.get_address("3", log=False)
+                    return None
+
+                server = self.read_string(address, 253)
+
+                # Check returned server domain
+                if not server or not self.is_domain(server):
+                    raise Exception
+
+                else:
+                    if port == 19132:
+                        return server
+                    else:
+                        return f"{server}:{port}"
+
+            # Need to read fallback value
+            # Sometimes, even this fallback value failes, however, again, sometimes, by joining another server, it works again?
+            except (exceptions.GatewayError, UnicodeDecodeError, Exception):
+                try:
+                    # Reread port
+                    port = self.read_int(self.features.addresses["3"][1])
+
+                    # If not done already, get fallback server address
+                    if not self.fallback_server_address:
+                        self.fallback_server_address = self.get_fallback_server_address()
+
+                    server = self.read_string(self.fallback_server_address, 253)
+
+                    if port == 19132:
+                        return server
+
+                    else:
+                        return f"{server}:{port}"
+
+                # Fallback failed, try to read orignial address again
+                except (exceptions.GatewayError, UnicodeDecodeError, Exception):
+                    # logger.info("Server fallback address failed!")
+                    self.fallback_server_address = None
+                    self.get_address("3", log=False)
+                    return None
+
+        return None
+
+    def status_check(self):
+        """ Checks all sort of things for the status
+        """
+        # Check if minecraft is open
+        self.status["Connected"] = bool(self.process_handle)
+
+        # Check the minecraft version
+        # Own features are always the ones of the current version
+        self.status["Version"] = bool(self.own_features is not None or
+                                      self.current_mc_version == self.storage.get("mc_version"))
+
+        if self.features:
+            # Addresses
+            for addr_id, addr_value in {_id: _addr for _id, sublist in self.features.addresses.items() for _addr
+                                        in sublist}.items():
+                feature = self.features[addr_id]
+
+                try:
+                    # Not enabled or not available
+                    if not feature["enabled"] or not feature["available"] or not self.process_handle:
+                        status = None
+
+                    # Custom check
+                    elif "a_status_check" in self.features.presets[addr_id]:
+                        status = self.features.presets[addr_id]["a_status_check"](self)
+
+                    # Else just try to read
+                    else:
+                        self.read_address(addr_id)
+
+                        status = True
+
+                    self.status[addr_id] = status
+
+                except exceptions.MemoryReadError:
+                    logger.info(f"- {feature['name']} is unavailable!")
+                    self.status[addr_id] = False
+
+        # Update ui, only the registered gateway shows its status, together with the other instances
+        if self.references.get("Gateway") is self:
+            status = self.status
+
+            if "GatewayPool" in self.references:
+                status = {**status, **self.references["GatewayPool"].instances_status()}
+
+            self.references["EventBus"].publish(events.StatusChanged(dict(status)))
+
+    def check_version(self) -> bool:
+        """ Check mc version if new features are required
+        """
+        self.current_mc_version = self.memory.get_version()
+        saved_mc_version = self.storage.get("mc_version")
+
+        # When they aren't equal, update needed
+        if self.current_mc_version != saved_mc_version:
+            logger.info("Saved version doesn't match!")
+            return False
+
+        logger.info("Saved version ist correct!")
+        return True
@@ -0,0 +1,267 @@
+"""
+Key bindings, compiled into a flat table so that every key event costs a single dict lookup
+
+A binding is written like 'v', 'ctrl+shift+f2', 'x1' (a mouse side button) or 'ctrl+k z',
+a chord where z has to be pressed after ctrl+k. Keys are windows virtual key codes (vk), the held
+modifiers are tracked as a bitmask, so the table is keyed by (chord state << 24 | modifiers << 16 | vk).
+If no binding matches the held modifiers exactly, the one without modifiers is used.
+"""
+
+import time
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+# Bits of the modifier mask
+CTRL = 1
+SHIFT = 2
+ALT = 4
+WIN = 8
+
+MODIFIERS = {"ctrl": CTRL, "shift": SHIFT, "alt": ALT, "win": WIN}
+
+# Both the generic and the left / right vk of every modifier
+MODIFIER_VKS = {
+    0x10: SHIFT, 0xA0: SHIFT, 0xA1: SHIFT,
+    0x11: CTRL, 0xA2: CTRL, 0xA3: CTRL,
+    0x12: ALT, 0xA4: ALT, 0xA5: ALT,
+    0x5B: WIN, 0x5C: WIN
+}
+
+# Mouse buttons, by the names of pynput
+MOUSE_VKS = {"middle": 0x04, "x1": 0x05, "x2": 0x06}
+
+# Keys besides letters and digits
+VKS = {
+    **MOUSE_VKS,
+    "backspace": 0x08, "tab": 0x09, "enter": 0x0D, "pause": 0x13, "caps_lock": 0x14, "esc": 0x1B, "space": 0x20,
+    "page_up": 0x21, "page_down": 0x22, "end": 0x23, "home": 0x24,
+    "left": 0x25, "up": 0x26, "right": 0x27, "down": 0x28, "insert": 0x2D, "delete": 0x2E,
+    ";": 0xBA, "=": 0xBB, ",": 0xBC, "-": 0xBD, ".": 0xBE, "/": 0xBF, "`": 0xC0,
+    "[": 0xDB, "\\": 0xDC, "]": 0xDD, "'": 0xDE,
+    **{f"num{i}": 0x60 + i for i in range(10)},
+    **{f"f{i}": 0x6F + i for i in range(1, 25)}
+}
+
+HOLD = "hold"
+TOGGLE = "toggle"
+
+
+def parse_key(name: str) -> int:
+    """ The vk of a key
+    :param name: (str) a letter, digit or a name of VKS
+    :raises ValueError: if unknown
+    """
+    name = name.lower()
+
+    if len(name) == 1 and name.isascii() and name.isalnum():
+        return ord(name.upper())
+
+    if name in VKS:
+        return VKS[name]
+
+    raise ValueError(f"Unknown key '{name}'!")
+
+
+def parse(spec: str) -> list:
+    """ Parse a binding
+    :param spec: (str) e.g. 'ctrl+k z'
+    :returns: (list) the steps of the chord, (modifier mask, vk) pairs
+    :raises ValueError: if invalid
+    """
+    steps = []
+
+    for step in spec.split():
+        # '+' itself can't be bound, so splitting is fine
+        *modifiers, key = step.lower().split("+")
+        mask = 0
+
+        for modifier in modifiers:
+            if modifier not in MODIFIERS:
+                raise ValueError(f"Unknown modifier '{modifier}'!")
+
+            mask |= MODIFIERS[modifier]
+
+        steps.append((mask, parse_key(key)))
+
+    if not steps:
+        raise ValueError("Empty binding!")
+
+    return steps
+
+
+class Binding:
+    """ A parsed binding and what it controls
+    """
+
+    def __init__(self, spec: str, target, mode: str = HOLD):
+        """ Initialize
+        :param spec: (str) see parse()
+        :param target: passed to the callback of the KeyBindings
+        :param mode: (str) HOLD (active while pressed) or TOGGLE (every press switches)
+        :raises ValueError: if the spec is invalid
+        """
+        self.spec = spec
+        self.steps = parse(spec)
+        self.target = target
+        self.mode = mode
+
+        # Only for TOGGLE
+        self.active = False
+
+    @property
+    def uses_mouse(self) -> bool:
+        """ If a mouse button is part of it
+        """
+        return any(vk in MOUSE_VKS.values() for _, vk in self.steps)
+
+
+class KeyBindings:
+    """ Turns key events into the activation and deactivation of bindings
+        Note: not thread safe, the caller has to lock if the events come from multiple threads
+    """
+
+    # Seconds until a started chord gets reset
+    CHORD_TIMEOUT = 1.5
+
+    def __init__(self, on_change):
+        """ Initialize
+        :param on_change: called with the target of a binding and if it is active now
+        """
+        self.on_change = on_change
+
+        # {state << 24 | modifiers << 16 | vk: Binding or the next chord state}
+        self.table = {}
+        self.uses_mouse = False
+
+        # Pressed keys, to ignore the repeats of a held key + the pressed modifier vks and their mask
+        self.down = set()
+        self.modifier_vks = set()
+        self.modifiers = 0
+
+        # Chord state, 0 if no chord was started
+        self.state = 0
+        self.state_time = 0
+
+        # {vk: Binding} of the held bindings, released with the key
+        self.held = {}
+
+    def compile(self, bindings: list):
+        """ Build the table, the state of held keys and of active toggles is kept
+        :param bindings: (list) the bindings, later ones win if they collide
+        """
+        table = {}
+        states = 0
+
+        # {spec: Binding} of the toggled ones, a new binding with the same spec stays active
+        toggled = {x.spec: x for x in self.table.values() if isinstance(x, Binding) and x.mode == TOGGLE and x.active}
+
+        for binding in bindings:
+            if binding.mode == TOGGLE and toggled.pop(binding.spec, None):
+                binding.active = True
+
+            state = 0
+
+            for i, (mask, vk) in enumerate(binding.steps):
+                key = state << 24 | mask << 16 | vk
+
+                if i == len(binding.steps) - 1:
+                    if key in table:
+                        logger.info(f"Key binding '{binding.spec}' overrides another one!")
+
+                    table[key] = binding
+
+                else:
+                    # Share the beginning with other chords
+                    if not isinstance(table.get(key), int):
+                        states += 1
+                        table[key] = states
+
+                    state = table[key]
+
+        self.table = table
+        self.uses_mouse = any(binding.uses_mouse for binding in bindings)
+        self.state = 0
+
+        # Removed or not a toggle anymore, they would stay active
+        for binding in toggled.values():
+            binding.active = False
+            self.on_change(binding.target, False)
+
+    def lookup(self, vk: int):
+        """ The entry of a key in the current chord state, a binding without modifiers if none matches
+            the held ones, e.g. zooming while sprinting with ctrl
+        :param vk: (int) its virtual key code
+        :returns: the Binding, the next chord state or None
+        """
+        entry = self.table.get(self.state << 24 | self.modifiers << 16 | vk)
+
+        if entry is None and self.modifiers:
+            entry = self.table.get(self.state << 24 | vk)
+
+        return entry
+
+    def press(self, vk: int):
+        """ A key was pressed
+        :param vk: (int) its virtual key code
+        """
+        if vk in MODIFIER_VKS:
+            self.modifier_vks.add(vk)
+            self.modifiers |= MODIFIER_VKS[vk]
+            return
+
+        # Repeat of a held key
+        if vk in self.down:
+            return
+
+        self.down.add(vk)
+
+        if self.state and time.monotonic() - self.state_time > self.CHORD_TIMEOUT:
+            self.state = 0
+
+        entry = self.lookup(vk)
+
+        # A wrong key ends a started chord, but could start another binding
+        if entry is None and self.state:
+            self.state = 0
+            entry = self.lookup(vk)
+
+        if entry is None:
+            return
+
+        # Next step of a chord
+        if isinstance(entry, int):
+            self.state = entry
+            self.state_time = time.monotonic()
+            return
+
+        self.state = 0
+
+        if entry.mode == TOGGLE:
+            entry.active = not entry.active
+            self.on_change(entry.target, entry.active)
+
+        else:
+            self.held[vk] = entry
+            self.on_change(entry.target, True)
+
+    def release(self, vk: int):
+        """ A key was released
+        :param vk: (int) its virtual key code
+        """
+        if vk in MODIFIER_VKS:
+            self.modifier_vks.discard(vk)
+            self.modifiers = 0
+
+            # The other side could still be held
+            for modifier_vk in self.modifier_vks:
+                self.modifiers |= MODIFIER_VKS[modifier_vk]
+
+            return
+
+        self.down.discard(vk)
+
+        if (binding := self.held.pop(vk, None)) is not None:
+            self.on_change(binding.target, False)
@@ -1,16 +1,24 @@
+import ctypes
 import logging
+import threading
 
-import pymem
-from pynput import keyboard
+from pynput import keyboard, mouse
 
-from src import ui, exceptions
+from src import events, exceptions, tracing
+from src.processing import keybinds
+from src.processing.enforcer import Enforcer
+from src.processing.zoom import ScrollZoom
 
 
 logger = logging.getLogger(__name__)
 
+# Windows message of the scroll wheel
+WM_MOUSEWHEEL = 0x020A
+WHEEL_DELTA = 120
+
 
 class Listener(keyboard.Listener):
-    """ Listener for key events
+    """ Listener for key events, mouse buttons get their own listener if they are bound
     """
 
     def __init__(self, references):
@@ -22,34 +30,43 @@ class Listener(keyboard.Listener):
             on_release=self.on_release
         )
         self.references = references
+        self.name = self.__class__.__name__
 
         # References
         self.gateway = references["Gateway"]
+        self.pool = references["GatewayPool"]
         self.storage = references["Storage"]
         self.features = self.storage.features
 
-        self.keys = {}
-        self.pressed = {}
+        # Only while recording, see tracing
+        self.recorder = references.get("Recorder")
+
+        # Keyboard and mouse events come from different threads
+        self.keybinds = keybinds.KeyBindings(self.on_binding)
+        self.lock = threading.Lock()
+
+        # Only hooks the mouse while a mouse button is bound or scroll zoom is enabled
+        self.mouse_listener = None
+        self.started = False
+
+        self.scroll_zoom = ScrollZoom(references, self.write_zoomed)
+        self.enforcer = Enforcer(references)
 
         self.references.update({"Listener": self})
 
     @staticmethod
-    def unctrl(c: int) -> str:
-        """ Convert hex c to ascii characters / control characters
-        :param int c: the character value
+    def vk(key) -> int | None:
+        """ The virtual key code of a key from pynput
+        :param key: the key, KeyCode or Key
+        :returns: (int) the vk or None
         """
-        # Control character
-        if c <= 0x1f:
-            return chr(c + 0x40)
-
-        else:
-            return chr(c)
+        return getattr(key.value if isinstance(key, keyboard.Key) else key, "vk", None)
 
     def register_keys(self):
         """ Register keys
         """
         done = set()
-        self.keys = {}
+        keys = {}
 
         for feature_id, feature_value in self.features.data.items():
 
@@ -62,65 +79,203 @@ class Listener(keyboard.Listener):
                 done.update(feature_id_list)
 
                 # Already exists?
-                if feature_value["key"] in self.keys:
-                    self.keys[feature_value["key"].lower()].extend(feature_id_list)
+                keys.setdefault(feature_value["key"].lower(), []).extend(feature_id_list)
 
-                else:
-                    self.keys.update({feature_value["key"].lower(): feature_id_list})
+        if self.recorder:
+            self.recorder.storage()
 
-    def inner(self, key, index: str, on_press: bool):
-        """ To shorten up code, for register_keys
-        :param key: key from pynput
-        :param index: new setting index
-        :param on_press: (bool) if from on press
+        mode = keybinds.TOGGLE if self.storage.settings["toggle_zoom"] else keybinds.HOLD
+        bindings = []
+
+        for spec, feature_ids in keys.items():
+            try:
+                bindings.append(keybinds.Binding(spec, feature_ids, mode))
+
+            except ValueError as e:
+                logger.info(f"- Invalid key binding '{spec}': {e}")
+
+        with self.lock:
+            self.keybinds.compile(bindings)
+
+        self.update_mouse_listener()
+
+    def start(self):
+        """ Start listening, also to the mouse if needed
         """
-        try:
-            # Normalize the key code
-            if isinstance(key, keyboard.KeyCode):
-                code = self.unctrl(key.vk).lower()
+        super().start()
 
-                # Key exists?
-                if code in self.keys:
+        self.started = True
+        self.update_mouse_listener()
 
-                    # First press?
-                    if (code in self.pressed) is not on_press or self.pressed[code] is not on_press:
-                        self.pressed.update({code: on_press})
+    def stop(self):
+        """ Stop listening
+        """
+        super().stop()
+        self.scroll_zoom.stop()
+        self.enforcer.stop()
 
-                        # Do memory stuff
-                        for feature_id in self.keys[code]:
-                            feature_value = self.features[feature_id]
+        if self.mouse_listener:
+            self.mouse_listener.stop()
+            self.mouse_listener = None
 
-                            # Enabled?
-                            if not feature_value["enabled"]:
-                                continue
+    def update_mouse_listener(self):
+        """ Start or stop the mouse listener, depending on the bindings and scroll zoom
+        """
+        if not self.started:
+            return
 
-                            try:
-                                self.gateway.write_address(feature_id, feature_value["settings"][index])
+        needed = self.keybinds.uses_mouse or self.storage.settings["scroll_zoom"]
 
-                            # Minecraft was closed
-                            except (pymem.exception.MemoryWriteError, pymem.exception.ProcessError):
-                                self.gateway.close_process()
-                                self.gateway.status_check()
+        if needed and self.mouse_listener is None:
+            self.mouse_listener = mouse.Listener(on_click=self.on_click, on_scroll=self.on_scroll,
+                                                 win32_event_filter=self.mouse_filter)
+            self.mouse_listener.start()
 
-                                # Alert user
-                                logger.info("Minecraft was closed!")
-                                ui.queue_alert_message(self.references, "Minecraft was closed!", warning=True)
-                                self.references["Root"].bell()
-                                self.references["Root"].start_button_var.set("Start")
+        elif not needed and self.mouse_listener is not None:
+            self.mouse_listener.stop()
+            self.mouse_listener = None
 
-                                return self.stop()
+    def on_binding(self, feature_ids: list, active: bool):
+        """ A binding was activated or deactivated, see keybinds.KeyBindings
+        :param feature_ids: (list) the features of the binding
+        :param active: (bool) if zooming now
+        """
+        # Our own writes are no changes made inside the game
+        watcher = self.references.get("Watcher")
 
-        except Exception:
-            exceptions.handle_error(self.references)
+        if active:
+            if watcher:
+                watcher.pause(feature_ids)
+
+            self.write_zoomed(self.inner(feature_ids, "after"))
+            self.scroll_zoom.activate(feature_ids)
+
+        else:
+            # Neither a scrolled nor an enforced value must be written after the reset
+            self.scroll_zoom.deactivate()
+            self.enforcer.clear()
+            self.write(self.inner(feature_ids, "before"))
+
+            if watcher:
+                watcher.resume(feature_ids)
+
+    def inner(self, feature_ids: list, index: str) -> list:
+        """ The writes for a setting of features
+        :param feature_ids: (list) the features
+        :param index: new setting index
+        :returns: (list) (feature id, new value) pairs
+        """
+        return [(feature_id, self.features[feature_id]["settings"][index])
+                for feature_id in feature_ids if self.features[feature_id]["enabled"]]
+
+    def write_zoomed(self, writes: list):
+        """ Write values of an active binding, they get enforced until it is released
+        :param writes: (list) (feature id, new value) pairs
+        """
+        if self.write(writes):
+            self.enforcer.enforce(writes)
+
+    def write(self, writes: list) -> bool:
+        """ Write new values, stops listening if Minecraft was closed
+        :param writes: (list) (feature id, new value) pairs
+        :returns: (bool) if succeed
+        """
+        # Do memory stuff, for all instances at once
+        try:
+            self.pool.write_addresses(writes)
+            return True
+
+        # Minecraft was closed
+        except exceptions.GatewayError:
+            self.pool.detach_all()
+            self.gateway.close_process()
+            self.gateway.status_check()
+
+            # Alert user
+            logger.info("Minecraft was closed!")
+            frontend = self.references["Frontend"]
+            frontend.alert("Minecraft was closed!", warning=True)
+            frontend.bell()
+            self.references["EventBus"].publish(events.Attached(False))
+
+            # Stopping waits for the writers, e.g. the one of scroll zoom calling this, so the processing thread does it
+            if processing_thread := self.references.get("ProcessingThread"):
+                processing_thread.call_soon(self.stop)
+
+            else:
+                self.stop()
 
     def on_press(self, key: keyboard.KeyCode):
         """ On press event
         :param key: the key code
         """
-        self.inner(key, "after", True)
+        try:
+            if (vk := self.vk(key)) is not None:
+                if self.recorder:
+                    self.recorder.key(tracing.KEY_PRESS, vk)
+
+                with self.lock:
+                    self.keybinds.press(vk)
+
+        except Exception:
+            exceptions.handle_error(self.references)
 
     def on_release(self, key: keyboard.KeyCode):
         """ On release event
         :param key: the key code
         """
-        self.inner(key, "before", False)
+        try:
+            if (vk := self.vk(key)) is not None:
+                if self.recorder:
+                    self.recorder.key(tracing.KEY_RELEASE, vk)
+
+                with self.lock:
+                    self.keybinds.release(vk)
+
+        except Exception:
+            exceptions.handle_error(self.references)
+
+    def on_click(self, x: int, y: int, button: mouse.Button, pressed: bool):
+        """ On click event of the mouse listener
+        :param x: x position
+        :param y: y position
+        :param button: the button
+        :param pressed: (bool) if pressed or released
+        """
+        try:
+            if (vk := keybinds.MOUSE_VKS.get(button.name)) is not None:
+                if self.recorder:
+                    self.recorder.click(vk, pressed)
+
+                with self.lock:
+                    (self.keybinds.press if pressed else self.keybinds.release)(vk)
+
+        except Exception:
+            exceptions.handle_error(self.references)
+
+    def on_scroll(self, x: int, y: int, dx: int, dy: int):
+        """ On scroll event of the mouse listener
+        :param x: x position
+        :param y: y position
+        :param dx: horizontal ticks
+        :param dy: vertical ticks, positive if scrolled up
+        """
+        try:
+            if self.recorder:
+                self.recorder.scroll(dy)
+
+            self.scroll_zoom.scroll(dy)
+
+        except Exception:
+            exceptions.handle_error(self.references)
+
+    def mouse_filter(self, msg: int, data):
+        """ Windows only, called before the events: while zooming, the scroll wheel doesn't reach the game
+        :param msg: the windows message
+        :param data: (MSLLHOOKSTRUCT) the event
+        """
+        if msg == WM_MOUSEWHEEL and self.scroll_zoom.active:
+            self.on_scroll(data.pt.x, data.pt.y, 0, ctypes.c_short(data.mouseData >> 16).value / WHEEL_DELTA)
+
+            # Skips on_scroll too
+            self.mouse_listener.suppress_event()
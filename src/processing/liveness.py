@@ -0,0 +1,316 @@
+"""
+Notices instantly when Minecraft exits, without reading its memory
+
+A thread blocks on the watched processes, on windows with WaitForMultipleObjects on their handles,
+on linux with poll() on pidfds, so it doesn't use any cpu while the game is running.
+"""
+
+import os
+import sys
+import time
+import select
+import logging
+import threading
+
+
+logger = logging.getLogger(__name__)
+
+
+class Waiter:
+    """ Blocks until a watched process exits
+    """
+
+    def wait(self, process_ids: set) -> list:
+        """ Wait for one of the processes to exit, or until woken
+        :param process_ids: (set) the processes to watch
+        :returns: (list) process ids that exited, empty if woken
+        """
+        raise NotImplementedError("Must override wait() method!")
+
+    def wake(self):
+        """ End the current wait, e.g. because the watched processes changed
+            Note: gets called from other threads
+        """
+        raise NotImplementedError("Must override wake() method!")
+
+
+class WindowsWaiter(Waiter):
+    """ Waits on process handles with WaitForMultipleObjects
+    """
+
+    SYNCHRONIZE = 0x00100000
+    INFINITE = 0xFFFFFFFF
+    WAIT_FAILED = 0xFFFFFFFF
+
+    # Including the wake event
+    MAXIMUM_WAIT_OBJECTS = 64
+
+    def __init__(self):
+        """ Initialize
+        """
+        import ctypes
+        from ctypes import wintypes
+
+        self.ctypes = ctypes
+        self.wintypes = wintypes
+        self.kernel32 = ctypes.windll.kernel32
+
+        self.kernel32.OpenProcess.restype = wintypes.HANDLE
+        self.kernel32.CreateEventW.restype = wintypes.HANDLE
+
+        # Unsigned, otherwise WAIT_FAILED comes back as -1
+        self.kernel32.WaitForMultipleObjects.restype = wintypes.DWORD
+        self.kernel32.WaitForMultipleObjects.argtypes = (wintypes.DWORD, ctypes.POINTER(wintypes.HANDLE),
+                                                         wintypes.BOOL, wintypes.DWORD)
+
+        # {process id: handle}
+        self.handles = {}
+
+        # Auto reset event, signaled by wake()
+        self.event = self.kernel32.CreateEventW(None, False, False, None)
+
+    def wait(self, process_ids: set) -> list:
+        """ See Waiter
+        """
+        exited = []
+
+        for process_id in set(self.handles) - process_ids:
+            self.kernel32.CloseHandle(self.wintypes.HANDLE(self.handles.pop(process_id)))
+
+        for process_id in process_ids - set(self.handles):
+            if handle := self.kernel32.OpenProcess(self.SYNCHRONIZE, False, process_id):
+                self.handles[process_id] = handle
+
+            # Exited already
+            else:
+                exited.append(process_id)
+
+        if exited:
+            return exited
+
+        watched = list(self.handles.items())[:self.MAXIMUM_WAIT_OBJECTS - 1]
+        array = (self.wintypes.HANDLE * (len(watched) + 1))(self.event, *(handle for _, handle in watched))
+
+        result = self.kernel32.WaitForMultipleObjects(len(array), array, False, self.INFINITE)
+
+        if result == self.WAIT_FAILED:
+            logger.info("Waiting for Minecraft failed!")
+            time.sleep(1)
+            return []
+
+        # Index 0 is the wake event
+        if 0 < result <= len(watched):
+            process_id, handle = watched[result - 1]
+            self.kernel32.CloseHandle(self.wintypes.HANDLE(self.handles.pop(process_id)))
+            return [process_id]
+
+        return []
+
+    def wake(self):
+        """ See Waiter
+        """
+        self.kernel32.SetEvent(self.wintypes.HANDLE(self.event))
+
+
+class PidfdWaiter(Waiter):
+    """ Waits on pidfds (linux 5.3+) with poll(), a pidfd gets readable once its process exited
+    """
+
+    def __init__(self):
+        """ Initialize
+        """
+        # {process id: pidfd}
+        self.fds = {}
+
+        self.poll = select.poll()
+
+        # Writing to it wakes poll()
+        self.wake_read, self.wake_write = os.pipe()
+        os.set_blocking(self.wake_write, False)
+        self.poll.register(self.wake_read, select.POLLIN)
+
+    def wait(self, process_ids: set) -> list:
+        """ See Waiter
+        """
+        exited = []
+
+        for process_id in set(self.fds) - process_ids:
+            self.close(process_id)
+
+        for process_id in process_ids - set(self.fds):
+            try:
+                self.fds[process_id] = fd = os.pidfd_open(process_id)
+                self.poll.register(fd, select.POLLIN)
+
+            # Exited already
+            except ProcessLookupError:
+                exited.append(process_id)
+
+        if exited:
+            return exited
+
+        for fd, _ in self.poll.poll():
+            if fd == self.wake_read:
+                os.read(self.wake_read, 4096)
+
+            else:
+                process_id = next(x for x, y in self.fds.items() if y == fd)
+                self.close(process_id)
+                exited.append(process_id)
+
+        return exited
+
+    def close(self, process_id: int):
+        """ Stop watching a process
+        :param process_id: (int) the process id
+        """
+        fd = self.fds.pop(process_id)
+        self.poll.unregister(fd)
+        os.close(fd)
+
+    def wake(self):
+        """ See Waiter
+        """
+        try:
+            os.write(self.wake_write, b"\0")
+
+        # Already woken
+        except BlockingIOError:
+            pass
+
+
+class PollingWaiter(Waiter):
+    """ Fallback without a way to block on processes, checks them every second
+    """
+
+    INTERVAL = 1
+
+    def __init__(self):
+        """ Initialize
+        """
+        self.event = threading.Event()
+
+    def wait(self, process_ids: set) -> list:
+        """ See Waiter
+        """
+        if self.event.wait(self.INTERVAL if process_ids else None):
+            self.event.clear()
+            return []
+
+        exited = []
+
+        for process_id in process_ids:
+            try:
+                os.kill(process_id, 0)
+
+            except ProcessLookupError:
+                exited.append(process_id)
+
+            # Running, but owned by someone else
+            except PermissionError:
+                pass
+
+        return exited
+
+    def wake(self):
+        """ See Waiter
+        """
+        self.event.set()
+
+
+def create_waiter() -> Waiter:
+    """ The waiter for this platform
+    """
+    if sys.platform == "win32":
+        return WindowsWaiter()
+
+    if hasattr(os, "pidfd_open"):
+        try:
+            os.close(os.pidfd_open(os.getpid()))
+            return PidfdWaiter()
+
+        # Kernel older than 5.3
+        except OSError:
+            pass
+
+    return PollingWaiter()
+
+
+class LivenessMonitor(threading.Thread):
+    """ Watches processes and calls back once one of them exited
+    """
+
+    def __init__(self, references: dict, on_exit, waiter: Waiter = None):
+        """ Initialize
+        :param references: the references
+        :param on_exit: called with the process id of an exited process, inside this thread
+        :param waiter: (Waiter) defaults to the one of this platform
+        """
+        super().__init__(name=self.__class__.__name__, daemon=True)
+        self.references = references
+
+        self.on_exit = on_exit
+        self.waiter = waiter if waiter is not None else create_waiter()
+
+        # Watched process ids
+        self.process_ids = set()
+        self.lock = threading.Lock()
+
+        self.stopped = False
+
+        # Add to references
+        self.references.update({"LivenessMonitor": self})
+        logger.info("+ LivenessMonitor")
+
+    def watch(self, process_id: int):
+        """ Watch a process
+        :param process_id: (int) the process id
+        """
+        with self.lock:
+            self.process_ids.add(process_id)
+
+        if not self.is_alive():
+            self.start()
+
+        self.waiter.wake()
+
+    def unwatch(self, process_id: int):
+        """ Stop watching a process
+        :param process_id: (int) the process id
+        """
+        with self.lock:
+            self.process_ids.discard(process_id)
+
+        self.waiter.wake()
+
+    def unwatch_all(self):
+        """ Stop watching all processes
+        """
+        with self.lock:
+            self.process_ids.clear()
+
+        self.waiter.wake()
+
+    def stop(self):
+        """ Stop the thread
+        """
+        self.stopped = True
+        self.waiter.wake()
+
+    def run(self) -> None:
+        """ Wait, whenever something is watched
+        """
+        while not self.stopped:
+            with self.lock:
+                process_ids = set(self.process_ids)
+
+            for process_id in self.waiter.wait(process_ids):
+                with self.lock:
+                    # Unwatched in the meantime
+                    if process_id not in self.process_ids:
+                        continue
+
+                    self.process_ids.discard(process_id)
+
+                logger.info(f"Minecraft [{process_id}] exited!")
+                self.on_exit(process_id)
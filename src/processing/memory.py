@@ -0,0 +1,562 @@
+"""
+Access to the memory of a process, used by the gateway
+
+The gateway only talks to a Memory object, so that besides pymem (Windows only)
+a simulated process can be used, e.g. for benchmarks on Linux.
+"""
+
+import re
+import bisect
+import struct
+import logging
+import subprocess
+
+from src import exceptions
+
+
+logger = logging.getLogger(__name__)
+
+
+class Memory:
+    """ Base of all memory backends, all read_* and write_* methods are built on read_bytes() and write_bytes()
+        Note: the method names follow pymem, so that the a_type of the feature presets can be used
+    """
+
+    # Formats of the values, little endian and like a 64 bit process
+    FORMATS = {
+        "int": struct.Struct("<i"),
+        "uint": struct.Struct("<I"),
+        "short": struct.Struct("<h"),
+        "ushort": struct.Struct("<H"),
+        "longlong": struct.Struct("<q"),
+        "ulonglong": struct.Struct("<Q"),
+        "float": struct.Struct("<f"),
+        "double": struct.Struct("<d"),
+        "bool": struct.Struct("<?")
+    }
+
+    POINTER = FORMATS["ulonglong"]
+
+    PAGE_SIZE = 4096
+
+    def __init__(self):
+        """ Initialize
+        """
+        # Truthy while a process is opened
+        self.process_handle = None
+        self.process_id = None
+
+        # The main module (Minecraft.Windows.exe)
+        self.base_address = None
+        self.module_size = 0
+
+    def __getattr__(self, name: str):
+        """ Generates the typed read_* and write_* methods from FORMATS
+        :param name: the attribute name
+        :returns: the method
+        """
+        mode, _, type_name = name.partition("_")
+
+        if mode in ("read", "write") and type_name in self.FORMATS:
+            fmt = self.FORMATS[type_name]
+
+            if mode == "read":
+                method = lambda address: fmt.unpack(self.read_bytes(address, fmt.size))[0]
+
+            else:
+                method = lambda address, value: self.write_bytes(address, fmt.pack(value))
+
+            # Cache it, __getattr__ is only called for missing attributes
+            setattr(self, name, method)
+            return method
+
+        raise AttributeError(f"'{self.__class__.__name__}' object has no attribute '{name}'")
+
+    def open_process_from_name(self, name: str):
+        """ Open a process and its main module
+        :param name: (str) name of the process, e.g. 'Minecraft.Windows.exe'
+        :raises ProcessNotFound: if it isn't running or can't be opened
+        """
+        raise NotImplementedError("Must override open_process_from_name() method!")
+
+    def open_all_from_name(self, name: str) -> list:
+        """ Open every running process with that name, e.g. for multiple instances of the game
+        :param name: (str) name of the process
+        :returns: (list) new opened Memory objects, one per process
+        """
+        raise NotImplementedError("Must override open_all_from_name() method!")
+
+    def close_process(self):
+        """ Close the opened process
+        """
+        self.process_handle = None
+        self.process_id = None
+        self.base_address = None
+        self.module_size = 0
+
+    def get_version(self) -> str:
+        """ Version of the opened game
+        :returns: (str) the version or ""
+        """
+        raise NotImplementedError("Must override get_version() method!")
+
+    def read_bytes(self, address: int, length: int) -> bytes:
+        """ Read raw bytes
+        :param address: (int) the address
+        :param length: (int) number of bytes
+        :raises MemoryReadError: on failure
+        """
+        raise NotImplementedError("Must override read_bytes() method!")
+
+    def write_bytes(self, address: int, data: bytes):
+        """ Write raw bytes
+        :param address: (int) the address
+        :param data: (bytes) the bytes
+        :raises MemoryWriteError: on failure
+        """
+        raise NotImplementedError("Must override write_bytes() method!")
+
+    def readable_regions(self, start: int = 0, end: int = None) -> list:
+        """ The committed and readable memory regions, e.g. for scans
+        :param start: (int) only regions from here on
+        :param end: (int) only regions until here
+        :returns: (list) (address, size) pairs, clipped to start and end
+        """
+        raise NotImplementedError("Must override readable_regions() method!")
+
+    @classmethod
+    def group_reads(cls, items: list) -> list:
+        """ Group reads of small values, the ones inside the same page can be read at once
+            (a page is either readable as a whole or not at all)
+        :param items: (list) (address, size, payload) triples
+        :returns: (list) (address, length, [(offset, size, payload)]) reads, sorted by the address
+        """
+        reads = []
+
+        for address, size, payload in sorted(items, key=lambda x: x[0]):
+            if reads and address // cls.PAGE_SIZE == reads[-1][0] // cls.PAGE_SIZE:
+                start, length, values = reads[-1]
+                values.append((address - start, size, payload))
+                reads[-1] = (start, max(length, address + size - start), values)
+
+            else:
+                reads.append((address, size, [(0, size, payload)]))
+
+        return reads
+
+    def read_pointer(self, address: int) -> int:
+        """ Read a 64 bit pointer
+        :param address: (int) the address
+        """
+        return self.POINTER.unpack(self.read_bytes(address, 8))[0]
+
+    def read_string(self, address: int, byte: int = 50, encoding: str = "UTF-8") -> str:
+        """ Read a null terminated string
+        :param address: (int) the address
+        :param byte: (int) maximum length
+        :param encoding: (str) the encoding
+        :raises UnicodeDecodeError: on invalid strings
+        """
+        data = self.read_bytes(address, byte)
+
+        if (end := data.find(b"\x00")) != -1:
+            data = data[:end]
+
+        return data.decode(encoding)
+
+    def write_string(self, address: int, value: str):
+        """ Write a string, without null terminator just like pymem
+        :param address: (int) the address
+        :param value: (str) the string
+        """
+        self.write_bytes(address, value.encode())
+
+
+class PymemMemory(Memory):
+    """ Memory of a real process on Windows, using pymem
+    """
+
+    # For readable_regions(), see VirtualQueryEx
+    MEM_COMMIT = 0x1000
+    PAGE_GUARD = 0x100
+    PAGE_READABLE = 0x02 | 0x04 | 0x08 | 0x20 | 0x40 | 0x80
+    MAX_ADDRESS = 0x7FFFFFFFFFFF
+
+    def __init__(self):
+        """ Initialize, pymem is only imported once opening a process
+        """
+        super().__init__()
+        self.pm = None
+
+    def __getattr__(self, name: str):
+        """ Uses the typed methods of pymem, they read directly into ctypes values
+        :param name: the attribute name
+        :returns: the method
+        """
+        mode, _, type_name = name.partition("_")
+
+        if mode in ("read", "write") and self.pm and hasattr(self.pm, name):
+            return self.translate(getattr(self.pm, name), write=mode == "write")
+
+        return super().__getattr__(name)
+
+    @staticmethod
+    def translate(pm_method, *, write: bool):
+        """ Wraps a pymem method, so that it raises the exceptions of this module
+        :param pm_method: the pymem method
+        :param write: (bool) if it writes
+        :returns: the wrapped method
+        """
+        import pymem
+
+        error = exceptions.MemoryWriteError if write else exceptions.MemoryReadError
+        caught = (pymem.exception.MemoryWriteError if write else pymem.exception.MemoryReadError,
+                  pymem.exception.WinAPIError, pymem.exception.ProcessError)
+
+        def method(*args, **kwargs):
+            try:
+                return pm_method(*args, **kwargs)
+
+            except caught as e:
+                raise error(str(e)) from e
+
+        return method
+
+    def open_process_from_name(self, name: str):
+        """ See Memory
+        """
+        import pymem
+
+        try:
+            self.pm = pymem.Pymem(name)
+
+        except (pymem.exception.ProcessNotFound, pymem.exception.CouldNotOpenProcess,
+                pymem.exception.WinAPIError) as e:
+            self.pm = None
+            raise exceptions.ProcessNotFound(str(e)) from e
+
+        self.process_handle = self.pm.process_handle
+        self.process_id = self.pm.process_id
+        self.base_address = self.pm.process_base.lpBaseOfDll
+        self.module_size = self.pm.process_base.SizeOfImage
+
+    def open_process_from_id(self, process_id: int, name: str):
+        """ Open a process by its id
+        :param process_id: (int) the process id
+        :param name: (str) name of the process, needed to find the main module
+        :raises ProcessNotFound: if it isn't running or can't be opened
+        """
+        import pymem
+
+        try:
+            self.pm = pymem.Pymem()
+            self.pm.open_process_from_id(process_id)
+            self.pm.process_name = name
+
+            self.base_address = self.pm.process_base.lpBaseOfDll
+            self.module_size = self.pm.process_base.SizeOfImage
+
+        except (pymem.exception.ProcessNotFound, pymem.exception.CouldNotOpenProcess,
+                pymem.exception.WinAPIError, pymem.exception.ProcessError, TypeError) as e:
+            self.pm = None
+            raise exceptions.ProcessNotFound(str(e)) from e
+
+        self.process_handle = self.pm.process_handle
+        self.process_id = process_id
+
+    def open_all_from_name(self, name: str) -> list:
+        """ See Memory
+        """
+        import pymem
+
+        memories = []
+
+        for process in pymem.process.list_processes():
+            if process.szExeFile.decode(errors="replace").lower() != name.lower():
+                continue
+
+            memory = PymemMemory()
+
+            try:
+                memory.open_process_from_id(process.th32ProcessID, name)
+                memories.append(memory)
+
+            # Exited in the meantime
+            except exceptions.ProcessNotFound:
+                pass
+
+        return memories
+
+    def close_process(self):
+        """ See Memory
+        """
+        if self.pm:
+            self.pm.close_process()
+            self.pm = None
+
+        super().close_process()
+
+    def get_version(self) -> str:
+        """ See Memory, the version is part of the install directory of the package, e.g.
+            WindowsApps\\Microsoft.MinecraftUWP_1.21.4401.0_x64__8wekyb3d8bbwe\\Minecraft.Windows.exe
+            So every instance gets its own version, the powershell command is the fallback
+        """
+        if version := self.get_version_from_path():
+            logger.info(f"Found MC Version '{version}'")
+            return version
+
+        startupinfo = subprocess.STARTUPINFO()
+        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+
+        version = subprocess.check_output(
+            "powershell.exe Get-AppxPackage -name Microsoft.MinecraftUWP | select -expandproperty Version",
+            stdin=subprocess.PIPE, stderr=subprocess.PIPE, startupinfo=startupinfo)\
+            .decode("utf8").rstrip()
+
+        if version:
+            logger.info(f"Found MC Version '{version}'")
+
+            return version
+
+        else:
+            return ""
+
+    def get_version_from_path(self) -> str:
+        """ Get the version from the path of the executable
+        :returns: (str) the version or ""
+        """
+        import ctypes
+        from ctypes import wintypes
+
+        if not self.process_handle:
+            return ""
+
+        size = wintypes.DWORD(1024)
+        buffer = ctypes.create_unicode_buffer(size.value)
+
+        if not ctypes.windll.kernel32.QueryFullProcessImageNameW(self.process_handle, 0, buffer, ctypes.byref(size)):
+            return ""
+
+        match = re.search(r"_(\d+(?:\.\d+){3})_", buffer.value)
+        return match.group(1) if match else ""
+
+    def readable_regions(self, start: int = 0, end: int = None) -> list:
+        """ See Memory, walks the regions with VirtualQueryEx
+        """
+        import pymem
+
+        if not self.pm:
+            return []
+
+        end = end if end is not None else self.MAX_ADDRESS
+        regions = []
+        address = start
+
+        while address < end:
+            try:
+                info = pymem.memory.virtual_query(self.process_handle, address)
+
+            except pymem.exception.WinAPIError:
+                break
+
+            region_start, region_end = info.BaseAddress or 0, (info.BaseAddress or 0) + info.RegionSize
+            if region_end <= address:
+                break
+
+            if info.State == self.MEM_COMMIT and info.Protect & self.PAGE_READABLE and \
+                    not info.Protect & self.PAGE_GUARD:
+                regions.append((max(region_start, start), min(region_end, end) - max(region_start, start)))
+
+            address = region_end
+
+        return regions
+
+    def read_bytes(self, address: int, length: int) -> bytes:
+        """ See Memory
+        """
+        if not self.pm:
+            raise exceptions.MemoryReadError("No process is opened!")
+
+        return self.translate(self.pm.read_bytes, write=False)(address, length)
+
+    def write_bytes(self, address: int, data: bytes):
+        """ See Memory
+        """
+        if not self.pm:
+            raise exceptions.MemoryWriteError("No process is opened!")
+
+        self.translate(self.pm.write_bytes, write=True)(address, data, len(data))
+
+
+class SimulatedMemory(Memory):
+    """ A simulated process, made of bytearray regions
+        Used for benchmarks and to reproduce things on Linux without Minecraft
+    """
+
+    def __init__(self, *, process_name: str = "Minecraft.Windows.exe", version: str = "1.21.0.3",
+                 base_address: int = 0x7FF600000000, module_size: int = 0x100000, process_id: int = 1):
+        """ Initialize
+        :param process_name: (str) name that can be opened
+        :param version: (str) the game version
+        :param base_address: (int) where the module is mapped
+        :param module_size: (int) size of the module
+        :param process_id: (int) the simulated process id
+        """
+        super().__init__()
+
+        self.process_name = process_name
+        self.process_id_simulated = process_id
+
+        # The other running processes, see spawn()
+        self.others = []
+        self.version = version
+        self.module_base_address = base_address
+        self.module_size_simulated = module_size
+
+        # Sorted region start addresses + {start: bytearray}
+        self.starts = []
+        self.regions = {}
+
+        # Next free address for allocate()
+        self.heap_address = 0x20000000000
+
+        self.add_region(base_address, bytearray(module_size))
+
+    def add_region(self, address: int, data: bytearray):
+        """ Map a region
+        :param address: (int) start of the region
+        :param data: (bytearray) its content, used by reference
+        """
+        bisect.insort(self.starts, address)
+        self.regions[address] = data
+
+    def allocate(self, size: int) -> int:
+        """ Map a new zeroed region on the simulated heap
+        :param size: (int) size of the region
+        :returns: (int) its address
+        """
+        address = self.heap_address
+        self.add_region(address, bytearray(size))
+
+        # Page aligned + a unmapped gap, so that overflows are read errors
+        self.heap_address += (size + 0x1FFF) & ~0xFFF
+
+        return address
+
+    def build_pointer_chain(self, offsets: list) -> int:
+        """ Create the pointers needed so that offsets (like Features.offsets) resolve
+            Existing pointers get reused, so that chains can share their beginning like in the game
+        :param offsets: (list) [base, offset 1, ..., last]
+        :returns: (int) the address the chain points to
+        """
+        address = self.module_base_address + offsets[0]
+
+        # Static pointers can lie outside the simulated module
+        if not self.find_region(address, 8):
+            self.add_region(address & ~0xFFF, bytearray(0x1000))
+
+        for offset in offsets[1:]:
+            node = self.POINTER.unpack(self.read_bytes(address, 8))[0]
+
+            if not node or not self.find_region(node + offset, 8):
+                node = self.allocate(max(offset + 8, 0x1000))
+                self.write_bytes(address, self.POINTER.pack(node))
+
+            address = node + offset
+
+        return address
+
+    def spawn(self, **kwargs) -> "SimulatedMemory":
+        """ Simulate another running process, e.g. a second instance of the game
+        :param kwargs: see __init__()
+        :returns: (SimulatedMemory) the new process
+        """
+        kwargs.setdefault("process_name", self.process_name)
+        kwargs.setdefault("version", self.version)
+        kwargs.setdefault("process_id", self.process_id_simulated + len(self.others) + 1)
+
+        other = SimulatedMemory(**kwargs)
+        self.others.append(other)
+
+        return other
+
+    def find_region(self, address: int, length: int) -> tuple[bytearray, int] | None:
+        """ Find the region containing an address range
+        :param address: (int) the start
+        :param length: (int) the length
+        :returns: (tuple) the region and the offset inside it, or None
+        """
+        i = bisect.bisect_right(self.starts, address) - 1
+
+        if i >= 0:
+            start = self.starts[i]
+            region = self.regions[start]
+
+            if address + length <= start + len(region):
+                return region, address - start
+
+        return None
+
+    def open_process_from_name(self, name: str):
+        """ See Memory
+        """
+        if name != self.process_name:
+            raise exceptions.ProcessNotFound(f"Could not find process: {name}")
+
+        self.process_handle = 1
+        self.process_id = self.process_id_simulated
+        self.base_address = self.module_base_address
+        self.module_size = self.module_size_simulated
+
+    def open_all_from_name(self, name: str) -> list:
+        """ See Memory, the simulated processes are already their own Memory objects
+        """
+        memories = []
+
+        for memory in [self] + self.others:
+            if memory.process_name == name:
+                memory.open_process_from_name(name)
+                memories.append(memory)
+
+        return memories
+
+    def get_version(self) -> str:
+        """ See Memory
+        """
+        return self.version
+
+    def readable_regions(self, start: int = 0, end: int = None) -> list:
+        """ See Memory
+        """
+        if not self.process_handle:
+            return []
+
+        regions = []
+
+        for address in self.starts:
+            region_start = max(address, start)
+            region_end = address + len(self.regions[address]) if end is None else \
+                min(address + len(self.regions[address]), end)
+
+            if region_start < region_end:
+                regions.append((region_start, region_end - region_start))
+
+        return regions
+
+    def read_bytes(self, address: int, length: int) -> bytes:
+        """ See Memory
+        """
+        if not self.process_handle or not (found := self.find_region(address, length)):
+            raise exceptions.MemoryReadError(f"Could not read memory at: {address}, length: {length}")
+
+        region, offset = found
+        return bytes(region[offset:offset + length])
+
+    def write_bytes(self, address: int, data: bytes):
+        """ See Memory
+        """
+        if not self.process_handle or not (found := self.find_region(address, len(data))):
+            raise exceptions.MemoryWriteError(f"Could not write memory at: {address}, length: {len(data)}")
+
+        region, offset = found
+        region[offset:offset + len(data)] = data
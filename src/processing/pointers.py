@@ -0,0 +1,233 @@
+"""
+Finds pointer chains from the module of the game to an address, e.g. to regenerate broken offsets
+
+The pointer map holds every aligned value of the readable memory that points into it,
+as two arrays sorted by the value, so all pointers to a range of addresses are found with a binary search.
+The search goes backwards from the target, until a pointer lies inside the module (a static pointer):
+```
+pointer_map = PointerMap.build(gateway.memory, references["ScanExecutor"])
+pointer_map.search(gateway.features.addresses["0"][0], depth=4, max_offset=0x400, scan_executor=...)
+```
+Every result is an offsets list like the ones of the features, see Gateway.get_address.
+"""
+
+import logging
+
+from src.processing import executor as executor_
+
+
+logger = logging.getLogger(__name__)
+
+
+def find_pointers(data: memoryview, address: int, end: int, starts, ends) -> list:
+    """ Scan function (see executor.ScanExecutor), finds the aligned values pointing into the regions
+    :param data: (memoryview) the chunk
+    :param address: (int) its address
+    :param end: (int) see executor
+    :param starts: (ndarray) sorted start addresses of the regions
+    :param ends: (ndarray) their end addresses
+    :returns: (list) (locations, values) of the chunk, empty if nothing was found
+    """
+    import numpy as np
+
+    values = np.frombuffer(data, "<u8", count=end // 8)
+
+    # Cheap check first, most values are no pointers at all
+    indices = np.flatnonzero((values >= starts[0]) & (values < ends[-1]))
+    candidates = values[indices]
+
+    region = np.searchsorted(starts, candidates, "right") - 1
+    valid = candidates < ends[region]
+    indices, candidates = indices[valid], candidates[valid]
+
+    if not len(indices):
+        return []
+
+    return [(indices.astype(np.uint64) * np.uint64(8) + np.uint64(address), candidates)]
+
+
+def search_chains(values, locations, static: tuple, address: int, depth: int, max_offset: int, limit: int) -> list:
+    """ Search chains to an address, depth first
+    :param values: (ndarray) sorted pointer values
+    :param locations: (ndarray) their locations
+    :param static: (tuple) start and end of the module
+    :param address: (int) the address
+    :param depth: (int) maximum number of pointers
+    :param max_offset: (int) maximum offset added to a pointer
+    :param limit: (int) maximum number of chains
+    :returns: (list) the chains, offsets lists
+    """
+    import numpy as np
+
+    chains = []
+
+    if depth <= 0:
+        return chains
+
+    low = np.searchsorted(values, np.uint64(max(address - max_offset, 0)), "left")
+    high = np.searchsorted(values, np.uint64(address), "right")
+
+    # Closest pointers first, so smaller offsets are preferred
+    for value, location in zip(values[low:high][::-1].tolist(), locations[low:high][::-1].tolist()):
+        offset = address - value
+
+        if static[0] <= location < static[1]:
+            chains.append([location - static[0], offset])
+
+        else:
+            for chain in search_chains(values, locations, static, location, depth - 1, max_offset,
+                                       limit - len(chains)):
+                chains.append(chain + [offset])
+
+        if len(chains) >= limit:
+            break
+
+    return chains
+
+
+def search_shared(name: str, count: int, static: tuple, address: int, depth: int, max_offset: int,
+                  limit: int) -> list:
+    """ search_chains() inside a worker process, the pointer map is inside a shared memory block
+    :param name: (str) name of the block, see PointerMap.share()
+    :param count: (int) number of pointers
+    """
+    import numpy as np
+    from multiprocessing import shared_memory
+
+    # Not cached like the blocks of the executor, every search has its own block
+    block = shared_memory.SharedMemory(name)
+    values = np.frombuffer(block.buf, "<u8", count=count)
+    locations = np.frombuffer(block.buf, "<u8", count=count, offset=count * 8)
+
+    try:
+        return search_chains(values, locations, static, address, depth, max_offset, limit)
+
+    finally:
+        # The exports of the buffer have to be released before closing
+        del values, locations
+        block.close()
+
+
+class PointerMap:
+    """ Every pointer of the memory, as arrays sorted by the value they point to
+    """
+
+    def __init__(self, values, locations, base_address: int, module_size: int):
+        """ Initialize
+        :param values: (ndarray) sorted pointer values, uint64
+        :param locations: (ndarray) their locations, uint64
+        :param base_address: (int) base address of the module
+        :param module_size: (int) size of the module
+        """
+        self.values = values
+        self.locations = locations
+
+        self.static = (base_address, base_address + module_size)
+
+    def __len__(self):
+        return len(self.values)
+
+    @classmethod
+    def build(cls, memory, scan_executor=None, *, regions: list = None):
+        """ Scan the memory for pointers
+        :param memory: (Memory) an opened memory
+        :param scan_executor: (ScanExecutor) for scanning on all cores
+        :param regions: (list) (address, size) pairs, defaults to all readable regions
+        :returns: (PointerMap) the map, None if cancelled
+        """
+        import numpy as np
+
+        regions = memory.readable_regions() if regions is None else regions
+
+        starts = np.array([address for address, _ in regions], np.uint64)
+        ends = np.array([address + size for address, size in regions], np.uint64)
+        order = np.argsort(starts)
+        args = (starts[order], ends[order])
+
+        if scan_executor is not None:
+            found = scan_executor.scan(memory, find_pointers, args, name="Pointer scan", regions=regions).wait()
+
+            if found is None:
+                return None
+
+        else:
+            found = executor_.scan_sequential(memory, find_pointers, args, regions=regions)
+
+        locations = np.concatenate([x for x, _ in found]) if found else np.empty(0, np.uint64)
+        values = np.concatenate([x for _, x in found]) if found else np.empty(0, np.uint64)
+
+        # Stable, so that pointers with the same value stay ordered by their location
+        order = np.argsort(values, kind="stable")
+
+        logger.info(f"Found {len(order)} pointers")
+        return cls(values[order], locations[order], memory.base_address, memory.module_size)
+
+    def share(self):
+        """ Copy the map into a shared memory block, for the worker processes
+        :returns: (SharedMemory) the block, values followed by locations, close and unlink it afterwards
+        """
+        import numpy as np
+        from multiprocessing import shared_memory
+
+        block = shared_memory.SharedMemory(create=True, size=max(len(self) * 16, 1))
+
+        shared = np.frombuffer(block.buf, np.uint64, count=len(self) * 2)
+        shared[:len(self)], shared[len(self):] = self.values, self.locations
+        del shared
+
+        return block
+
+    def search(self, target: int, *, depth: int = 4, max_offset: int = 0x400, limit: int = 100,
+               scan_executor=None) -> list:
+        """ Find pointer chains from the module to the target
+        :param target: (int) the address, e.g. of the FOV
+        :param depth: (int) maximum number of pointers in a chain
+        :param max_offset: (int) maximum offset added to a pointer
+        :param limit: (int) maximum number of chains
+        :param scan_executor: (ScanExecutor) for searching on all cores
+        :returns: (list) offsets lists like Features.offsets, shortest first
+        """
+        import numpy as np
+
+        if scan_executor is None:
+            chains = search_chains(self.values, self.locations, self.static, target, depth, max_offset, limit)
+
+        else:
+            chains = []
+
+            low = np.searchsorted(self.values, np.uint64(max(target - max_offset, 0)), "left")
+            high = np.searchsorted(self.values, np.uint64(target), "right")
+            tasks = []
+
+            block = self.share()
+
+            try:
+                # Every pointer to the target is searched on its own, closest first like search_chains()
+                for value, location in zip(self.values[low:high][::-1].tolist(),
+                                           self.locations[low:high][::-1].tolist()):
+                    if self.static[0] <= location < self.static[1]:
+                        tasks.append(([[location - self.static[0], target - value]], target - value))
+
+                    else:
+                        tasks.append((scan_executor.submit(search_shared, block.name, len(self), self.static,
+                                                           location, depth - 1, max_offset, limit),
+                                      target - value))
+
+                # In order of the tasks, so the result doesn't depend on which worker finished first
+                for task, offset in tasks:
+                    if isinstance(task, list):
+                        chains.extend(task)
+
+                    else:
+                        chains.extend(chain + [offset] for chain in task.result())
+
+            finally:
+                for task, _ in tasks:
+                    if not isinstance(task, list):
+                        task.cancel()
+
+                block.close()
+                block.unlink()
+
+        # Shortest first, the others keep their order
+        return sorted(chains, key=len)[:limit]
@@ -0,0 +1,194 @@
+""" Multiple instances of Minecraft, each one gets its own gateway """
+import sys
+import logging
+import concurrent.futures
+
+from src import exceptions
+from src.processing import storage
+from src.processing.gateway import Gateway
+
+
+logger = logging.getLogger(__name__)
+
+
+def focused_process_ids() -> set:
+    """ Ids of the processes owning the foreground window
+        UWP apps are hosted by ApplicationFrameHost.exe, so the child windows are included
+    :returns: (set) the process ids, empty if unknown (not on Windows)
+    """
+    if sys.platform != "win32":
+        return set()
+
+    import ctypes
+    from ctypes import wintypes
+
+    user32 = ctypes.windll.user32
+    process_ids = set()
+
+    hwnd = user32.GetForegroundWindow()
+    if not hwnd:
+        return process_ids
+
+    @ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HWND, wintypes.LPARAM)
+    def add(window, _):
+        process_id = wintypes.DWORD()
+        user32.GetWindowThreadProcessId(window, ctypes.byref(process_id))
+        process_ids.add(process_id.value)
+        return True
+
+    add(hwnd, 0)
+    user32.EnumChildWindows(hwnd, add, 0)
+
+    return process_ids
+
+
+class GatewayPool:
+    """ The gateway of the first attached instance (references["Gateway"]) + one gateway for every other instance
+        Writes of the listener go to all of them, or only to the focused one
+    """
+
+    PROCESS_NAME = "Minecraft.Windows.exe"
+
+    def __init__(self, references: dict):
+        """ Initialize
+        :param references: the references
+        """
+        self.references = references
+
+        self.storage = references["Storage"]
+        self.gateway = references["Gateway"]
+
+        # {process id: Gateway} of the other instances
+        self.gateways = {}
+
+        # The writes of a key event get dispatched concurrently, one task per instance
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix="GatewayPool")
+
+        # Add to references
+        self.references.update({"GatewayPool": self})
+        logger.info("+ GatewayPool")
+
+    def attach_all(self):
+        """ Attach to every other running instance, the primary gateway has to be attached already
+            Instances with another version get their own features
+        """
+        if not self.gateway.process_handle:
+            return
+
+        for memory in self.gateway.memory.open_all_from_name(self.PROCESS_NAME):
+            process_id = memory.process_id
+            attached = [self.gateway.memory, *(x.memory for x in list(self.gateways.values()))]
+
+            if process_id in (x.process_id for x in attached):
+                # Just another handle to an attached instance
+                if all(memory is not x for x in attached):
+                    memory.close_process()
+
+                continue
+
+            version = memory.get_version()
+
+            # Same version, so same offsets, but own addresses
+            if version == self.gateway.current_mc_version:
+                features = storage.Features(self.references)
+                features.data, features.len = self.gateway.features.data, self.gateway.features.len
+
+            else:
+                features = self.references["Network"].features_for_version(version, memory)
+
+                if features is None:
+                    logger.info(f"- No features for instance {process_id} [{version}]!")
+                    memory.close_process()
+                    continue
+
+            gateway = Gateway(self.references, memory, features=features)
+            gateway.current_mc_version = version
+            gateway.get_addresses()
+
+            self.gateways[process_id] = gateway
+            logger.info(f"Attached to instance {process_id} [{version}]!")
+
+        self.gateway.status_check()
+
+    def detach(self, process_id: int):
+        """ Detach from another instance
+        :param process_id: (int) its process id
+        """
+        if gateway := self.gateways.pop(process_id, None):
+            gateway.close_process()
+            logger.info(f"Detached from instance {process_id}!")
+
+    def detach_all(self):
+        """ Detach from all other instances
+        """
+        for process_id in list(self.gateways):
+            self.detach(process_id)
+
+    def targets(self) -> list:
+        """ The gateways that receive writes
+        :returns: (list) the gateways
+        """
+        gateways = [self.gateway, *list(self.gateways.values())]
+
+        if len(gateways) > 1 and self.storage.settings["focused_only"]:
+            process_ids = focused_process_ids()
+
+            # No instance is focused, e.g. on another monitor, so fall back to the first one
+            return [x for x in gateways if x.memory.process_id in process_ids] or gateways[:1]
+
+        return gateways
+
+    def write_addresses(self, writes: list):
+        """ Write to the addresses of all targets
+        :param writes: (list) (feature id, new value) pairs
+        :raises GatewayError: if the primary gateway failed, the other instances get detached instead
+        """
+
+        def write(gateway: Gateway):
+            """ All writes of one instance """
+            for feature_id, new in writes:
+                gateway.write_address(feature_id, new)
+
+        targets = self.targets()
+
+        # The usual case, no need to involve other threads
+        if len(targets) == 1:
+            return write(targets[0])
+
+        futures = {self.executor.submit(write, gateway): gateway for gateway in targets}
+        error = None
+
+        for future, gateway in futures.items():
+            try:
+                future.result()
+
+            except exceptions.GatewayError as e:
+                if gateway is self.gateway:
+                    error = e
+
+                else:
+                    # The process id of the memory is already reset, if it got closed
+                    process_id = next((x for x, y in list(self.gateways.items()) if y is gateway), None)
+
+                    # Detached already in the meantime, e.g. its exit was noticed first
+                    if process_id is None:
+                        continue
+
+                    logger.info(f"Minecraft instance {process_id} was closed!")
+                    self.detach(process_id)
+                    self.gateway.status_check()
+
+        if error:
+            raise error
+
+    def instances_status(self) -> dict:
+        """ Status of the other instances, an instance is fine if none of its features failed
+        :returns: (dict) {name: state}
+        """
+        status = {}
+
+        for process_id, gateway in list(self.gateways.items()):
+            gateway.status_check()
+            status[f"Instance {process_id}"] = gateway.status["Connected"] and False not in gateway.status.values()
+
+        return status
@@ -1,20 +1,11 @@
 """ All things that can block or lag the UI etc. """
-import builtins
-import os
-import string
-import subprocess
-import threading
-import time
 import asyncio
 import logging
 
-import pymem
-from pymem.ptypes import RemotePointer
-
-from src import ui, thread
-from src.network import network
+from src import events, exceptions, thread, tracing
+from src.network import network, sync
 from src.network.discord import Discord
-from src.processing import storage, listener
+from src.processing import discovery, executor, liveness, reload, storage, watch
 
 
 logger = logging.getLogger(__name__)
@@ -22,8 +13,14 @@ logger = logging.getLogger(__name__)
 
 class ProcessingThread(thread.Thread):
     """ The Processing Thread is for the processing and storage etc.
+        It runs an event loop, discord is awaited, blocking work (saving, attaching) runs on its worker pool
+        Saving and updating the listener keys happen as soon as the events arrive, see events.EventBus
     """
 
+    # Seconds until offloaded operations time out
+    OPERATION_TIMEOUT = 15
+    ATTACH_TIMEOUT = 60
+
     def __init__(self, references: dict):
         """ Initialize
         :param references: references
@@ -32,11 +29,26 @@ class ProcessingThread(thread.Thread):
         self.references = references
 
         # Components
+        self.event_bus = references["EventBus"]
         self.storage = None
         self.gateway = None
+        self.pool = None
         self.network = None
         self.listener = None
         self.discord = None
+        self.discovery = None
+        self.liveness = None
+        self.executor = None
+        self.watcher = None
+        self.settings_sync = None
+        self.reloader = None
+        self.offsets_sync = None
+
+        # If discovery was wanted, e.g. by auto attach, so that it resumes after the game was closed
+        self.auto_discover = False
+
+        # Rich presence updates don't overlap, e.g. the one of game_exit()
+        self.presence_lock = asyncio.Lock()
 
         # Add thread to references
         self.references.update({"ProcessingThread": self})
@@ -47,104 +59,276 @@ class ProcessingThread(thread.Thread):
         logger.info("+ ProcessingThread")
 
         # Create basic ui to be able to display events
-        self.references["RootThread"].queue.append(
-            {"cmd": "create_widgets", "params": [], "kwargs": {}})
+        self.references["Frontend"].create_widgets()
 
-        # Initialize storage
-        self.storage = storage.Storage(self.references)
+        def create_gateway():
+            """ Imported here so that the gateway doesn't delay the tray icon """
+            from src.processing.gateway import Gateway
+            gateway = Gateway(self.references)
 
-        # Initialize network
-        self.network = network.Network(self.references)
+            # Every read and write gets recorded, see tracing
+            if recorder := self.references.get("Recorder"):
+                gateway.memory = tracing.TracedMemory(gateway.memory, recorder)
 
-        # Initialize gateway
-        self.gateway = Gateway(self.references)
+            return gateway
 
-        # Not initialize listener, because its a thread
+        def create_gateway_pool():
+            """ Other instances of the game """
+            from src.processing.pool import GatewayPool
+            return GatewayPool(self.references)
 
-        # Initialize discord (rich presence) and event loop
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        self.discord = Discord(self.references, loop=loop)
+        def on_game_exit(process_id: int):
+            """ Called by the liveness monitor, handled inside this thread """
+            self.queue.append({"cmd": "game_exit", "params": [process_id], "kwargs": {}})
 
-        # Finish UI content
-        self.references["RootThread"].queue.append(
-            {"cmd": "create_content", "params": [], "kwargs": {}})
+        # Components get initialized concurrently, as soon as their dependencies are ready
+        # Not initialize listener, because its a thread
+        graph = thread.ComponentGraph()
+        graph.add("Storage", lambda: storage.Storage(self.references))
+        graph.add("Network", lambda: network.Network(self.references), after=("Storage",))
+        graph.add("Gateway", create_gateway, after=("Storage",))
+        graph.add("GatewayPool", create_gateway_pool, after=("Gateway",))
+        graph.add("Discord", lambda: Discord(self.references))
+        graph.add("Discovery", lambda: discovery.Discovery(self.references), after=("Gateway",))
+        graph.add("LivenessMonitor", lambda: liveness.LivenessMonitor(self.references, on_game_exit))
+        graph.add("ScanExecutor", lambda: executor.ScanExecutor(self.references))
+        graph.add("Watcher", lambda: watch.Watcher(self.references), after=("Gateway",))
+        graph.add("StorageReloader", lambda: reload.StorageReloader(self.references), after=("Storage",))
+        graph.add("OffsetsSync", lambda: sync.OffsetsSync(self.references), after=("OffsetsCache",))
+
+        # Warming up doesn't need to block anything
+        graph.add("NetworkWarmUp", lambda: self.references["Network"].warm_up(), after=("Network",))
+        graph.add("OffsetsCache", lambda: self.references["Network"].cache.load_index(), after=("Network",))
+
+        # Finish UI content, it only needs the storage and the status of the gateway
+        graph.when_ready(("Storage", "Gateway"), self.references["Frontend"].create_content)
+
+        components = graph.run()
+
+        self.storage = components["Storage"]
+        self.network = components["Network"]
+        self.gateway = components["Gateway"]
+        self.pool = components["GatewayPool"]
+        self.discord = components["Discord"]
+        self.queue.append({"cmd": self.discord.connect, "params": [], "kwargs": {}})
+        self.discovery = components["Discovery"]
+        self.liveness = components["LivenessMonitor"]
+        self.executor = components["ScanExecutor"]
+        self.watcher = components["Watcher"]
+
+        # Changes made inside the game, e.g. of the FOV, become the new 'before'
+        self.settings_sync = watch.SettingsSync(self.references)
+        self.watcher.start()
+
+        # Edits of storage.json apply without a restart
+        self.reloader = components["StorageReloader"]
+        self.reloader.start()
+
+        # Mirror of the offsets, only syncs if enabled
+        self.offsets_sync = components["OffsetsSync"]
+        self.offsets_sync.start()
+
+        # Changes get handled inside this thread
+        self.event_bus.subscribe(events.SettingsChanged, self.on_settings_changed, dispatch=self.call_soon)
+        self.event_bus.subscribe(events.KeysChanged, self.on_keys_changed, dispatch=self.call_soon)
+        self.event_bus.subscribe(events.Attached, self.on_attached, dispatch=self.call_soon)
 
     def at_end(self):
         """ Gets called after the loop
         """
+        if self.discovery:
+            self.discovery.stop()
+
+        if self.liveness:
+            self.liveness.stop()
+
+        if self.executor:
+            self.executor.shutdown()
+
+        if self.watcher:
+            self.watcher.stop()
+
+        if self.reloader:
+            self.reloader.stop()
+
+        if self.offsets_sync:
+            self.offsets_sync.stop()
+
         logger.info("- ProcessingThread")
 
-    @thread.Thread.schedule(seconds=1)
-    def update_storage_file(self):
-        """ Update storage file
+    def on_settings_changed(self, event: events.SettingsChanged):
+        """ Update storage file, on the worker pool
+        :param event: (SettingsChanged) the event
         """
-        if self.storage.edited:
-            self.storage.update_file()
-
-            with self.storage.edited_lock:
-                self.storage.edited = False
+        # Edits made while saving get saved right after
+        self.offload_latest(self.storage.update_file, timeout=self.OPERATION_TIMEOUT)
 
-    @thread.Thread.schedule(seconds=1)
-    def update_listener_keys(self):
-        """ Update listener keys
+    def on_keys_changed(self, event: events.KeysChanged):
+        """ Update listener keys, on the worker pool
+        :param event: (KeysChanged) the event
         """
-        if self.storage.listener_keys_edited:
-            if self.listener:
-                self.listener.register_keys()
+        if self.listener:
+            self.offload_latest(self.listener.register_keys, timeout=self.OPERATION_TIMEOUT)
 
-            with self.storage.listener_keys_edited_lock:
-                self.storage.listener_keys_edited = False
+    def on_attached(self, event: events.Attached):
+        """ Show it in the rich presence right away
+        :param event: (Attached) the event
+        """
+        self.queue.append({"cmd": "update_rich_presence", "params": [], "kwargs": {}})
 
     @thread.Thread.schedule(seconds=15)
-    def update_rich_presence(self):
-        """ Update rich presence
+    async def update_rich_presence(self):
+        """ Update rich presence, without blocking the loop
+        """
+        async with self.presence_lock:
+            try:
+                await asyncio.wait_for(self.rich_presence(), self.OPERATION_TIMEOUT)
+
+            except TimeoutError:
+                logger.info("- Updating the rich presence timed out")
+
+    async def rich_presence(self):
+        """ Update rich presence, reads of the memory run in worker threads
         """
         # Features created
         if self.storage.features:
             # Feature enabled?
             if self.storage.features["3"]["enabled"]:
-                if "3" in self.gateway.status and not self.gateway.status["3"]:
-                    self.gateway.status["3"] = self.gateway.server_address_check(log=False)
+                # Not attached, so there is nothing to read, see game_exit()
+                if not self.gateway.process_handle:
+                    await self.discord.update(False, None, None)
+
+                elif "3" in self.gateway.status and not self.gateway.status["3"]:
+                    self.gateway.status["3"] = await asyncio.to_thread(self.gateway.server_address_check, log=False)
 
                     # Update ui
-                    self.references["RootThread"].queue.append(
-                        {"cmd": "render_status", "params": [self.gateway.status], "kwargs": {}})
+                    self.event_bus.publish(events.StatusChanged(dict(self.gateway.status)))
 
                     # Because it can be, that it wasn't updated once
                     if not self.gateway.status["3"]:
-                        self.discord.update(bool(self.gateway.process_handle), None,
-                                            self.gateway.current_mc_version)
+                        await self.discord.update(bool(self.gateway.process_handle), None,
+                                                  self.gateway.current_mc_version)
 
                 else:
                     # Can show server?
                     if self.storage.features["3"]["available"]:
-                        self.discord.update(bool(self.gateway.process_handle), self.gateway.get_server(),
-                                            self.gateway.current_mc_version)
+                        server = await asyncio.to_thread(self.gateway.get_server)
+                        await self.discord.update(bool(self.gateway.process_handle), server,
+                                                  self.gateway.current_mc_version)
 
                     else:
-                        self.discord.update(bool(self.gateway.process_handle), None,
-                                            self.gateway.current_mc_version)
+                        await self.discord.update(bool(self.gateway.process_handle), None,
+                                                  self.gateway.current_mc_version)
+
+    def attach(self):
+        """ Attach, if not attached already, e.g. for auto attaching
+        """
+        if self.gateway.process_handle:
+            return
+
+        # Already attaching, discovery keeps an eye on it
+        if self.offload(self.attach_or_detach, key="attach", timeout=self.ATTACH_TIMEOUT,
+                        callback=self.auto_attach_done) is None:
+            self.discovery.retry()
+
+    def auto_attach_done(self, operation: thread.Operation):
+        """ Attaching of discovery has finished, if it failed (e.g. cooldown or no offsets), discovery tries again
+        :param operation: (Operation) the operation of attach_or_detach()
+        """
+        try:
+            self.attach_done(operation)
+
+        finally:
+            if self.auto_discover and not self.gateway.process_handle:
+                self.discovery.retry()
+
+    def discover(self):
+        """ Attach as soon as Minecraft is running, see discovery.Discovery
+        """
+        self.auto_discover = True
+
+        if not self.gateway.process_handle:
+            self.discovery.resume()
+
+    def game_exit(self, process_id: int):
+        """ A watched instance of Minecraft exited, see liveness.LivenessMonitor
+        :param process_id: (int) its process id
+        """
+        # Attaching touches the same things, so after it
+        if self.pending("attach"):
+            self.queue.append({"cmd": "game_exit", "params": [process_id], "kwargs": {}})
+            return
+
+        # Another instance
+        if process_id in self.pool.gateways:
+            self.pool.detach(process_id)
+            self.gateway.status_check()
+            return
+
+        # Could be closed already, e.g. by a failed write of the listener
+        if self.gateway.process_handle and process_id == self.gateway.memory.process_id:
+            logger.info("Minecraft was closed!")
+
+            if self.listener:
+                self.listener.stop()
+
+            self.liveness.unwatch_all()
+            self.pool.detach_all()
+            self.gateway.close_process()
+            self.gateway.clear_addresses()
+            self.gateway.status_check()
+
+            self.references["Frontend"].alert("Minecraft was closed!", warning=True)
+            self.event_bus.publish(events.Attached(False))
+
+        # Attach again, once it gets restarted
+        if self.auto_discover and not self.gateway.process_handle:
+            self.discovery.resume()
 
     def start_button_handle(self, e):
+        """ Starts or stops gateway on the worker pool, the processing thread keeps saving etc. meanwhile
+        :param e: tkinter event
+        """
+        self.offload(self.attach_or_detach, key="attach", timeout=self.ATTACH_TIMEOUT, callback=self.attach_done)
+
+    def attach_done(self, operation: thread.Operation):
+        """ Attaching or detaching has finished
+        :param operation: (Operation) the operation of attach_or_detach()
+        """
+        try:
+            operation.result()
+
+        # It keeps running, but the user should know why nothing happens
+        except TimeoutError:
+            logger.info("Attaching takes longer than expected!")
+            self.references["Frontend"].alert("Attaching takes longer than expected!", warning=True)
+
+    def end_attach(self, attached: bool, cooldown: int):
+        """ Attaching or detaching has finished
+        :param attached: (bool) if attached now
+        :param cooldown: (int) milliseconds until the next attach
+        """
+        self.references["Frontend"].end_attach(attached, cooldown)
+        self.event_bus.publish(events.Attached(attached))
+
+    def attach_or_detach(self):
         """ Starts or stops gateway and checks version
             cooldown of 10s
-            Note: gets executed inside the processing thread
-        :param e: tkinter event
+            Note: gets executed inside a worker of the processing thread
         """
-        root = self.references["Root"]
-        button = root.start_button
+        # Heavy import, only needed once attaching
+        from src.processing import listener
+
+        frontend = self.references["Frontend"]
+        cooldown = self.storage.get("settings")["attach_cooldown"]
 
         # Cooldown
-        if button["state"] == "disabled":
+        if not frontend.begin_attach():
             return
 
-        button.configure(state="disabled")
-        root.config(cursor="wait")
-
         try:
             # Attach
-            if (var := root.start_button_var).get() == "Start":
+            if not self.gateway.process_handle:
 
                 # Will get called at end
                 def callback():
@@ -154,25 +338,33 @@ class ProcessingThread(thread.Thread):
                         # Get addresses
                         self.gateway.get_addresses()
 
+                        # Other instances of the game
+                        if self.storage.settings["multi_instance"]:
+                            self.pool.attach_all()
+
+                        # Notice instantly when they get closed
+                        for process_id in [self.gateway.memory.process_id, *self.pool.gateways]:
+                            self.liveness.watch(process_id)
+
+                        # Keep the settings in sync with the game
+                        self.settings_sync.subscribe_all()
+
                         # Set up and start listener
                         self.listener = listener.Listener(self.references)
                         self.listener.register_keys()
                         self.listener.start()
 
                         # Change start and tray button
-                        self.references["SystemTray"].states["Enabled"] = True
-                        self.references["SystemTray"].tray.update_menu()
-                        root.start_button_var.set("■ Stop")
+                        self.end_attach(True, cooldown)
 
-                        # Cooldown, need to copy
-                        root.after(self.storage.get("settings")["attach_cooldown"],
-                                   (lambda: button.configure(state="active")))
-                        root.config(cursor="arrow")
-
-                    except (pymem.exception.ProcessNotFound, pymem.exception.WinAPIError,
-                            pymem.exception.CouldNotOpenProcess) as e:
+                    except exceptions.GatewayError as e:
                         logger.info(f"Minecraft not found! {e}")
-                        ui.queue_alert_message(self.references, "Minecraft not found!", warning=True)
+                        frontend.alert("Minecraft not found!", warning=True)
+
+                        self.pool.detach_all()
+                        self.gateway.close_process()
+                        self.gateway.status_check()
+                        self.end_attach(False, cooldown)
 
                 self.gateway.open_process_from_name("Minecraft.Windows.exe")
                 self.gateway.status_check()
@@ -185,399 +377,39 @@ class ProcessingThread(thread.Thread):
 
                     # Fetch features, if it succeeded
                     if self.network.fetch_features(self.gateway.current_mc_version):
-                        print("Create")
                         # Create if it isn't already created
-                        self.references["RootThread"].queue.append(
-                            {"cmd": "create_tab_features", "params": [self.storage.features], "kwargs": {},
-                             "callback": lambda t: callback()})
-
-                        return
+                        frontend.create_tab_features(self.storage.features, callback)
 
                     # If something went wrong, error got displayed inside .fetch_features
                     else:
                         self.gateway.close_process()
                         self.gateway.status_check()
 
-                        root.start_button_var.set("Start")
-                        root.after(10, (lambda: button.configure(state="active")))
-                        root.config(cursor="arrow")
+                        self.end_attach(False, 10)
 
-                        return
+                    return
 
                 # Do stuff
                 callback()
 
             # Detach
-            elif var.get() == "■ Stop":
+            else:
+                self.liveness.unwatch_all()
+                self.pool.detach_all()
                 self.gateway.close_process()
                 self.gateway.status_check()
                 logger.info("Detached from Minecraft!")
 
                 # Stop listener
-                self.listener.stop()
+                if self.listener:
+                    self.listener.stop()
 
                 # Change start button + tray's enabled button
-                self.references["SystemTray"].states["Enabled"] = False
-                self.references["SystemTray"].tray.update_menu()
-                root.start_button_var.set("Start")
+                self.end_attach(False, cooldown)
 
-        except (pymem.exception.ProcessNotFound, pymem.exception.WinAPIError, pymem.exception.CouldNotOpenProcess) as e:
+        except exceptions.GatewayError as e:
             logger.info(f"Minecraft not found! {e}")
-            ui.queue_alert_message(self.references, "Minecraft not found!", warning=True)
-
-        # Cooldown
-        root.after(self.storage.get("settings")["attach_cooldown"], (lambda: button.configure(state="active")))
-        root.config(cursor="arrow")
-
-
-class Gateway(pymem.Pymem):
-    """ The 'Gateway' to mc, it handles the memory editing
-    """
-
-    def __init__(self, references: dict):
-        """ Handles memory thanks to pymem, especially their discord helps a lot
-        :param references: the references
-        """
-        super().__init__()
-        self.references = references
-
-        # Data components
-        self.storage = references["Storage"]
-        self.status = {
-            "Connected": False,
-            "Version": None,
-        }
-
-        # I just dont want to add strings every 20secs
-        self.valid_domain_letters = set(string.ascii_letters + string.digits + "-.")
-        self.fallback_server_address = None
-
-        self.current_mc_version = None
-
-        # Finish
-        self.references.update({"Gateway": self})
-        logger.info("+ Gateway")
-
-    def get_address(self, feature_id: str, *, log=True):
-        """ Get one address
-        :param feature_id: the id of the following feature
-        :param log: if to log getting the address
-        """
-        feature = self.storage.features[feature_id]
-        presets = self.storage.features.presets[feature_id]
-        addresses = self.storage.features.addresses
-        offset_outer = feature["offsets"]
-
-        try:
-            # If only one offset, so prepare list
-            if presets["o_count"] == 1 or not isinstance(offset_outer, list):
-                offset_outer = [offset_outer]
-
-            addresses.update({feature_id: []})
-
-            for i, offs in enumerate(offset_outer):
-                # Find the address
-                temp = RemotePointer(self.process_handle, self.process_base.lpBaseOfDll + offs[0])
-
-                for offset in offs[1:-1]:
-                    temp = RemotePointer(self.process_handle, temp.value + offset)
-
-                # Add it
-                addresses[feature_id].append(temp.value + offs[-1])
-
-                if log:
-                    logger.info(
-                        f"+ Found {i}. address for {feature['name']} [{hex(self.storage.features.addresses[feature_id][i])}]!")
-
-            status = True
-
-        except pymem.exception.MemoryReadError:
-            status = False
-
-            if log:
-                logger.info(f"- No address for {feature['name']}!")
-
-        self.status.update({
-            feature_id: status
-        })
-
-    def get_addresses(self):
-        """ Get the features from the pointers
-        """
-
-        def inner(_done: set, _feature_id: str, _feature_value: dict):
-            """ Handle a feature, separate method to avoid duplicates
-            :param _done: (set) keeping track list
-            :param _feature_id: (str) the id of the feature
-            :param _feature_value: (dict) the value of the feature
-            """
-            # It should be the original + available
-            if _feature_id not in _done:
-                if _feature_value["available"]:
-                    # Use the pointer
-                    self.get_address(_feature_id)
-
-                    # Get addresses for NoneTypes in feature settings values
-                    # Only for listener compatible features
-                    if self.storage.features.presets[_feature_id]["g"].listener:
-                        for _key, _value in _feature_value["settings"].items():
-                            if not _value or _value == " ":
-                                _feature_value["settings"][_key] = (new_value := str(self.read_address(_feature_id)))
-                                self.storage.features.tk_vars[_feature_id]["settings"][_key].set(new_value)
-
-                    # Keep track
-                    _done.add(_feature_id)
-
-                else:
-                    self.status.update({
-                        _feature_id: None
-                    })
-
-        done = set()
-        for feature_id, value in self.storage.features.data.items():
-
-            # Parse parent
-            inner(done, feature_id, value)
-
-            if value["children"]:
-                for child_key in value["children"]:
-                    # Parse child
-                    inner(done, child_key, self.storage.features[child_key])
-
-        # Finally, check all again and update storage file
-        self.status_check()
-        self.storage.update_file()
-
-    def read_address(self, feature_id: str, *, index: int = 0):
-        """ Read a address based on its feature id
-            Also decodes the new value
-        :param feature_id: (str) id of the feature requested
-        :param index: (int) which address should be used (1 feature can have multiple offsets)
-        """
-        if feature_id in self.storage.features.addresses:
-            presets = self.storage.features.presets[feature_id]
-
-            # Read and cast
-            value = getattr(self, f"read_{presets['a_type']}")(self.storage.features.addresses[feature_id][index],
-                                                               **(presets["a_args"] if "a_args" in presets else {}))
-
-            # If it needs to be decoded
-            if "s_decode" in presets:
-                value = self.storage.features.presets[feature_id]["s_decode"](value)
-
-            return value
-
-    def write_address(self, feature_id: str, new, *, index: int = 0):
-        """ Read a address based on its feature id,
-            Also encodes the new value
-        :param feature_id: (str) id of the feature requested
-        :param new: the new value written
-        :param index: (int) which address should be used (1 feature can have multiple offsets)
-        """
-        if feature_id in self.storage.features.addresses:
-            presets = self.storage.features.presets[feature_id]
-
-            # Cast into right type
-            new = presets["s_type"](new)
-
-            # If it needs to be encoded
-            if "s_encode" in presets:
-                new = self.storage.features.presets[feature_id]["s_encode"](new)
-
-            # Write
-            return getattr(self, f"write_{presets['a_type']}")(self.storage.features.addresses[feature_id][index], new,
-                                                               **(presets["a_args"] if "a_args" in presets else {}))
-
-    def is_domain(self, domain: str) -> bool:
-        """ Tests if given domain is valid
-        :param domain: (str) the domain
-        """
-        if "." not in domain or not set(domain).issubset(self.valid_domain_letters):
-            return False
-
-        return True
-
-    def server_address_check(self, *, log=True):
-        """ Checks if the addresses for the discord rich presence are available
-        :param log: if to log messages
-        """
-        if "3" in self.storage.features.addresses:
-            if not self.process_handle:
-                return None
-
-            self.get_server()  # Load fallback address if needed
-
-            try:
-                # Server port
-                if self.read_int(self.storage.features.addresses["3"][1]) == 0:
-                    return None
-
-                # Server ip
-                if self.fallback_server_address:
-                    self.read_string(self.fallback_server_address, 253)
-
-                elif (address := self.storage.features.addresses["3"][0]) == 0:
-                    return None
-
-                else:
-                    self.read_string(address, 253)
-
-            # Something happened, but is not 100% sure
-            except (pymem.exception.MemoryReadError, UnicodeDecodeError, Exception, pymem.exception.ProcessError) as e:
-                if log:
-                    logger.info(f"- Discord is unavailable!")
-                return False
-
-            return True
-
-        # No address loaded
-        else:
-            return None
-
-    def get_fallback_server_address(self) -> int:
-        """ Returns the fallback address for the connected server
-        :returns: the address
-        """
-        a = self.read_uint(self.storage.features.addresses["3"][0])
-        b = self.read_uint(self.storage.features.addresses["3"][0] + 4)
-
-        return int(str(hex(b))[2:] + str(hex(a))[2:].zfill(8), 16)
-
-    def get_server(self):
-        """ Returns the currently connected server:port
-        :returns: the server or None
-        """
-        if "3" in self.storage.features.addresses:
-            try:
-                port = self.read_int(self.storage.features.addresses["3"][1])
-
-                # Zero means no server connected
-                if port == 0:
-                    return None
-
-                # Use fallback address if needed
-                if self.fallback_server_address:
-                    address = self.fallback_server_address
-
-                else:
-                    address = self.storage.features.addresses["3"][0]
-
-                # Means it wasn't connected the first time
-                # try to get address again
-                if address == 0:
-                    self.get_address("3", log=False)
-                    return None
-
-                server = self.read_string(address, 253)
-
-                # Check returned server domain
-                if not server or not self.is_domain(server):
-                    raise Exception
-
-                else:
-                    if port == 19132:
-                        return server
-                    else:
-                        return f"{server}:{port}"
-
-            # Need to read fallback value
-            # Sometimes, even this fallback value failes, however, again, sometimes, by joining another server, it works again?
-            except (pymem.exception.MemoryReadError, pymem.exception.WinAPIError, pymem.exception.ProcessError, UnicodeDecodeError, Exception):
-                try:
-                    # Reread port
-                    port = self.read_int(self.storage.features.addresses["3"][1])
-
-                    # If not done already, get fallback server address
-                    if not self.fallback_server_address:
-                        self.fallback_server_address = self.get_fallback_server_address()
-
-                    server = self.read_string(self.fallback_server_address, 253)
-
-                    if port == 19132:
-                        return server
-
-                    else:
-                        return f"{server}:{port}"
-
-                # Fallback failed, try to read orignial address again
-                except (pymem.exception.MemoryReadError, pymem.exception.WinAPIError, pymem.exception.ProcessError, UnicodeDecodeError, UnicodeDecodeError, Exception):
-                    # logger.info("Server fallback address failed!")
-                    self.fallback_server_address = None
-                    self.get_address("3", log=False)
-                    return None
-
-        return None
-
-    def status_check(self):
-        """ Checks all sort of things for the status
-        """
-        # Check if minecraft is open
-        self.status["Connected"] = bool(self.process_handle)
-
-        # Check the minecraft version
-        self.status["Version"] = bool(self.current_mc_version == self.storage.get("mc_version"))
-
-        if self.storage.features:
-            # Addresses
-            for addr_id, addr_value in {_id: _addr for _id, sublist in self.storage.features.addresses.items() for _addr
-                                        in sublist}.items():
-                feature = self.storage.features[addr_id]
-
-                try:
-                    # Not enabled or not available
-                    if not feature["enabled"] or not feature["available"] or not self.process_handle:
-                        status = None
-
-                    # Custom check
-                    elif "a_status_check" in self.storage.features.presets[addr_id]:
-                        status = self.storage.features.presets[addr_id]["a_status_check"](self)
-
-                    # Else just try to read
-                    else:
-                        self.read_address(addr_id)
-
-                        status = True
-
-                    self.status[addr_id] = status
-
-                except pymem.exception.MemoryReadError:
-                    logger.info(f"- {feature['name']} is unavailable!")
-                    self.status[addr_id] = False
-
-        # Update ui
-        self.references["RootThread"].queue.append(
-            {"cmd": "render_status", "params": [self.status], "kwargs": {}})
-
-    @staticmethod
-    def get_mc_version() -> str:
-        """ Get current mc version by using a powshell command
-        """
-        startupinfo = subprocess.STARTUPINFO()
-        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-
-        version = subprocess.check_output(
-            "powershell.exe Get-AppxPackage -name Microsoft.MinecraftUWP | select -expandproperty Version",
-            stdin=subprocess.PIPE, stderr=subprocess.PIPE, startupinfo=startupinfo)\
-            .decode("utf8").rstrip()
-
-        if version:
-            logger.info(f"Found MC Version '{version}'")
-
-            return version
-
-        else:
-            return ""
-
-    def check_version(self) -> bool:
-        """ Check mc version if new features are required
-        """
-        self.current_mc_version = self.get_mc_version()
-        saved_mc_version = self.storage.get("mc_version")
-
-        # When they aren't equal, update needed
-        if self.current_mc_version != saved_mc_version:
-            logger.info("Saved version doesn't match!")
-            return False
+            frontend.alert("Minecraft not found!", warning=True)
 
-        logger.info("Saved version ist correct!")
-        return True
+            # Cooldown
+            self.end_attach(False, cooldown)
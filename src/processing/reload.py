@@ -0,0 +1,283 @@
+"""
+Hot reload of storage.json, so that changes made with an editor or a script apply without a restart
+
+The directory of the file is watched with inotify on Linux, elsewhere the file gets polled.
+Writes of the application itself are recognized by the hash of their content and ignored.
+Only settings and the keys, enabled states and settings of known features get applied,
+everything else (new features, offsets, the api) needs a restart.
+"""
+
+import os
+import sys
+import json
+import time
+import select
+import struct
+import logging
+import threading
+
+from src import events
+from src.processing.storage import Features, Storage
+
+
+logger = logging.getLogger(__name__)
+
+
+class PollingWatch:
+    """ Notices changes of a file by its modification time and size
+    """
+
+    # Seconds between two checks
+    INTERVAL = 1.0
+
+    def __init__(self, path: str):
+        """ Initialize
+        :param path: (str) the file
+        """
+        self.path = path
+        self.last = self.stat()
+
+    def stat(self) -> tuple | None:
+        """ Modification time and size, None if the file doesn't exist
+        """
+        try:
+            result = os.stat(self.path)
+            return result.st_mtime_ns, result.st_size
+
+        except OSError:
+            return None
+
+    def wait(self, timeout: float) -> bool:
+        """ Wait for a change
+        :param timeout: (float) seconds
+        :returns: (bool) if the file changed
+        """
+        time.sleep(min(timeout, self.INTERVAL))
+
+        if (current := self.stat()) != self.last:
+            self.last = current
+            return True
+
+        return False
+
+    def close(self):
+        """ Nothing to release
+        """
+        pass
+
+
+class InotifyWatch:
+    """ Notices changes of a file with inotify, through ctypes
+        The directory is watched, because editors usually replace the file instead of writing into it
+    """
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_NONBLOCK = os.O_NONBLOCK if hasattr(os, "O_NONBLOCK") else 0
+
+    # struct inotify_event, followed by the name
+    EVENT = struct.Struct("iIII")
+
+    def __init__(self, path: str):
+        """ Initialize
+        :param path: (str) the file
+        :raises OSError: if inotify is unavailable
+        """
+        import ctypes
+        import ctypes.util
+
+        self.name = os.fsencode(os.path.basename(path))
+
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+
+        if (fd := libc.inotify_init1(self.IN_NONBLOCK)) < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        directory = os.fsencode(os.path.dirname(os.path.abspath(path)))
+
+        if libc.inotify_add_watch(fd, directory, self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE) < 0:
+            os.close(fd)
+            raise OSError(ctypes.get_errno(), "inotify_add_watch failed")
+
+        self.fd = fd
+
+    def wait(self, timeout: float) -> bool:
+        """ Wait for a change
+        :param timeout: (float) seconds
+        :returns: (bool) if the file changed
+        """
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return False
+
+        changed = False
+
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+
+            except BlockingIOError:
+                break
+
+            position = 0
+
+            while position < len(data):
+                _, mask, _, length = self.EVENT.unpack_from(data, position)
+                position += self.EVENT.size
+
+                if data[position:position + length].rstrip(b"\x00") == self.name:
+                    changed = True
+
+                position += length
+
+        return changed
+
+    def close(self):
+        """ Close the inotify instance
+        """
+        os.close(self.fd)
+
+
+class StorageReloader(threading.Thread):
+    """ Watches storage.json and hands external changes to the processing thread
+    """
+
+    # Seconds, so that stop() is noticed
+    TIMEOUT = 1.0
+
+    def __init__(self, references: dict):
+        """ Initialize
+        :param references: the references
+        """
+        super().__init__(name=self.__class__.__name__, daemon=True)
+        self.references = references
+        self.storage = references["Storage"]
+
+        self.watch = None
+
+        if sys.platform.startswith("linux"):
+            try:
+                self.watch = InotifyWatch(self.storage.STORAGE_PATH)
+
+            except (OSError, AttributeError) as e:
+                logger.info(f"- No inotify, polling the storage file instead: {e}")
+
+        if self.watch is None:
+            self.watch = PollingWatch(self.storage.STORAGE_PATH)
+
+        self.stopped = False
+
+        self.references.update({"StorageReloader": self})
+        logger.info("+ StorageReloader")
+
+    def stop(self):
+        """ Stop the thread, within TIMEOUT
+        """
+        self.stopped = True
+
+    def run(self) -> None:
+        """ Wait for changes
+        """
+        try:
+            while not self.stopped:
+                if self.watch.wait(self.TIMEOUT):
+                    self.check()
+
+        finally:
+            self.watch.close()
+
+    def check(self):
+        """ Read the file, external changes get applied inside the processing thread
+        """
+        if not self.storage.ready:
+            return
+
+        try:
+            with open(self.storage.STORAGE_PATH) as f:
+                text = f.read()
+
+        except OSError:
+            return
+
+        # Written by ourselves
+        if Storage.content_hash(text) == self.storage.file_hash:
+            return
+
+        try:
+            data = json.loads(text)
+
+        # Could be half written, the next write is noticed too
+        except json.JSONDecodeError as e:
+            logger.info(f"- Ignored invalid storage file: {e}")
+            return
+
+        if not isinstance(data, dict) or not self.storage.validate(data, Storage.STORAGE_TEMPLATE) or \
+                not isinstance(data["settings"], dict) or not isinstance(data["features"], dict):
+            logger.info("- Ignored invalid storage file: keys are missing")
+            return
+
+        self.storage.file_hash = Storage.content_hash(text)
+        self.references["ProcessingThread"].queue.append({"cmd": self.apply, "params": [data], "kwargs": {}})
+
+    def apply(self, data: dict):
+        """ Apply the changed settings and features, invalid ones are skipped
+        :param data: (dict) the parsed storage file
+        """
+        storage = self.storage
+        settings = storage.settings
+        changed_settings = []
+
+        for name, value in data["settings"].items():
+            if name not in settings.presets or settings.data.get(name) == value:
+                continue
+
+            try:
+                value = settings.parse(name, value)
+
+            except ValueError:
+                logger.info(f"- Ignored setting '{name}', it is a wrong type!")
+                continue
+
+            settings.data[name] = value
+            changed_settings.append(name)
+
+        changed_features = []
+        features = storage.features
+
+        for feature_id, value in data["features"].items():
+            if not features or feature_id not in features.data or not isinstance(value, dict):
+                logger.info(f"- Ignored feature '{feature_id}', new features need a restart!")
+                continue
+
+            feature = features[feature_id]
+            changes = {key: value[key] for key in ("key", "enabled", "settings")
+                       if key in value and key in feature and value[key] != feature[key]}
+
+            if not changes:
+                continue
+
+            if not isinstance(changes.get("key", ""), str) or not isinstance(changes.get("enabled", False), bool):
+                logger.info(f"- Ignored feature '{feature_id}', its key or enabled is a wrong type!")
+                continue
+
+            if "settings" in changes and (not isinstance(changes["settings"], dict) or
+                                          set(changes["settings"]) != set(feature["settings"]) or
+                                          not Features.check_settings(features, feature_id, changes)):
+                logger.info(f"- Ignored feature '{feature_id}', its settings are invalid!")
+                continue
+
+            feature.update(changes)
+            changed_features.append(feature_id)
+
+        if not changed_settings and not changed_features:
+            return
+
+        event_bus = self.references["EventBus"]
+
+        # The file keeps what was applied, in case anything was skipped
+        event_bus.publish(events.SettingsChanged(features=tuple(changed_features), settings=tuple(changed_settings),
+                                                 source=self))
+
+        # Bindings depend on the keys and on settings like toggle_zoom
+        event_bus.publish(events.KeysChanged())
+        logger.info(f"Reloaded storage file: {len(changed_settings)} settings, {len(changed_features)} features")
@@ -0,0 +1,288 @@
+"""
+Finds the offsets of the features locally with signatures (array of bytes with wildcards),
+so that new versions work before their offsets were added to the database
+
+The signatures are shipped in res/signatures.json, a signatures.json next to the executable replaces them.
+For every feature it contains a list just like its offsets,
+but every offset can also be a signature, which gets resolved inside the module of the game:
+```
+{
+    "0": {"offsets": [
+        {"pattern": "48 8B 05 ?? ?? ?? ?? 48 8B 88", "type": "rip", "at": 3, "next": 7},
+        16,
+        {"pattern": "F3 0F 10 81 ?? ?? ?? ?? F3 0F 11 45", "type": "value", "at": 4}
+    ]}
+}
+```
+'rip' is a rip relative address, the offset inside the module of (start of the match + next + disp32 at 'at'),
+'value' reads a little endian number at 'at' (optionally 'size' bytes, default 4), e.g. a member offset.
+Features with multiple offset lists (like Discord) use a list of such lists.
+"""
+
+import json
+import logging
+
+from src import exceptions
+from src.processing import storage
+
+
+logger = logging.getLogger(__name__)
+
+
+# The ones of the user first, then the shipped ones
+SIGNATURES_PATHS = (storage.find_file("res\\signatures.json"),
+                    storage.find_file("res\\signatures.json", meipass=True))
+
+
+def load_signatures(paths: tuple = SIGNATURES_PATHS) -> dict | None:
+    """ Load the signatures, from the first file that exists
+    :param paths: (tuple) the json files
+    :returns: (dict) the signatures or None if there are none
+    """
+    for path in paths:
+        try:
+            with open(path) as f:
+                signatures = json.load(f)
+
+        except FileNotFoundError:
+            continue
+
+        except json.JSONDecodeError:
+            logger.info("Invalid signatures file!")
+            return None
+
+        return signatures if isinstance(signatures, dict) else None
+
+    return None
+
+
+class Pattern:
+    """ A byte pattern with wildcards, e.g. '48 8B 05 ?? ?? ?? ??'
+        The longest run without wildcards (anchor) is searched with bytes.find(), which skips ahead in C,
+        only its matches get compared with the rest of the pattern
+    """
+
+    def __init__(self, text: str):
+        """ Initialize
+        :param text: (str) hex bytes separated by spaces, '?' or '??' for any byte
+        :raises ValueError: if it is invalid or only made of wildcards
+        """
+        self.text = text
+
+        values = [None if x.strip("?") == "" else int(x, 16) for x in text.split()]
+        self.length = len(values)
+
+        # Runs of known bytes as (offset, bytes)
+        self.segments = []
+        start = None
+
+        for i, value in enumerate(values + [None]):
+            if value is not None and start is None:
+                start = i
+
+            elif value is None and start is not None:
+                self.segments.append((start, bytes(values[start:i])))
+                start = None
+
+        if not self.segments:
+            raise ValueError(f"Pattern '{text}' has no known bytes!")
+
+        self.anchor_offset, self.anchor = max(self.segments, key=lambda x: len(x[1]))
+        self.others = [x for x in self.segments if x[0] != self.anchor_offset]
+
+    def __hash__(self):
+        return hash(self.text)
+
+    def __eq__(self, other):
+        return isinstance(other, Pattern) and self.text == other.text
+
+    def search(self, data: bytes, start: int = 0) -> int:
+        """ Find the first match
+        :param data: (bytes) the data
+        :param start: (int) index to start from
+        :returns: (int) index of the match or -1
+        """
+        i = data.find(self.anchor, start + self.anchor_offset)
+
+        while i != -1:
+            begin = i - self.anchor_offset
+
+            if begin + self.length > len(data):
+                return -1
+
+            if all(data[begin + offset:begin + offset + len(segment)] == segment for offset, segment in self.others):
+                return begin
+
+            i = data.find(self.anchor, i + 1)
+
+        return -1
+
+
+# Patterns parsed inside a worker process of the scan executor {text: Pattern}
+_patterns = {}
+
+
+def search_chunk(data: memoryview, address: int, end: int, texts: list) -> list:
+    """ Scan function for the executor (see executor.ScanExecutor), the first match of every pattern
+    :param data: (memoryview) the chunk
+    :param address: (int) its address
+    :param end: (int) see executor
+    :param texts: (list) the patterns as text
+    :returns: (list) (pattern text, address, matched bytes) of the matches
+    """
+    data = bytes(data)
+    found = []
+
+    for text in texts:
+        if (pattern := _patterns.get(text)) is None:
+            pattern = _patterns[text] = Pattern(text)
+
+        if (i := pattern.search(data)) != -1 and i < end:
+            found.append((text, address + i, data[i:i + pattern.length]))
+
+    return found
+
+
+class Scanner:
+    """ Scans the main module of the game, which gets read in large chunks
+        With a scan executor, the chunks get scanned on all cores
+    """
+
+    CHUNK_SIZE = 16 * 1024 * 1024
+
+    # If a chunk can't be read, it is read in blocks of this size instead, skipping unreadable ones
+    BLOCK_SIZE = 64 * 1024
+
+    def __init__(self, memory, executor=None):
+        """ Initialize
+        :param memory: (Memory) an opened memory
+        :param executor: (ScanExecutor) for a parallel scan
+        """
+        self.memory = memory
+        self.executor = executor
+
+    def read_chunks(self, overlap: int):
+        """ Read the module
+        :param overlap: (int) bytes every chunk overlaps with the next, so that no match gets cut
+        :returns: (generator) (offset inside the module, bytes)
+        """
+        size = self.memory.module_size
+        offset = 0
+
+        while offset < size:
+            length = min(self.CHUNK_SIZE + overlap, size - offset)
+
+            try:
+                yield offset, self.memory.read_bytes(self.memory.base_address + offset, length)
+
+            except exceptions.MemoryReadError:
+                for block in range(offset, offset + length, self.BLOCK_SIZE):
+                    try:
+                        yield block, self.memory.read_bytes(self.memory.base_address + block,
+                                                            min(self.BLOCK_SIZE + overlap, size - block))
+
+                    except exceptions.MemoryReadError:
+                        pass
+
+            offset += self.CHUNK_SIZE
+
+    def find(self, patterns: set) -> dict:
+        """ Find patterns inside the module, all of them in one pass
+        :param patterns: (set) the patterns
+        :returns: (dict) {pattern: (offset inside the module, matched bytes)} for the found ones
+        """
+        if self.executor is not None and patterns:
+            return self.find_parallel(patterns)
+
+        found = {}
+        remaining = set(patterns)
+
+        for offset, data in self.read_chunks(max((x.length for x in patterns), default=1) - 1):
+            for pattern in list(remaining):
+                if (i := pattern.search(data)) != -1:
+                    found[pattern] = (offset + i, data[i:i + pattern.length])
+                    remaining.discard(pattern)
+
+            if not remaining:
+                break
+
+        return found
+
+    def find_parallel(self, patterns: set) -> dict:
+        """ See find(), using the executor, waits for it
+        """
+        by_text = {x.text: x for x in patterns}
+        base = self.memory.base_address
+
+        job = self.executor.scan(self.memory, search_chunk, (list(by_text),), name="Signature scan",
+                                 regions=self.memory.readable_regions(base, base + self.memory.module_size),
+                                 overlap=max(x.length for x in patterns) - 1)
+
+        found = {}
+
+        # In order of the chunks, so the first match wins like in find()
+        for text, address, data in job.wait() or []:
+            found.setdefault(by_text[text], (address - base, data))
+
+        return found
+
+    @staticmethod
+    def resolve(signature: dict, match: tuple) -> int:
+        """ Get the offset a signature stands for
+        :param signature: (dict) the signature
+        :param match: (tuple) (offset inside the module, matched bytes)
+        :returns: (int) the offset
+        """
+        offset, data = match
+        at = signature["at"]
+
+        if signature["type"] == "rip":
+            return offset + signature["next"] + int.from_bytes(data[at:at + 4], "little", signed=True)
+
+        elif signature["type"] == "value":
+            return int.from_bytes(data[at:at + signature.get("size", 4)], "little")
+
+        raise ValueError(f"Unknown signature type '{signature['type']}'!")
+
+    def scan_features(self, signatures: dict, feature_ids) -> dict:
+        """ Find the offsets of all features
+        :param signatures: (dict) see the top of this module
+        :param feature_ids: all feature ids, ones without signatures are unavailable
+        :returns: (dict) the features just like the api returns them, see Features.from_server_response
+        """
+        patterns = {}
+
+        def chains(offsets: list) -> list:
+            """ The offset lists of a feature """
+            return offsets if offsets and isinstance(offsets[0], list) else [offsets]
+
+        # Every pattern only once
+        for feature in signatures.values():
+            for chain in chains(feature["offsets"]):
+                for offset in chain:
+                    if isinstance(offset, dict):
+                        patterns.setdefault(offset["pattern"], Pattern(offset["pattern"]))
+
+        found = self.find(set(patterns.values()))
+        features = {}
+
+        for feature_id in feature_ids:
+            if feature_id not in signatures:
+                features[feature_id] = {"a": False, "o": []}
+                continue
+
+            offsets = signatures[feature_id]["offsets"]
+
+            try:
+                resolved = [[x if isinstance(x, int) else self.resolve(x, found[patterns[x["pattern"]]]) for x in chain]
+                            for chain in chains(offsets)]
+
+            except KeyError:
+                logger.info(f"- No signature match for feature {feature_id}!")
+                features[feature_id] = {"a": False, "o": []}
+                continue
+
+            features[feature_id] = {"a": True, "o": resolved if isinstance(offsets[0], list) else resolved[0]}
+            logger.info(f"+ Found offsets for feature {feature_id} by signatures!")
+
+        return features
@@ -0,0 +1,282 @@
+"""
+Snapshots of the memory of the game, for comparing before and after a change and for offline analysis
+
+Every snapshot is a directory with the raw regions in one file (data.bin) and an index.json,
+which lists the regions and their position inside the file. The file gets memory mapped,
+so a snapshot of hundreds of MB doesn't need that much RAM, only the accessed pages get loaded.
+A snapshot is a read only Memory itself, so the value scanner and the pointer map work on it too.
+"""
+
+import os
+import json
+import time
+import logging
+import itertools
+
+from src import exceptions
+from src.processing import storage
+from src.processing.memory import Memory
+
+
+logger = logging.getLogger(__name__)
+
+
+class Snapshot(Memory):
+    """ A snapshot, loaded lazily: the data file gets mapped on the first read
+    """
+
+    DATA_NAME = "data.bin"
+    INDEX_NAME = "index.json"
+
+    def __init__(self, directory: str):
+        """ Initialize
+        :param directory: (str) directory of the snapshot
+        :raises FileNotFoundError: if there is no snapshot
+        """
+        super().__init__()
+        self.directory = directory
+        self.name = os.path.basename(os.path.normpath(directory))
+
+        with open(os.path.join(directory, self.INDEX_NAME)) as f:
+            self.index = json.load(f)
+
+        # [address, size, offset inside the data file] sorted by address
+        self.regions = [tuple(x) for x in self.index["regions"]]
+        self.data = None
+
+        # {address: (size, offset)}, for looking up whole regions
+        self.by_address = {address: (size, offset) for address, size, offset in self.regions}
+
+        # Like an opened process
+        self.process_handle = True
+        self.process_id = self.index["process_id"]
+        self.base_address = self.index["base_address"]
+        self.module_size = self.index["module_size"]
+
+    @property
+    def size(self) -> int:
+        """ Size of all regions
+        """
+        return sum(size for _, size, _ in self.regions)
+
+    def load(self):
+        """ Map the data file, if not done already
+        :returns: (memmap) the data
+        """
+        import numpy as np
+
+        if self.data is None:
+            self.data = np.memmap(os.path.join(self.directory, self.DATA_NAME), np.uint8, "r",
+                                  shape=(self.size,)) if self.size else np.empty(0, np.uint8)
+
+        return self.data
+
+    def view(self, address: int):
+        """ A region, without copying
+        :param address: (int) start address of the region
+        :returns: (ndarray) its bytes, uint8
+        :raises KeyError: if there is no such region
+        """
+        try:
+            size, offset = self.by_address[address]
+
+        except KeyError:
+            raise KeyError(f"No region at {hex(address)}!") from None
+
+        return self.load()[offset:offset + size]
+
+    def open_process_from_name(self, name: str):
+        """ See Memory, a snapshot is always opened
+        """
+        pass
+
+    def close_process(self):
+        """ See Memory, unmaps the data file
+        """
+        self.data = None
+
+    def get_version(self) -> str:
+        """ See Memory
+        """
+        return self.index["version"]
+
+    def readable_regions(self, start: int = 0, end: int = None) -> list:
+        """ See Memory
+        """
+        regions = []
+
+        for address, size, _ in self.regions:
+            region_start = max(address, start)
+            region_end = address + size if end is None else min(address + size, end)
+
+            if region_start < region_end:
+                regions.append((region_start, region_end - region_start))
+
+        return regions
+
+    def read_bytes(self, address: int, length: int) -> bytes:
+        """ See Memory
+        """
+        for start, size, offset in self.regions:
+            if start <= address and address + length <= start + size:
+                position = offset + address - start
+                return self.load()[position:position + length].tobytes()
+
+        raise exceptions.MemoryReadError(f"Could not read memory at: {address}, length: {length}")
+
+    def write_bytes(self, address: int, data: bytes):
+        """ See Memory
+        """
+        raise exceptions.MemoryWriteError(f"Snapshot '{self.name}' is read only")
+
+
+class SnapshotStore:
+    """ The snapshots inside a directory, one sub directory per snapshot
+    """
+
+    DIRECTORY = storage.find_file("snapshots\\")
+
+    # Regions get copied in chunks of this size
+    CHUNK_SIZE = 16 * 1024 * 1024
+
+    def __init__(self, directory: str = None):
+        """ Initialize
+        :param directory: (str) defaults to the snapshots directory next to the storage
+        """
+        self.directory = directory if directory is not None else self.DIRECTORY
+
+    def names(self) -> list:
+        """ Names of the stored snapshots, sorted (the default names sort by time)
+        """
+        if not os.path.isdir(self.directory):
+            return []
+
+        return sorted(x for x in os.listdir(self.directory)
+                      if os.path.isfile(os.path.join(self.directory, x, Snapshot.INDEX_NAME)))
+
+    def open(self, name: str) -> Snapshot:
+        """ Open a snapshot, its data gets mapped on the first read
+        :param name: (str) its name
+        :raises FileNotFoundError: if there is no such snapshot
+        """
+        return Snapshot(os.path.join(self.directory, name))
+
+    def take(self, memory, name: str = None, *, regions: list = None) -> Snapshot:
+        """ Dump regions of a process into a new snapshot
+        :param memory: (Memory) an opened memory, e.g. of the gateway
+        :param name: (str) defaults to the current time
+        :param regions: (list) (address, size) pairs, defaults to all readable regions
+        :returns: (Snapshot) the snapshot
+        :raises FileExistsError: if there is a snapshot with that name already
+        """
+        import numpy as np
+
+        if name is None:
+            name = now = time.strftime("%Y%m%d-%H%M%S")
+
+            # Taken within the same second
+            for i in itertools.count(2):
+                if not os.path.exists(os.path.join(self.directory, name)):
+                    break
+
+                name = f"{now}-{i}"
+
+        directory = os.path.join(self.directory, name)
+        os.makedirs(self.directory, exist_ok=True)
+
+        # Never over an existing one, it could still be mapped
+        try:
+            os.mkdir(directory)
+
+        except FileExistsError:
+            raise FileExistsError(f"Snapshot '{name}' exists already!") from None
+
+        regions = sorted(memory.readable_regions() if regions is None else regions)
+        index = []
+        offset = 0
+
+        for address, size in regions:
+            index.append((address, size, offset))
+            offset += size
+
+        if offset:
+            data = np.memmap(os.path.join(directory, Snapshot.DATA_NAME), np.uint8, "w+", shape=(offset,))
+
+            for address, size, position in index:
+                for chunk in range(0, size, self.CHUNK_SIZE):
+                    length = min(self.CHUNK_SIZE, size - chunk)
+
+                    try:
+                        data[position + chunk:position + chunk + length] = np.frombuffer(
+                            memory.read_bytes(address + chunk, length), np.uint8)
+
+                    # Unmapped in the meantime, stays zeroed
+                    except exceptions.MemoryReadError:
+                        pass
+
+            data.flush()
+            del data
+
+        else:
+            open(os.path.join(directory, Snapshot.DATA_NAME), "wb").close()
+
+        # The index comes last, so that a snapshot is only listed once complete
+        with open(os.path.join(directory, Snapshot.INDEX_NAME), "w") as f:
+            json.dump({
+                "version": memory.get_version(),
+                "process_id": memory.process_id,
+                "base_address": memory.base_address,
+                "module_size": memory.module_size,
+                "time": time.time(),
+                "regions": index
+            }, f)
+
+        logger.info(f"Took snapshot '{name}' of {len(index)} regions ({offset // 1024 // 1024} MB)")
+        return self.open(name)
+
+    def remove(self, name: str):
+        """ Remove a snapshot
+        :param name: (str) its name
+        """
+        directory = os.path.join(self.directory, name)
+
+        for file_name in (Snapshot.INDEX_NAME, Snapshot.DATA_NAME):
+            try:
+                os.remove(os.path.join(directory, file_name))
+
+            except FileNotFoundError:
+                pass
+
+        os.rmdir(directory)
+
+
+def diff(before: Snapshot, after: Snapshot, dtype: str = "<u4") -> list:
+    """ Compare the regions both snapshots contain, in chunks
+    :param before: (Snapshot) the first snapshot
+    :param after: (Snapshot) the second snapshot
+    :param dtype: (str) values get compared as this numpy dtype, aligned to its size
+    :returns: (list) (region address, byte offsets of the changed values as uint32) of the changed regions
+    """
+    import numpy as np
+
+    itemsize = np.dtype(dtype).itemsize
+    changed = []
+
+    for address, size, _ in before.regions:
+        if after.by_address.get(address, (None,))[0] != size:
+            continue
+
+        a, b = before.view(address), after.view(address)
+        offsets = []
+
+        for chunk in range(0, size - size % itemsize, SnapshotStore.CHUNK_SIZE):
+            end = min(chunk + SnapshotStore.CHUNK_SIZE, size - size % itemsize)
+
+            found = np.flatnonzero(a[chunk:end].view(dtype) != b[chunk:end].view(dtype))
+            if len(found):
+                offsets.append((found * itemsize + chunk).astype(np.uint32))
+
+        if offsets:
+            changed.append((address, np.concatenate(offsets)))
+
+    return changed
@@ -1,14 +1,13 @@
 import abc
 import builtins
+import hashlib
 import json
 import os
 import sys
 import logging
+import tempfile
 import threading
-import tkinter as tk
-import tkinter.ttk as ttk
 
-from src import ui
 from src.exceptions import MessageHandlingError
 
 
@@ -85,7 +84,7 @@ class Group:
 
     @staticmethod
     @abc.abstractmethod
-    def create_edit_button_widgets(manager, top: tk.Toplevel, feature_id: str, feature: dict, payload: dict):
+    def create_edit_button_widgets(manager, top: "tk.Toplevel", feature_id: str, feature: dict, payload: dict):
         """ Method for creating the widgets inside the edit-button-top-level
             Note: enable .edit_button
         :param manager: (FeatureEditManager) the top level manager obj
@@ -104,9 +103,13 @@ class ZoomGroup(Group):
     edit_button = True
 
     @staticmethod
-    def create_edit_button_widgets(manager, top: tk.Toplevel, feature_id: str, feature: dict, payload: dict):
+    def create_edit_button_widgets(manager, top: "tk.Toplevel", feature_id: str, feature: dict, payload: dict):
         """ See Group
         """
+        # Not at the top, so that the engine runs without tkinter (headless)
+        import tkinter as tk
+        import tkinter.ttk as ttk
+
         before = tk.StringVar()
         before.set(str(temp if (temp := feature["settings"]["before"]) is not None else ""))
 
@@ -150,10 +153,13 @@ class DiscordGroup(Group):
     edit_button = True
 
     @staticmethod
-    def create_edit_button_widgets(manager, top: tk.Toplevel, feature_id: str, feature: dict, payload: dict):
+    def create_edit_button_widgets(manager, top: "tk.Toplevel", feature_id: str, feature: dict, payload: dict):
         """ See Group
             Uses no payload and custom save method for discord
         """
+        import tkinter as tk
+        import tkinter.ttk as ttk
+
         show_server = tk.IntVar()
         show_server.set(temp if (temp := feature["settings"]["show_server"]) is not None else "")
 
@@ -398,7 +404,7 @@ class Features:
         :param saved_features: (dict) old saved features from eg old version
         :returns: (Features)
         """
-        new_features = Features(references)
+        new_features = cls(references)
 
         # Parse
         new_features.data = cls.parse_features(new_features, response_features, shorten_keys=True,
@@ -414,7 +420,7 @@ class Features:
         :param storage_features: (dict) the dictionary from the storage
         :returns: (Features)
         """
-        new_features = Features(references)
+        new_features = cls(references)
 
         # Parse
         new_features.data = cls.parse_features(new_features, storage_features, shorten_keys=False)
@@ -455,6 +461,46 @@ class Settings:
             "exit_all": {
                 "d": True,
                 "n": "Exit all"
+            },
+            "multi_instance": {
+                "d": False,
+                "n": "Attach to all instances?"
+            },
+            "focused_only": {
+                "d": False,
+                "n": "Only zoom focused instance?"
+            },
+            "toggle_zoom": {
+                "d": False,
+                "n": "Toggle zoom instead of holding?"
+            },
+            "scroll_zoom": {
+                "d": False,
+                "n": "Zoom further with the scroll wheel?"
+            },
+            "scroll_zoom_step": {
+                "d": 5.0,
+                "n": "Scroll zoom step"
+            },
+            "scroll_zoom_min": {
+                "d": 30.0,
+                "n": "Scroll zoom minimum FOV"
+            },
+            "scroll_zoom_max": {
+                "d": 110.0,
+                "n": "Scroll zoom maximum FOV"
+            },
+            "enforce_zoom": {
+                "d": False,
+                "n": "Rewrite zoom values the game changed?"
+            },
+            "enforce_rate": {
+                "d": 30,
+                "n": "Enforce rate (per second)"
+            },
+            "offsets_sync": {
+                "d": False,
+                "n": "Download the offsets of all versions?"
             }
             # "clear_features": {  # TODO part of the Features rewrite
             #     "d": lambda e: print("test"),  # If method, it is a "action button"
@@ -475,6 +521,27 @@ class Settings:
         """
         return {x: y for x, y in self.data.items() if not callable(y)}  # Only non action ones
 
+    def parse(self, name: str, value):
+        """ Check the value of a setting against the type of its default, whole numbers are fine for floats
+        :param name: (str) the setting name
+        :param value: the value, e.g. from the storage file
+        :raises ValueError: if the setting is unknown or the value is a wrong type
+        :returns: the value, a float for settings with a float default
+        """
+        if name not in self.presets:
+            raise ValueError(f"Unknown setting '{name}'!")
+
+        default = self.presets[name]["d"]
+
+        # Written by hand, e.g. 5 instead of 5.0
+        if isinstance(default, float) and isinstance(value, int) and not isinstance(value, bool):
+            return float(value)
+
+        if not isinstance(value, type(default)):
+            raise ValueError(f"Setting '{name}' is a wrong type!")
+
+        return value
+
     @classmethod
     def from_storage_file(cls, references: dict, storage):
         """ Creates a settings object from the storage file's data
@@ -489,19 +556,21 @@ class Settings:
 
         # Check settings
         for setting, value in storage.get("settings").items():
-            if setting in presets and isinstance(value, type(presets[setting]["d"])):
-                del presets[setting]
-
-                # Add it
-                new_settings.data.update({setting: value})
+            try:
+                value = new_settings.parse(setting, value)
 
             # Wrong setting
-            else:
-                ui.queue_quit_message(references, f"Invalid storage file! Setting '{setting}' is a wrong type or unknown!",
-                                      "Fatal Error")
+            except ValueError:
+                references["Frontend"].quit(f"Invalid storage file! Setting '{setting}' is a wrong type or unknown!",
+                                            "Fatal Error")
 
                 return None
 
+            del presets[setting]
+
+            # Add it
+            new_settings.data.update({setting: value})
+
         # Add missing settings
         for remaining_preset, value in presets.items():
             new_settings.data.update({remaining_preset: value["d"]})
@@ -509,6 +578,140 @@ class Settings:
         return new_settings
 
 
+class OffsetsCache:
+    """ Caches the offsets fetched from the api, as one {version_id}.json file per version
+        + a index.json to not have to list the directory
+    """
+
+    INDEX_NAME = "index.json"
+
+    def __init__(self, directory: str):
+        """ Initialize
+        :param directory: (str) the features directory
+        """
+        self.directory = directory
+
+        # {version_id: file name}
+        self.index = {}
+        self.lock = threading.Lock()
+
+        # {version_id: hash of the offsets}, filled on demand
+        self.hashes = {}
+
+    def __contains__(self, version_id: str) -> bool:
+        """ Magic operator for checking if a version is cached
+        :param version_id: (str) the version id, e.g. '11610201'
+        """
+        return version_id in self.index
+
+    def load_index(self):
+        """ Load the index, rebuild it from the directory if it is missing or broken
+        """
+        try:
+            with open(os.path.join(self.directory, self.INDEX_NAME)) as f:
+                index = json.load(f)
+
+            if not isinstance(index, dict):
+                raise ValueError()
+
+        except FileNotFoundError:
+            # Nothing was cached so far
+            if not os.path.isdir(self.directory):
+                index = {}
+
+            else:
+                index = {name[:-5]: name for name in os.listdir(self.directory)
+                         if name.endswith(".json") and name != self.INDEX_NAME}
+
+        except (json.JSONDecodeError, ValueError):
+            logger.info("Offsets cache index is invalid, rebuilding it!")
+            index = {name[:-5]: name for name in os.listdir(self.directory)
+                     if name.endswith(".json") and name != self.INDEX_NAME}
+
+        with self.lock:
+            self.index = index
+
+        logger.info(f"+ Offsets cache [{len(index)} versions]")
+
+    def get(self, version_id: str) -> str | None:
+        """ Get cached offsets
+        :param version_id: (str) the version id
+        :returns: (str) the offsets, just like the api returns them, or None
+        """
+        with self.lock:
+            name = self.index.get(version_id)
+
+        if not name:
+            return None
+
+        try:
+            with open(os.path.join(self.directory, name)) as f:
+                return json.load(f)["offsets"]
+
+        except (FileNotFoundError, json.JSONDecodeError, KeyError, TypeError):
+            logger.info(f"Cached offsets for '{version_id}' are invalid!")
+            return None
+
+    @staticmethod
+    def hash_offsets(offsets: str) -> str:
+        """ Hash of offsets, like the ones of the manifest of the api (see network.sync)
+        :param offsets: (str) the offsets, just like the api returns them
+        """
+        return hashlib.sha256(offsets.encode()).hexdigest()
+
+    def hash(self, version_id: str) -> str | None:
+        """ Hash of cached offsets
+        :param version_id: (str) the version id
+        :returns: (str) the hash or None if not cached
+        """
+        with self.lock:
+            if version_id in self.hashes:
+                return self.hashes[version_id]
+
+        if (offsets := self.get(version_id)) is None:
+            return None
+
+        with self.lock:
+            self.hashes[version_id] = (offsets_hash := self.hash_offsets(offsets))
+
+        return offsets_hash
+
+    def put(self, version_id: str, offsets: str):
+        """ Cache offsets, written to a temporary file first to never leave a half written file behind
+        :param version_id: (str) the version id
+        :param offsets: (str) the offsets, just like the api returns them
+        """
+        os.makedirs(self.directory, exist_ok=True)
+
+        name = f"{version_id}.json"
+        self.write_file(os.path.join(self.directory, name), {"version_id": version_id, "offsets": offsets})
+
+        # Locked while writing, e.g. the sync and an attach put at the same time, the last index has both
+        with self.lock:
+            self.index[version_id] = name
+            self.hashes[version_id] = self.hash_offsets(offsets)
+
+            self.write_file(os.path.join(self.directory, self.INDEX_NAME), self.index, indent=4)
+
+    @staticmethod
+    def write_file(path: str, data, **kwargs):
+        """ Write json to a temporary file of its own first, then replace the file
+        :param path: (str) path of the file
+        :param data: the data
+        :param kwargs: passed to json.dump()
+        """
+        with tempfile.NamedTemporaryFile("w", dir=os.path.dirname(path), suffix=".tmp", delete=False) as f:
+            try:
+                json.dump(data, f, **kwargs)
+
+            except Exception:
+                f.close()
+                os.remove(f.name)
+                raise
+
+        os.replace(f.name, path)
+
+
 class Storage:
     """ Interface to the storage.json file
     """
@@ -539,17 +742,15 @@ class Storage:
         self.features = None
         self.settings = None
 
-        # If the storage was changed frequently by a process
-        self.edited = False
-        self.edited_lock = threading.Lock()
-
-        # If the listener keys need to be updated
-        self.listener_keys_edited = False
-        self.listener_keys_edited_lock = threading.Lock()
-
         # If data can be already saved
         self.ready = False
 
+        # Hash of the content we read or wrote last, so that the reloader ignores our own writes
+        self.file_hash = None
+
+        # Saving happens on the workers of the processing thread too
+        self.file_lock = threading.Lock()
+
         # Load STORAGE_PATH file
         try:
             with open(self.STORAGE_PATH, "a+") as f:
@@ -557,9 +758,9 @@ class Storage:
                 f.seek(0)
 
                 # If is written read, else write default
-                if f.read() != "":
-                    f.seek(0)
-                    self.data = json.load(f)
+                if (text := f.read()) != "":
+                    self.data = json.loads(text)
+                    self.file_hash = self.content_hash(text)
 
                     # Validate
                     if not self.validate(self.data, self.STORAGE_TEMPLATE):
@@ -571,7 +772,7 @@ class Storage:
                     self.data = self.STORAGE_TEMPLATE
 
         except (json.JSONDecodeError, FileNotFoundError):
-            ui.queue_quit_message(self.references, "Invalid storage file! Please correct or delete it!", "Fatal Error")
+            self.references["Frontend"].quit("Invalid storage file! Please correct or delete it!", "Fatal Error")
 
             # Add to the references
             self.references.update({"Storage": self})
@@ -592,24 +793,29 @@ class Storage:
                 logger.info("Stored features were loaded!")
 
             except MessageHandlingError as e:
-                ui.queue_quit_message(self.references, f"Invalid storage file! {e.message}", "Fatal Error")
+                self.references["Frontend"].quit(f"Invalid storage file! {e.message}", "Fatal Error")
                 return
 
         # Settings: Start minimized
         if self.settings["start_minimized"]:
-            self.references["RootThread"].queue.append(
-                {"cmd": "hide", "params": [], "kwargs": {"not_exit_all": True}, "wait_for_render": True})
+            self.references["Frontend"].hide()
 
-        # Settings: Auto start
+        # Settings: Auto start, as soon as Minecraft is running
         if self.settings["auto_attach"]:
-            self.references["RootThread"].queue.append(
-                {"cmd": lambda: self.references["ProcessingThread"].queue.append(
-                    {"cmd": "start_button_handle", "params": [None], "kwargs": {}}
-                ), "params": [], "kwargs": {}, "wait_for_render": True})
+            self.references["Frontend"].after_render(lambda: self.references["ProcessingThread"].queue.append(
+                {"cmd": "discover", "params": [], "kwargs": {}}
+            ))
 
         self.ready = True
         logger.info("+ Storage")
 
+    @staticmethod
+    def content_hash(text: str) -> str:
+        """ Hash of the content of the storage file, see file_hash
+        :param text: (str) the content
+        """
+        return hashlib.sha256(text.encode()).hexdigest()
+
     def validate(self, given: dict, check: dict) -> bool:
         """ Validate the storage file (recursive)
         :param given: (dict) which is user entered
@@ -643,13 +849,17 @@ class Storage:
         """ Update file content
         """
         if self.data and self.ready:
-            # Save settings
-            if self.settings:
-                self.set("settings", self.settings.for_json)
+            with self.file_lock:
+                # Save settings
+                if self.settings:
+                    self.set("settings", self.settings.for_json)
 
-            if self.features:
-                self.set("features", self.features.for_json)
+                if self.features:
+                    self.set("features", self.features.for_json)
 
-            with open(self.STORAGE_PATH, "w+") as f:
-                f.seek(0)
-                json.dump(self.data, f, indent=4)
+                text = json.dumps(self.data, indent=4)
+                self.file_hash = self.content_hash(text)
+
+                with open(self.STORAGE_PATH, "w+") as f:
+                    f.seek(0)
+                    f.write(text)
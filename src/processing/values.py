@@ -0,0 +1,178 @@
+"""
+Finds the addresses of values, e.g. to check the FOV or sensitivity address of a new version
+
+The first scan compares every aligned value of the readable memory with a range,
+the next scans keep only the candidates that changed, stayed the same, ... after the value was changed in game:
+```
+values = ValueScanner(gateway.memory, references["ScanExecutor"])
+values.first_scan("float", 69.5, 70.5)  # The FOV slider shows 70, s_decode rounds
+values.next_scan("equal", 89.5, 90.5)  # After changing it to 90
+values.results()
+```
+Candidates are stored as arrays of uint32 indices per chunk, together with their last values,
+so that millions of them only need a few MB.
+"""
+
+import logging
+
+from src import exceptions
+from src.processing import executor
+
+
+logger = logging.getLogger(__name__)
+
+
+# The types of the feature presets (a_type) as numpy dtypes
+DTYPES = {
+    "int": "<i4",
+    "uint": "<u4",
+    "short": "<i2",
+    "ushort": "<u2",
+    "longlong": "<i8",
+    "ulonglong": "<u8",
+    "float": "<f4",
+    "double": "<f8"
+}
+
+
+def find_values(data: memoryview, address: int, end: int, dtype: str, low, high) -> list:
+    """ Scan function (see executor.ScanExecutor), finds the aligned values between low and high
+    :param data: (memoryview) the chunk
+    :param address: (int) its address
+    :param end: (int) see executor
+    :param dtype: (str) the numpy dtype
+    :param low: lowest value
+    :param high: highest value
+    :returns: (list) (address, indices, values) of the chunk, empty if nothing was found
+    """
+    import numpy as np
+
+    array = np.frombuffer(data, dtype, count=end // np.dtype(dtype).itemsize)
+    indices = np.flatnonzero((array >= low) & (array <= high)).astype(np.uint32)
+
+    return [(address, indices, array[indices])] if len(indices) else []
+
+
+class ValueScanner:
+    """ First scan + next scans over the memory of the game
+    """
+
+    CONDITIONS = ("changed", "unchanged", "increased", "decreased", "equal")
+
+    def __init__(self, memory, scan_executor=None):
+        """ Initialize
+        :param memory: (Memory) an opened memory
+        :param scan_executor: (ScanExecutor) for scanning the first time on all cores
+        """
+        self.memory = memory
+        self.executor = scan_executor
+
+        self.dtype = None
+
+        # (chunk address, indices, values) sorted by address
+        self.candidates = []
+
+    @property
+    def count(self) -> int:
+        """ Number of candidates
+        """
+        return sum(len(indices) for _, indices, _ in self.candidates)
+
+    def first_scan(self, a_type: str, low, high=None, *, regions: list = None) -> int:
+        """ Find all values between low and high
+        :param a_type: (str) type of the value, like the a_type of the feature presets
+        :param low: lowest value
+        :param high: highest value, defaults to low
+        :param regions: (list) (address, size) pairs, defaults to all readable regions
+        :returns: (int) number of candidates, 0 if cancelled
+        """
+        self.dtype = DTYPES[a_type]
+        high = low if high is None else high
+        regions = self.memory.readable_regions() if regions is None else regions
+
+        if self.executor is not None:
+            job = self.executor.scan(self.memory, find_values, (self.dtype, low, high), name="Value scan",
+                                     regions=regions)
+            self.candidates = job.wait() or []
+
+        else:
+            self.candidates = executor.scan_sequential(self.memory, find_values, (self.dtype, low, high),
+                                                       regions=regions)
+
+        logger.info(f"First scan found {self.count} candidates")
+        return self.count
+
+    def next_scan(self, condition: str, low=None, high=None) -> int:
+        """ Keep the candidates that fulfill a condition, compared with their values of the last scan
+        :param condition: (str) one of CONDITIONS, 'equal' compares with low and high
+        :param low: lowest value for 'equal'
+        :param high: highest value for 'equal', defaults to low
+        :returns: (int) number of candidates left
+        :raises ValueError: on an unknown condition or without a first scan
+        """
+        import numpy as np
+
+        if condition not in self.CONDITIONS:
+            raise ValueError(f"Unknown condition '{condition}'!")
+
+        if self.dtype is None:
+            raise ValueError("No first scan!")
+
+        high = low if high is None else high
+        itemsize = np.dtype(self.dtype).itemsize
+        candidates = []
+
+        for address, indices, values in self.candidates:
+            # Only the span containing the candidates
+            first, last = int(indices[0]), int(indices[-1])
+
+            try:
+                data = self.memory.read_bytes(address + first * itemsize, (last - first + 1) * itemsize)
+
+            # Unmapped in the meantime
+            except exceptions.MemoryReadError:
+                continue
+
+            current = np.frombuffer(data, self.dtype)[indices - first]
+
+            if condition == "changed":
+                mask = current != values
+
+            elif condition == "unchanged":
+                mask = current == values
+
+            elif condition == "increased":
+                mask = current > values
+
+            elif condition == "decreased":
+                mask = current < values
+
+            else:
+                mask = (current >= low) & (current <= high)
+
+            if mask.any():
+                candidates.append((address, indices[mask], current[mask]))
+
+        self.candidates = candidates
+
+        logger.info(f"Next scan left {self.count} candidates")
+        return self.count
+
+    def results(self, limit: int = 100) -> list:
+        """ The candidates
+        :param limit: (int) maximum number of results
+        :returns: (list) (address, value) pairs
+        """
+        import numpy as np
+
+        itemsize = np.dtype(self.dtype).itemsize if self.dtype else 0
+        results = []
+
+        for address, indices, values in self.candidates:
+            for index, value in zip(indices[:limit - len(results)].tolist(), values.tolist()):
+                results.append((address + index * itemsize, value))
+
+            if len(results) >= limit:
+                break
+
+        return results
@@ -0,0 +1,237 @@
+"""
+Watches the values of features, so that changes made inside the game are noticed
+
+Components subscribe to a feature (and the index of its address) and get called when its value changes.
+One thread polls all watched addresses at once, as raw bytes, so only changed values get decoded.
+It polls fast after a change and backs off while everything stays the same.
+"""
+
+import logging
+import threading
+
+from src import events, exceptions
+from src.processing.memory import Memory
+
+
+logger = logging.getLogger(__name__)
+
+
+class Watcher(threading.Thread):
+    """ Polls the watched addresses of the gateway
+    """
+
+    # Seconds between two polls, right after a change and at most
+    MIN_INTERVAL = 0.05
+    MAX_INTERVAL = 1.0
+
+    # Factor of the interval after a poll without changes
+    BACKOFF = 1.5
+
+    def __init__(self, references: dict):
+        """ Initialize
+        :param references: the references
+        """
+        super().__init__(name=self.__class__.__name__, daemon=True)
+        self.references = references
+        self.gateway = references["Gateway"]
+
+        # {(feature id, index): [callback]}
+        self.subscriptions = {}
+
+        # {(feature id, index): (address, raw bytes or None if unreadable)} of the last poll
+        self.last = {}
+
+        # {feature id: count} of the features that are written by us at the moment, e.g. while zooming
+        self.paused = {}
+
+        # Held while polling, so that pause() can wait for a running poll
+        self.lock = threading.Lock()
+
+        self.interval = self.MIN_INTERVAL
+        self.wake = threading.Event()
+        self.stopped = False
+
+        self.references.update({"Watcher": self})
+        logger.info("+ Watcher")
+
+    def subscribe(self, feature_id: str, callback, *, index: int = 0):
+        """ Get called on changes, with the feature id, the index and the decoded value (None if unreadable)
+        :param feature_id: (str) the feature
+        :param callback: the callback
+        :param index: (int) which address of the feature
+        """
+        with self.lock:
+            self.subscriptions.setdefault((feature_id, index), []).append(callback)
+
+        self.interval = self.MIN_INTERVAL
+        self.wake.set()
+
+    def unsubscribe(self, feature_id: str, callback, *, index: int = 0):
+        """ Don't get called anymore
+        :param feature_id: (str) the feature
+        :param callback: the subscribed callback
+        :param index: (int) which address of the feature
+        """
+        with self.lock:
+            if callback in (callbacks := self.subscriptions.get((feature_id, index), [])):
+                callbacks.remove(callback)
+
+            if not callbacks:
+                self.subscriptions.pop((feature_id, index), None)
+                self.last.pop((feature_id, index), None)
+
+    def pause(self, feature_ids: list):
+        """ Stop watching features while we write them, waits for a running poll
+        :param feature_ids: (list) the features
+        """
+        with self.lock:
+            for feature_id in feature_ids:
+                self.paused[feature_id] = self.paused.get(feature_id, 0) + 1
+
+    def resume(self, feature_ids: list):
+        """ Watch paused features again, compared to their value before the pause
+        :param feature_ids: (list) the features
+        """
+        with self.lock:
+            for feature_id in feature_ids:
+                if self.paused.get(feature_id, 0) > 1:
+                    self.paused[feature_id] -= 1
+
+                else:
+                    self.paused.pop(feature_id, None)
+
+    def stop(self):
+        """ Stop the thread
+        """
+        self.stopped = True
+        self.wake.set()
+
+    def poll(self) -> list:
+        """ Read all watched addresses once
+        :returns: (list) (feature id, index, value) of the changes
+        """
+        features = self.gateway.features
+
+        # Not attached, everything starts over once attached again
+        if not self.gateway.process_handle or not features:
+            self.last.clear()
+            self.paused.clear()
+            return []
+
+        items = []
+
+        for key in self.subscriptions:
+            feature_id, index = key
+            addresses = features.addresses.get(feature_id, [])
+            a_type = features.presets[feature_id]["a_type"]
+
+            # Strings have no fixed size
+            if feature_id not in self.paused and index < len(addresses) and a_type in Memory.FORMATS:
+                items.append((addresses[index], Memory.FORMATS[a_type].size, key))
+
+        changes = []
+
+        for address, length, values in Memory.group_reads(items):
+            try:
+                data = self.gateway.memory.read_bytes(address, length)
+
+            except exceptions.MemoryReadError:
+                data = None
+
+            for offset, size, key in values:
+                raw = data[offset:offset + size] if data is not None else None
+                last = self.last.get(key)
+                self.last[key] = (address + offset, raw)
+
+                # New addresses are only the start for comparing
+                if last is not None and last[0] == address + offset and last[1] != raw:
+                    changes.append((*key, raw if raw is None else self.decode(key[0], raw)))
+
+        return changes
+
+    def decode(self, feature_id: str, raw: bytes):
+        """ Decode a value, like Gateway.read_address()
+        :param feature_id: (str) the feature
+        :param raw: (bytes) the read bytes
+        :returns: the value
+        """
+        presets = self.gateway.features.presets[feature_id]
+        value = Memory.FORMATS[presets["a_type"]].unpack(raw)[0]
+
+        if "s_decode" in presets:
+            value = presets["s_decode"](value)
+
+        return value
+
+    def run(self) -> None:
+        """ Poll, faster after changes
+        """
+        while not self.stopped:
+            with self.lock:
+                changes = self.poll() if self.subscriptions else []
+
+                # Callbacks run inside the lock, a pause() afterwards doesn't get an old value
+                for feature_id, index, value in changes:
+                    for callback in list(self.subscriptions.get((feature_id, index), [])):
+                        try:
+                            callback(feature_id, index, value)
+
+                        except Exception:
+                            exceptions.handle_error(self.references)
+
+            self.interval = self.MIN_INTERVAL if changes else min(self.interval * self.BACKOFF, self.MAX_INTERVAL)
+
+            self.wake.wait(self.interval)
+            self.wake.clear()
+
+
+class SettingsSync:
+    """ Keeps the 'before' settings of the listener features equal to the values inside the game,
+        so that the zoom goes back to what the user set in the meantime, and the status up to date
+    """
+
+    def __init__(self, references: dict):
+        """ Initialize
+        :param references: the references
+        """
+        self.references = references
+        self.storage = references["Storage"]
+        self.gateway = references["Gateway"]
+        self.watcher = references["Watcher"]
+
+        self.subscribed = set()
+
+    def subscribe_all(self):
+        """ Watch every listener feature, e.g. after attaching with new features
+        """
+        features = self.storage.features
+
+        for feature_id in features.data:
+            if feature_id not in self.subscribed and features.presets[feature_id]["g"].listener:
+                self.watcher.subscribe(feature_id, self.on_change)
+                self.subscribed.add(feature_id)
+
+    def on_change(self, feature_id: str, index: int, value):
+        """ A watched value changed
+        :param feature_id: (str) the feature
+        :param index: (int) the index of the address
+        :param value: the new value, None if it became unreadable
+        """
+        # Became unreadable or readable again
+        if value is None or self.gateway.status.get(feature_id) is False:
+            self.gateway.status_check()
+
+            if value is None:
+                return
+
+        feature = self.storage.features[feature_id]
+        s_type = self.storage.features.presets[feature_id]["s_type"]
+
+        if feature["settings"]["before"] not in (None, "", " ") and \
+                s_type(feature["settings"]["before"]) == s_type(value):
+            return
+
+        feature["settings"]["before"] = (new_value := str(value))
+        self.references["EventBus"].publish(events.SettingsChanged(features=(feature_id,), source=self))
+
+        logger.info(f"{feature['name']} was changed inside the game [{new_value}]")
@@ -0,0 +1,169 @@
+"""
+Zooming with the scroll wheel while the zoom key is held (or toggled)
+
+Wheel ticks come in bursts of dozens per second, so they only change the target FOV,
+a writer thread writes the latest target at most once per frame. Values that were overtaken
+by newer ticks are never written.
+"""
+
+import math
+import time
+import logging
+import threading
+
+
+logger = logging.getLogger(__name__)
+
+
+class ScrollZoom(threading.Thread):
+    """ Coalesces the wheel ticks into writes of FOV and sensitivity
+    """
+
+    # Seconds between two writes
+    INTERVAL = 1 / 60
+
+    FOV = "0"
+    SENSITIVITY = "2"
+
+    def __init__(self, references: dict, write):
+        """ Initialize
+        :param references: the references
+        :param write: called with a list of (feature id, new value) pairs, see Listener.write
+        """
+        super().__init__(name=self.__class__.__name__, daemon=True)
+        self.references = references
+        self.storage = references["Storage"]
+
+        self.write = write
+
+        # While zooming, the current FOV and the features of the binding
+        self.active = False
+        self.fov = None
+        self.feature_ids = []
+
+        # The latest writes, None if written already
+        self.pending = None
+        self.lock = threading.Lock()
+
+        # Held while writing, so that deactivate() can wait for a running write
+        self.write_lock = threading.Lock()
+
+        self.wake = threading.Event()
+        self.stopped = False
+
+    def activate(self, feature_ids: list):
+        """ A zoom binding was activated, scrolling starts at its FOV
+        :param feature_ids: (list) the features of the binding
+        """
+        settings = self.storage.settings
+
+        if not settings["scroll_zoom"] or self.FOV not in feature_ids:
+            return
+
+        # Sensitivity is scaled by it
+        if not (fov := self.zoomed(self.FOV)):
+            logger.info("- Scroll zoom needs a zoomed FOV other than 0!")
+            return
+
+        with self.lock:
+            self.active = True
+            self.fov = fov
+            self.feature_ids = feature_ids
+
+        if not self.is_alive():
+            self.start()
+
+    def deactivate(self):
+        """ The zoom binding was released, waits for a running write so that it can't overwrite the reset
+            Inside the writer thread, e.g. if a write failed, it is the running write
+        """
+        if threading.current_thread() is self:
+            with self.lock:
+                self.active = False
+                self.pending = None
+
+            return
+
+        with self.write_lock, self.lock:
+            self.active = False
+            self.pending = None
+
+    def stop(self):
+        """ Stop the thread
+        """
+        self.deactivate()
+
+        self.stopped = True
+        self.wake.set()
+
+    def scroll(self, ticks: float):
+        """ The wheel was turned, positive zooms in
+        :param ticks: (float) number of ticks
+        """
+        settings = self.storage.settings
+
+        with self.lock:
+            if not self.active:
+                return
+
+            self.fov = min(max(self.fov - ticks * settings["scroll_zoom_step"], settings["scroll_zoom_min"]),
+                           settings["scroll_zoom_max"])
+            self.pending = self.writes(self.fov)
+
+        self.wake.set()
+
+    def zoomed(self, feature_id: str) -> float | None:
+        """ The zoomed value of a feature, its 'after' setting
+        :param feature_id: (str) the feature id
+        :returns: (float) the value, None if it isn't a finite number
+        """
+        try:
+            value = float(self.storage.features[feature_id]["settings"]["after"])
+
+        except (KeyError, TypeError, ValueError):
+            return None
+
+        return value if math.isfinite(value) else None
+
+    def writes(self, fov: float) -> list:
+        """ Writes for a FOV, the sensitivity is scaled like the FOV, starting from the zoomed ones
+        :param fov: (float) the FOV
+        :returns: (list) (feature id, new value) pairs
+        """
+        features = self.storage.features
+        writes = [(self.FOV, fov)] if features[self.FOV]["enabled"] else []
+
+        if self.SENSITIVITY in self.feature_ids and features[self.SENSITIVITY]["enabled"]:
+            after_fov = self.zoomed(self.FOV)
+            after_sensitivity = self.zoomed(self.SENSITIVITY)
+
+            # Could have been changed while zooming, the sensitivity stays as it is then
+            if after_fov and after_sensitivity is not None:
+                # The setting is the value of the slider, s_encode turns it into the value of the game
+                writes.append((self.SENSITIVITY, min(max(after_sensitivity * fov / after_fov, 0.0), 100.0)))
+
+        return writes
+
+    def run(self) -> None:
+        """ Write the latest target, at most once per interval
+        """
+        last = 0
+
+        while True:
+            self.wake.wait()
+            if self.stopped:
+                break
+
+            # Coalesce the ticks of this frame
+            if (remaining := last + self.INTERVAL - time.monotonic()) > 0:
+                time.sleep(remaining)
+
+            self.wake.clear()
+
+            with self.write_lock:
+                with self.lock:
+                    writes, self.pending = self.pending, None
+
+                if writes:
+                    self.write(writes)
+                    last = time.monotonic()
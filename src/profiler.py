@@ -0,0 +1,198 @@
+"""
+Opt-in profiling, so that we get real profiles from the frozen build on the affected machine
+
+Enabled with environment variables before starting FOV-Changer:
+```
+set FOV_CHANGER_PROFILE=1               # Sample the stacks of all threads
+set FOV_CHANGER_PROFILE_INTERVAL=5      # Optional, milliseconds between samples
+set FOV_CHANGER_TRACEMALLOC=60          # Optional, seconds between tracemalloc snapshots
+```
+
+Per thread (RootThread, ProcessingThread, Listener, QueueListener, ...) a collapsed-stack file
+'profile-<thread>.collapsed' is written next to log.txt, on exit or with "Dump Profile" from the tray menu.
+Those files can be opened with e.g. speedscope or flamegraph.pl.
+"""
+
+import os
+import sys
+import time
+import logging
+import threading
+import tracemalloc
+import collections
+
+
+logger = logging.getLogger(__name__)
+
+
+PROFILE_ENV = "FOV_CHANGER_PROFILE"
+INTERVAL_ENV = "FOV_CHANGER_PROFILE_INTERVAL"
+TRACEMALLOC_ENV = "FOV_CHANGER_TRACEMALLOC"
+
+
+class SamplingProfiler(threading.Thread):
+    """ Samples the stacks of all other threads in a fixed interval
+        Unlike cProfile, it works for every thread at once and has no overhead inside the sampled threads
+    """
+
+    def __init__(self, output_dir: str, interval: float, snapshot_interval: float | None):
+        """ Initialize
+        :param output_dir: (str) where to write the profiles
+        :param interval: (float) seconds between stack samples
+        :param snapshot_interval: (float) seconds between tracemalloc snapshots, None to disable
+        """
+        super().__init__(name="Profiler", daemon=True)
+
+        self.output_dir = output_dir
+        self.interval = interval
+        self.snapshot_interval = snapshot_interval
+
+        # {thread name: {(code, ...): count}}
+        self.samples = collections.defaultdict(collections.Counter)
+        self.samples_lock = threading.Lock()
+
+        # Thread ident -> name, refreshed when an unknown ident shows up
+        self.thread_names = {}
+
+        self.snapshot_count = 0
+        self.stop_event = threading.Event()
+
+    def refresh_thread_names(self):
+        """ Update the ident to name mapping
+        """
+        self.thread_names = {t.ident: t.name for t in threading.enumerate()}
+
+    def sample(self):
+        """ Take one sample of every thread's stack
+        """
+        frames = sys._current_frames()
+        own_ident = self.ident
+
+        with self.samples_lock:
+            for ident, frame in frames.items():
+                if ident == own_ident:
+                    continue
+
+                if ident not in self.thread_names:
+                    self.refresh_thread_names()
+
+                # Root first, just like the collapsed format wants it
+                stack = []
+                while frame is not None:
+                    stack.append(frame.f_code)
+                    frame = frame.f_back
+
+                self.samples[self.thread_names.get(ident, str(ident))][tuple(reversed(stack))] += 1
+
+    def take_snapshot(self):
+        """ Dump a tracemalloc snapshot, load it again with tracemalloc.Snapshot.load()
+        """
+        path = os.path.join(self.output_dir, f"tracemalloc-{self.snapshot_count}.snapshot")
+        tracemalloc.take_snapshot().dump(path)
+
+        current, peak = tracemalloc.get_traced_memory()
+        logger.debug(f"Tracemalloc snapshot {self.snapshot_count} [current={current >> 10} KiB, peak={peak >> 10} KiB]")
+
+        self.snapshot_count += 1
+
+    def run(self) -> None:
+        """ Sample until stopped
+        """
+        next_snapshot = time.perf_counter() + self.snapshot_interval if self.snapshot_interval else None
+
+        while not self.stop_event.wait(self.interval):
+            self.sample()
+
+            if next_snapshot and time.perf_counter() >= next_snapshot:
+                self.take_snapshot()
+                next_snapshot += self.snapshot_interval
+
+    @staticmethod
+    def format_code(code) -> str:
+        """ Format a code object as a single frame of a collapsed stack
+        :param code: the code object
+        :returns: (str) 'function (file:line)'
+        """
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ":")
+
+    def dump(self):
+        """ Write the collapsed-stack files, can be called at any time
+        """
+        with self.samples_lock:
+            samples = {name: counter.copy() for name, counter in self.samples.items()}
+
+        for thread_name, counter in samples.items():
+            path = os.path.join(self.output_dir, f"profile-{thread_name}.collapsed".replace(" ", "_"))
+
+            with open(path, "w", encoding="utf-8") as f:
+                for stack, count in counter.most_common():
+                    f.write(f"{';'.join(self.format_code(code) for code in stack)} {count}\n")
+
+        logger.info(f"Dumped profiles of {len(samples)} threads to '{self.output_dir}'")
+
+        if self.snapshot_interval:
+            self.take_snapshot()
+
+
+# The running profiler, if enabled
+profiler: SamplingProfiler | None = None
+
+
+def is_profiling() -> bool:
+    """ If profiling was enabled by the environment variables
+    """
+    return profiler is not None
+
+
+def start_profiling():
+    """ Start profiling if enabled via FOV_CHANGER_PROFILE, requires logging to be started
+    """
+    global profiler
+
+    if os.environ.get(PROFILE_ENV, "").lower() not in ("1", "true", "yes", "on"):
+        return
+
+    # Next to log.txt
+    output_dir = os.path.dirname(logging.getHandlerByName("file").baseFilename)
+
+    try:
+        interval = float(os.environ.get(INTERVAL_ENV, 5)) / 1000
+        snapshot_interval = float(os.environ[TRACEMALLOC_ENV]) if TRACEMALLOC_ENV in os.environ else None
+
+    except ValueError:
+        logger.warning("Invalid profiling environment variables, not profiling!")
+        return
+
+    if snapshot_interval:
+        tracemalloc.start(25)
+
+    profiler = SamplingProfiler(output_dir, interval, snapshot_interval)
+    profiler.start()
+
+    logger.info(f"+ Profiler [interval={interval * 1000:g} ms, tracemalloc={snapshot_interval}]")
+
+
+def dump_profile():
+    """ Write the current profiles next to log.txt, e.g. from the tray menu
+    """
+    if profiler:
+        profiler.dump()
+
+
+def stop_profiling():
+    """ Stop the profiler and write the profiles, call before stop_logging()
+    """
+    global profiler
+
+    if not profiler:
+        return
+
+    profiler.stop_event.set()
+    profiler.join()
+    profiler.dump()
+
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+    profiler = None
+    logger.info("- Profiler")
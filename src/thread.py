@@ -1,35 +1,164 @@
 """ Threads, own file because of circular imports ._."""
 
+import asyncio
+import inspect
 import threading
-import time
 import types
+import logging
+import functools
+import concurrent.futures
 
 from src import exceptions
 
 
+logger = logging.getLogger(__name__)
+
+
+class Operation:
+    """ A blocking call running on the worker pool of a thread, see Thread.offload()
+    """
+
+    def __init__(self, future: concurrent.futures.Future, key: str, callback):
+        """ Initialize
+        :param future: (Future) the future of the call
+        :param key: (str) only one operation per key runs at once
+        :param callback: called with the operation inside the thread, once it is done
+        """
+        self.future = future
+        self.key = key
+        self.callback = callback
+
+        # Handle of the timeout, see Thread.offload()
+        self.timer = None
+
+        self.timed_out = False
+        self.cancelled = False
+
+    def cancel(self):
+        """ Cancel it, a call that is running already can't be interrupted, only its result gets discarded
+        """
+        self.cancelled = True
+        self.future.cancel()
+
+    def result(self):
+        """ The result of the call
+        :raises TimeoutError: if it timed out
+        :raises CancelledError: if it got cancelled
+        :raises: the exception of the call
+        """
+        if self.timed_out:
+            raise TimeoutError(f"Operation '{self.key}' timed out!")
+
+        if self.cancelled:
+            raise concurrent.futures.CancelledError()
+
+        return self.future.result()
+
+
+class TaskQueue:
+    """ Queued tasks of a thread, can be added from any thread
+        They are handed to the event loop of the thread, tasks added before it runs wait until it does
+    """
+
+    def __init__(self, execute):
+        """ Initialize
+        :param execute: called with each task inside the event loop
+        """
+        self.execute = execute
+
+        self.loop = None
+        self.buffer = []
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """ Number of tasks waiting for the loop
+        """
+        return len(self.buffer)
+
+    def append(self, task: dict):
+        """ Add a task
+        :param task: (dict) {"cmd": name of a method or a callable, "params": [], "kwargs": {}, "callback": optional}
+        """
+        with self.lock:
+            if self.loop is None:
+                self.buffer.append(task)
+                return
+
+            # Closed already, nothing executes it anymore
+            try:
+                self.loop.call_soon_threadsafe(self.execute, task)
+
+            except RuntimeError:
+                pass
+
+    def extend(self, tasks):
+        """ Add some tasks
+        :param tasks: the tasks
+        """
+        for task in tasks:
+            self.append(task)
+
+    def bind(self, loop: asyncio.AbstractEventLoop):
+        """ The loop runs, hand it the waiting tasks
+        :param loop: the event loop of the thread
+        """
+        with self.lock:
+            self.loop = loop
+
+            for task in self.buffer:
+                loop.call_soon(self.execute, task)
+
+            self.buffer.clear()
+
+    def unbind(self):
+        """ The loop has stopped
+        """
+        with self.lock:
+            self.loop = None
+
+
 class Thread(threading.Thread):
     """ Extends the thread functionality
+        The thread hosts an asyncio event loop, scheduled methods run as periodic tasks on it,
+        queued tasks get submitted to it and coroutines are awaited.
+        Blocking calls can be offloaded to a worker pool, their completions are handled inside the thread again
     """
 
-    def __init__(self, references, name, wait_time):
+    def __init__(self, references, name, wait_time, *, max_workers=4):
         """ Initialize
         :param references: the references
         :param name: thread name
-        :param wait_time: time between intervals
+        :param wait_time: interval of methods scheduled with 0 seconds
+        :param max_workers: (int) size of the worker pool, created on the first offload()
         """
         super().__init__(name=name)
         self.references = references
 
-        self.queue = []
+        # Runs inside the thread, created here, so that it can be stopped before the thread runs
+        self.loop = asyncio.new_event_loop()
+        self.stopped = asyncio.Event()
+
+        self.queue = TaskQueue(self.execute)
         self.tasks = {}
 
-        self.running = False
+        # Coroutines of queued tasks, asyncio only keeps weak references
+        self.coroutines = set()
+
+        # Worker pool and the running operations
+        self.max_workers = max_workers
+        self.workers = None
+        self.operations = []
 
-        self.i = 0
-        self.i_end = 0
+        # Keys of operations to run once more, see offload_latest()
+        self.reruns = set()
+
+        self.running = False
 
         self.wait_time = wait_time
 
+        # Only while recording, see tracing
+        self.recorder = references.get("Recorder")
+
         # Load all scheduled tasks / methods / functions
         for name in self.scheduled_methods:
             f = getattr(self, name).__func__
@@ -42,71 +171,287 @@ class Thread(threading.Thread):
             else:
                 self.tasks.update({seconds: {f}})
 
-            # Highest interval?
-            if seconds > self.i_end * self.wait_time:
-                self.i_end = seconds / self.wait_time
-
     def at_start(self):
-        """ Gets called before the loop
+        """ Gets called before the loop, inside the thread
         """
         raise NotImplementedError("Must override at_start() method!")
 
     def at_end(self):
-        """ Gets called after loop
+        """ Gets called after loop, can be a coroutine
         """
         raise NotImplementedError("Must override at_end() method!")
 
-    def run(self) -> None:
-        """ Run method of thread, will loop as long .running is true
+    def stop(self):
+        """ Stop the loop, can be called from any thread
         """
+        self.running = False
+
+        # Closed already
         try:
-            self.at_start()
+            self.loop.call_soon_threadsafe(self.stopped.set)
+
+        except RuntimeError:
+            pass
+
+    def offload(self, function, *args, key: str = None, timeout: float = None, callback=None, **kwargs):
+        """ Run a blocking call on the worker pool
+        :param function: the function
+        :param key: (str) skipped if an operation with that key is still running, defaults to the name of the function
+        :param timeout: (float) seconds until it times out, see Operation.result()
+        :param callback: called with the Operation inside this thread once it is done,
+                         without a callback exceptions get handled like the ones of queued tasks
+        :returns: (Operation) the operation or None if skipped
+        """
+        key = key if key is not None else function.__name__
 
-            # Loop
-            self.running = True
-            while self.running:
+        if self.pending(key):
+            return None
 
-                # Execute scheduled methods
-                seconds = self.i * self.wait_time
+        if self.workers is None:
+            self.workers = concurrent.futures.ThreadPoolExecutor(self.max_workers, thread_name_prefix=self.name)
 
-                if seconds in self.tasks:
-                    for method in self.tasks[seconds]:
-                        method(self)
+        operation = Operation(self.workers.submit(function, *args, **kwargs), key, callback)
+        self.operations.append(operation)
 
-                # Execute queued methods
-                if self.queue:
-                    task = self.queue.pop(0)
+        # The completion is handed back to the loop
+        operation.future.add_done_callback(
+            lambda _: self.queue.append({"cmd": self.complete, "params": [operation], "kwargs": {}}))
 
-                    # Attribute of thread
-                    if isinstance(task["cmd"], str):
-                        return_value = getattr(self, task["cmd"])(*task["params"], **task["kwargs"])
+        if timeout is not None:
+            self.queue.append({"cmd": self.expire_later, "params": [operation, timeout], "kwargs": {}})
 
-                    # Callable method
-                    elif callable(task["cmd"]):
-                        return_value = task["cmd"](*task["params"], **task["kwargs"])
+        return operation
 
-                    else:
-                        return_value = None
+    def offload_latest(self, function, *, key: str = None, timeout: float = None):
+        """ Like offload(), but if the operation is still running, it runs once more afterwards
+            E.g. for saving, so that the latest state is saved
+        :param function: the function, called without arguments
+        :param key: (str) defaults to the name of the function
+        :param timeout: (float) seconds until it times out
+        """
+        key = key if key is not None else function.__name__
 
-                    # Check if there is a callback
-                    if "callback" in task:
-                        task["callback"](return_value)
+        if self.pending(key):
+            self.reruns.add(key)
+            return
 
-                # Highest value?
-                if self.i >= self.i_end:
-                    self.i = 0
+        def done(operation: Operation):
+            """ Handle it like offload() would and run it again if wanted """
+            try:
+                operation.result()
 
-                else:
-                    self.i += 1
+            except (TimeoutError, concurrent.futures.CancelledError):
+                logger.info(f"- Operation '{key}' {'timed out' if operation.timed_out else 'was cancelled'}")
+
+            finally:
+                if key in self.reruns:
+                    self.reruns.discard(key)
+                    self.offload_latest(function, key=key, timeout=timeout)
+
+        self.offload(function, key=key, timeout=timeout, callback=done)
+
+    def call_soon(self, callback, *args):
+        """ Call something inside the thread, can be called from any thread, e.g. as dispatch of the event bus
+        :param callback: the callable
+        :param args: its arguments
+        """
+        self.queue.append({"cmd": callback, "params": list(args), "kwargs": {}})
+
+    def pending(self, key: str) -> bool:
+        """ If an operation is still running
+        :param key: (str) the key of the operation
+        """
+        return any(x.key == key for x in self.operations)
+
+    def expire_later(self, operation: Operation, timeout: float):
+        """ Start the timeout of an operation
+        :param operation: (Operation) the operation
+        :param timeout: (float) seconds
+        """
+        if operation in self.operations:
+            operation.timer = self.loop.call_later(timeout, self.expire, operation)
+
+    def expire(self, operation: Operation):
+        """ An operation timed out
+        :param operation: (Operation) the operation
+        """
+        if operation in self.operations and not operation.future.done():
+            operation.timed_out = True
+            operation.future.cancel()
+            self.complete(operation)
+
+    def complete(self, operation: Operation):
+        """ Handle a finished, timed out or cancelled operation
+        :param operation: (Operation) the operation
+        """
+        # Handled already, e.g. the call finished after it timed out
+        if operation not in self.operations:
+            return
+
+        self.operations.remove(operation)
+
+        if operation.timer:
+            operation.timer.cancel()
+
+        if operation.callback:
+            operation.callback(operation)
+            return
 
-                time.sleep(self.wait_time)
+        try:
+            operation.result()
+
+        except (TimeoutError, concurrent.futures.CancelledError):
+            logger.info(f"- Operation '{operation.key}' {'timed out' if operation.timed_out else 'was cancelled'}")
+
+    def cancel_operations(self):
+        """ Cancel all operations and shut the worker pool down, without waiting for running calls
+        """
+        for operation in self.operations:
+            operation.cancel()
+
+        self.operations.clear()
+        self.reruns.clear()
 
-            self.at_end()
+        if self.workers is not None:
+            self.workers.shutdown(wait=False, cancel_futures=True)
+            self.workers = None
+
+    def fail(self):
+        """ Handle the current exception, it stops the thread
+        """
+        exceptions.handle_error(self.references)
+        self.stop()
+
+    def execute(self, task: dict):
+        """ Execute a queued task, coroutines get their own asyncio task
+        :param task: (dict) see TaskQueue.append()
+        """
+        start = self.recorder.now() if self.recorder else None
+
+        try:
+            # Attribute of thread
+            if isinstance(task["cmd"], str):
+                return_value = getattr(self, task["cmd"])(*task["params"], **task["kwargs"])
+
+            # Callable method
+            elif callable(task["cmd"]):
+                return_value = task["cmd"](*task["params"], **task["kwargs"])
+
+            else:
+                return_value = None
+
+            if inspect.isawaitable(return_value):
+                coroutine = self.loop.create_task(self.finish(return_value, task, start))
+                self.coroutines.add(coroutine)
+                coroutine.add_done_callback(self.coroutines.discard)
+                return
+
+            # Check if there is a callback
+            if "callback" in task:
+                task["callback"](return_value)
+
+            if self.recorder:
+                self.recorder.task(self.task_name(task["cmd"]), start)
 
         # Handle all exceptions
-        except Exception as e:
+        except Exception:
+            self.fail()
+
+    @staticmethod
+    def task_name(cmd) -> str:
+        """ Name of a task in the trace
+        :param cmd: name of a method or a callable
+        """
+        return cmd if isinstance(cmd, str) else getattr(cmd, "__qualname__", type(cmd).__name__)
+
+    async def finish(self, awaitable, task: dict, start: int = None):
+        """ Await the coroutine of a queued task
+        :param awaitable: the coroutine
+        :param task: (dict) the task
+        :param start: (int) when it was executed, only while recording
+        """
+        try:
+            return_value = await awaitable
+
+            if "callback" in task:
+                task["callback"](return_value)
+
+            if self.recorder:
+                self.recorder.task(self.task_name(task["cmd"]), start)
+
+        except Exception:
+            self.fail()
+
+    async def periodic(self, seconds: float, methods: set):
+        """ Call scheduled methods every few seconds, coroutines get awaited
+            The timer doesn't drift, missed calls (e.g. after a long call) are skipped
+        :param seconds: (float) seconds between the calls
+        :param methods: (set) the methods
+        """
+        interval = seconds or self.wait_time
+        due = self.loop.time() + interval
+
+        try:
+            while True:
+                await asyncio.sleep(max(due - self.loop.time(), 0))
+
+                for method in methods:
+                    start = self.recorder.now() if self.recorder else None
+
+                    if inspect.isawaitable(return_value := method(self)):
+                        await return_value
+
+                    if self.recorder:
+                        self.recorder.task(method.__name__, start)
+
+                due += interval
+
+                if due < self.loop.time():
+                    due = self.loop.time() + interval
+
+        except Exception:
+            self.fail()
+
+    async def main(self):
+        """ Runs until stop() is called
+        """
+        self.at_start()
+
+        self.running = True
+        self.queue.bind(self.loop)
+
+        periodic = [self.loop.create_task(self.periodic(seconds, methods)) for seconds, methods in self.tasks.items()]
+
+        await self.stopped.wait()
+
+        for task in [*periodic, *self.coroutines]:
+            task.cancel()
+
+        await asyncio.gather(*periodic, *self.coroutines, return_exceptions=True)
+
+        if inspect.isawaitable(return_value := self.at_end()):
+            await return_value
+
+    def run(self) -> None:
+        """ Run method of thread, runs the event loop until stop() is called
+        """
+        asyncio.set_event_loop(self.loop)
+
+        try:
+            self.loop.run_until_complete(self.main())
+
+        # Handle all exceptions
+        except Exception:
             exceptions.handle_error(self.references)
 
+        finally:
+            self.running = False
+            self.queue.unbind()
+            self.cancel_operations()
+
+            # Doesn't wait for calls of asyncio.to_thread()
+            self.loop.close()
+
     @staticmethod
     def schedule(seconds=0):
         """ Decorator for scheduling a task
@@ -146,3 +491,89 @@ class Thread(threading.Thread):
             return temp_f
 
         return inner
+
+
+class ComponentGraph:
+    """ Initializes components on a thread pool, each one as soon as the ones it depends on are ready
+    """
+
+    def __init__(self, max_workers: int = 4):
+        """ Initialize
+        :param max_workers: (int) maximum of components initialized at once
+        """
+        self.max_workers = max_workers
+
+        # {name: (factory, dependencies)}
+        self.nodes = {}
+
+        # [(dependencies, callback)]
+        self.callbacks = []
+
+    def add(self, name: str, factory, *, after: tuple = ()):
+        """ Add a component
+        :param name: (str) name of the component
+        :param factory: callable creating the component, its return value is the result
+        :param after: (tuple) names of components that have to be ready before
+        """
+        self.nodes[name] = (factory, tuple(after))
+
+    def when_ready(self, names: tuple, callback):
+        """ Call a callback as soon as some components are ready
+        :param names: (tuple) names of the components
+        :param callback: called without arguments, inside a pool thread
+        """
+        self.callbacks.append((tuple(names), callback))
+
+    def run(self) -> dict:
+        """ Initialize all components, blocks until all are done
+        :returns: (dict) {name: result of factory}
+        :raises: the first exception of a factory
+        """
+        for name, (_, after) in self.nodes.items():
+            if missing := set(after) - set(self.nodes):
+                raise ValueError(f"Component '{name}' depends on unknown components {missing}!")
+
+        pending = dict(self.nodes)
+        callbacks = list(self.callbacks)
+        done = {}
+        errors = []
+
+        # Re-entrant, done callbacks of already finished futures are called right away
+        condition = threading.Condition(threading.RLock())
+
+        with concurrent.futures.ThreadPoolExecutor(self.max_workers, thread_name_prefix="Init") as executor:
+
+            def finished(name: str, future: concurrent.futures.Future):
+                """ Done callback of a component """
+                with condition:
+                    try:
+                        done[name] = future.result()
+
+                        for ready in [x for x in callbacks if all(dep in done for dep in x[0])]:
+                            callbacks.remove(ready)
+                            ready[1]()
+
+                        submit_ready()
+
+                    except Exception as e:
+                        errors.append(e)
+
+                    condition.notify_all()
+
+            def submit_ready():
+                """ Submit every component whose dependencies are done """
+                # Taken out first, the done callback of an already finished future submits the next ones right away
+                ready = [(name, pending.pop(name)[0]) for name, (_, after) in list(pending.items())
+                         if all(dep in done for dep in after)]
+
+                for name, factory in ready:
+                    executor.submit(factory).add_done_callback(functools.partial(finished, name))
+
+            with condition:
+                submit_ready()
+                condition.wait_for(lambda: errors or len(done) == len(self.nodes))
+
+        if errors:
+            raise errors[0]
+
+        return done
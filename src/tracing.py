@@ -0,0 +1,583 @@
+"""
+Recording of sessions and their replay, to reproduce lag reports without the user's machine
+
+Start the app with the environment variable FOV_RECORD set to a file (or to 1 for a file in the working directory):
+```
+set FOV_RECORD=session.fovtrace
+FOV-Changer.exe
+```
+The recorder writes a compact binary trace of the key events reaching the listener, every read and write
+of the gateways (address, size, duration, small values) and the executions of scheduled and queued tasks.
+The storage gets recorded whenever the bindings or settings change.
+
+`python -m benchmarks.replay session.fovtrace [--max-speed]` feeds the key events through the real Listener
+and Gateway against a SimulatedMemory, made of the recorded values, and reports the timing deltas.
+
+Trace format: MAGIC, then records of HEADER (kind, nanoseconds since the start, payload size) and their payload
+"""
+
+import io
+import os
+import json
+import time
+import atexit
+import struct
+import logging
+import tempfile
+import threading
+import statistics
+
+from src import events
+from src.processing.memory import Memory
+
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"FOVTRACE\x01"
+HEADER = struct.Struct("<BQI")
+
+# Kinds of records and their payload
+KEY_PRESS = 1  # KEY
+KEY_RELEASE = 2  # KEY
+CLICK = 3  # CLICK
+SCROLL = 4  # SCROLL
+READ = 5  # ACCESS + value, if small enough
+WRITE = 6  # ACCESS + value, if small enough
+OPEN = 7  # PROCESS
+VERSION = 8  # process id (uint) + version, utf-8
+STORAGE = 9  # settings and features, json
+NAME = 10  # id (ushort) + name, utf-8
+TASK = 11  # TASK
+
+KEY = struct.Struct("<H")  # vk
+CLICK_ = struct.Struct("<H?")  # vk, pressed
+SCROLL_ = struct.Struct("<f")  # ticks
+ACCESS = struct.Struct("<IQIQ?")  # process id, address, size, duration in ns, succeeded
+PROCESS = struct.Struct("<IQQ")  # process id, base address, module size
+TASK_ = struct.Struct("<HQ")  # name id, duration in ns
+PROCESS_ID = struct.Struct("<I")
+
+# Values up to this size are recorded, so that a replay can read them
+MAX_VALUE = 64
+
+# Key events, see latencies()
+INPUTS = (KEY_PRESS, KEY_RELEASE, CLICK, SCROLL)
+
+
+class Recorder:
+    """ Writes the trace, can be used from any thread
+    """
+
+    def __init__(self, references: dict, file):
+        """ Initialize
+        :param references: the references, containing the event bus
+        :param file: a binary file object, closed by close()
+        """
+        self.references = references
+        self.file = file
+        self.lock = threading.Lock()
+        self.start = time.perf_counter_ns()
+
+        # {name: id}, see task()
+        self.names = {}
+
+        self.file.write(MAGIC)
+
+        # Values of the before / after settings change
+        references["EventBus"].subscribe(events.SettingsChanged, lambda e: self.storage())
+
+        self.references.update({"Recorder": self})
+        logger.info("+ Recorder")
+
+    @classmethod
+    def from_environment(cls, references: dict):
+        """ Start recording, if FOV_RECORD is set
+        :param references: the references
+        :returns: (Recorder) the recorder or None
+        """
+        if not (path := os.environ.get("FOV_RECORD")):
+            return None
+
+        if path.lower() in ("1", "true"):
+            path = time.strftime("session-%Y%m%d-%H%M%S.fovtrace")
+
+        recorder = cls(references, open(path, "wb"))
+        atexit.register(recorder.close)
+
+        logger.info(f"Recording to {path}")
+        return recorder
+
+    def now(self) -> int:
+        """ Nanoseconds since the start
+        """
+        return time.perf_counter_ns() - self.start
+
+    def record(self, kind: int, payload: bytes, at: int = None):
+        """ Write a record
+        :param kind: (int) the kind
+        :param payload: (bytes) the payload
+        :param at: (int) nanoseconds since the start, defaults to now
+        """
+        with self.lock:
+            if not self.file.closed:
+                self.file.write(HEADER.pack(kind, self.now() if at is None else at, len(payload)) + payload)
+
+    def key(self, kind: int, vk: int):
+        """ A key event reached the listener
+        :param kind: (int) KEY_PRESS or KEY_RELEASE
+        :param vk: (int) the virtual key code
+        """
+        self.record(kind, KEY.pack(vk))
+
+    def click(self, vk: int, pressed: bool):
+        """ A mouse button event reached the listener
+        :param vk: (int) the virtual key code of the button
+        :param pressed: (bool) if pressed or released
+        """
+        self.record(CLICK, CLICK_.pack(vk, pressed))
+
+    def scroll(self, ticks: float):
+        """ A scroll event reached the listener
+        :param ticks: (float) vertical ticks
+        """
+        self.record(SCROLL, SCROLL_.pack(ticks))
+
+    def access(self, kind: int, process_id: int, address: int, size: int, start: int, value: bytes | None):
+        """ A read or write of the memory
+        :param kind: (int) READ or WRITE
+        :param process_id: (int) the process
+        :param address: (int) the address
+        :param size: (int) number of bytes
+        :param start: (int) nanoseconds since the start, when it began
+        :param value: (bytes) the bytes, None if it failed
+        """
+        payload = ACCESS.pack(process_id or 0, address, size, self.now() - start, value is not None)
+
+        if value is not None and size <= MAX_VALUE:
+            payload += value
+
+        self.record(kind, payload, start)
+
+    def process(self, memory: Memory):
+        """ A process got opened
+        :param memory: (Memory) its memory
+        """
+        self.record(OPEN, PROCESS.pack(memory.process_id or 0, memory.base_address or 0, memory.module_size or 0))
+
+    def version(self, process_id: int, version: str):
+        """ The version of a process
+        :param process_id: (int) the process
+        :param version: (str) its version
+        """
+        self.record(VERSION, PROCESS_ID.pack(process_id or 0) + (version or "").encode())
+
+    def storage(self):
+        """ The settings and features, e.g. once the keys got registered
+        """
+        if (storage := self.references.get("Storage")) and storage.settings and storage.features:
+            self.record(STORAGE, json.dumps({"settings": storage.settings.for_json,
+                                             "features": storage.features.for_json}).encode())
+
+    def task(self, name: str, start: int):
+        """ A task of a thread was executed
+        :param name: (str) name of the task
+        :param start: (int) nanoseconds since the start, when it began
+        """
+        with self.lock:
+            if (name_id := self.names.get(name)) is None:
+                name_id = self.names[name] = len(self.names)
+                payload = KEY.pack(name_id) + name.encode()
+
+                if not self.file.closed:
+                    self.file.write(HEADER.pack(NAME, start, len(payload)) + payload)
+
+        self.record(TASK, TASK_.pack(name_id, self.now() - start), start)
+
+    def close(self):
+        """ Stop recording
+        """
+        with self.lock:
+            if not self.file.closed:
+                self.file.close()
+
+
+class TracedMemory(Memory):
+    """ Records every read and write of another Memory, see Recorder
+    """
+
+    def __init__(self, memory: Memory, recorder: Recorder):
+        """ Initialize, Memory.__init__() isn't called, the attributes are the ones of the wrapped memory
+        :param memory: (Memory) the wrapped memory
+        :param recorder: (Recorder) the recorder
+        """
+        self.memory = memory
+        self.recorder = recorder
+
+        # {id of a wrapped memory: TracedMemory}, see open_all_from_name()
+        self.traced = {id(memory): self}
+
+    def __getattr__(self, name: str):
+        """ Typed methods like Memory, everything else of the wrapped memory, e.g. process_handle
+        :param name: the attribute name
+        """
+        try:
+            return super().__getattr__(name)
+
+        except AttributeError:
+            return getattr(self.memory, name)
+
+    def open_process_from_name(self, name: str):
+        """ See Memory
+        """
+        self.memory.open_process_from_name(name)
+        self.recorder.process(self.memory)
+
+    def open_all_from_name(self, name: str) -> list:
+        """ See Memory, each memory keeps its TracedMemory
+        """
+        memories = []
+
+        for memory in self.memory.open_all_from_name(name):
+            if (traced := self.traced.get(id(memory))) is None:
+                traced = self.traced[id(memory)] = TracedMemory(memory, self.recorder)
+
+            self.recorder.process(memory)
+            memories.append(traced)
+
+        return memories
+
+    def close_process(self):
+        """ See Memory
+        """
+        self.memory.close_process()
+
+    def get_version(self) -> str:
+        """ See Memory
+        """
+        version = self.memory.get_version()
+        self.recorder.version(self.memory.process_id, version)
+
+        return version
+
+    def readable_regions(self, start: int = 0, end: int = None) -> list:
+        """ See Memory
+        """
+        return self.memory.readable_regions(start, end)
+
+    def read_bytes(self, address: int, length: int) -> bytes:
+        """ See Memory
+        """
+        start = self.recorder.now()
+        data = None
+
+        try:
+            data = self.memory.read_bytes(address, length)
+            return data
+
+        finally:
+            self.recorder.access(READ, self.memory.process_id, address, length, start, data)
+
+    def write_bytes(self, address: int, data: bytes):
+        """ See Memory
+        """
+        start = self.recorder.now()
+        written = None
+
+        try:
+            self.memory.write_bytes(address, data)
+            written = data
+
+        finally:
+            self.recorder.access(WRITE, self.memory.process_id, address, len(data), start, written)
+
+
+def read_trace(file) -> list:
+    """ Read a trace
+    :param file: a binary file object
+    :returns: (list) (kind, nanoseconds since the start, payload) records
+    :raises ValueError: if it isn't a trace
+    """
+    if file.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not a trace of this version!")
+
+    records = []
+
+    while len(header := file.read(HEADER.size)) == HEADER.size:
+        kind, at, size = HEADER.unpack(header)
+
+        # Cut off, e.g. by a crash
+        if len(payload := file.read(size)) != size:
+            break
+
+        records.append((kind, at, payload))
+
+    return records
+
+
+def latencies(records: list) -> list:
+    """ Time from each key event until the first write it caused, before the next key event
+    :param records: (list) see read_trace()
+    :returns: (list) nanoseconds per key event, None if it wrote nothing
+    """
+    result = []
+    pending = None
+
+    for kind, at, _ in records:
+        if kind in INPUTS:
+            result.append(None)
+            pending = at
+
+        elif kind == WRITE and pending is not None:
+            result[-1] = at - pending
+            pending = None
+
+    return result
+
+
+def percentiles(values: list) -> dict:
+    """ p50, p90, p99 and max
+    :param values: (list) the values
+    :returns: (dict) {name: value}, empty without values
+    """
+    if not values:
+        return {}
+
+    values = sorted(values)
+    quantiles = statistics.quantiles(values, n=100, method="inclusive") if len(values) > 1 else values * 99
+
+    return {"p50": quantiles[49], "p90": quantiles[89], "p99": quantiles[98], "max": values[-1]}
+
+
+class Replayer:
+    """ Replays the key events of a trace through the real Listener and Gateway, against a SimulatedMemory
+    """
+
+    def __init__(self, records: list):
+        """ Initialize
+        :param records: (list) see read_trace()
+        :raises ValueError: if the trace is missing the storage or the game
+        """
+        self.records = records
+
+        if not any(kind == STORAGE for kind, _, _ in records):
+            raise ValueError("The trace has no storage, the keys were never registered!")
+
+        if not any(kind == OPEN for kind, _, _ in records):
+            raise ValueError("The trace has no opened game!")
+
+    def create_memory(self):
+        """ Simulate the recorded processes, made of the values read first
+        :returns: (SimulatedMemory) the primary process, the others are spawned
+        """
+        from src.processing.memory import SimulatedMemory
+
+        processes = {}
+        versions = {}
+
+        for kind, _, payload in self.records:
+            if kind == OPEN:
+                process_id, base_address, module_size = PROCESS.unpack_from(payload)
+                processes.setdefault(process_id, (base_address, module_size))
+
+            elif kind == VERSION:
+                versions.setdefault(PROCESS_ID.unpack_from(payload)[0], payload[PROCESS_ID.size:].decode())
+
+        memories = {}
+
+        for process_id, (base_address, module_size) in processes.items():
+            memories[process_id] = SimulatedMemory(version=versions.get(process_id, ""), base_address=base_address,
+                                                   module_size=module_size, process_id=process_id)
+
+        primary, *others = memories.values()
+        primary.others.extend(others)
+
+        # First value of every address, later ones were written by us or changed by the game
+        seen = set()
+
+        for kind, _, payload in self.records:
+            if kind != READ:
+                continue
+
+            process_id, address, size, _, succeeded = ACCESS.unpack_from(payload)
+            value = payload[ACCESS.size:]
+
+            if not succeeded or len(value) != size or (process_id, address) in seen or process_id not in memories:
+                continue
+
+            seen.add((process_id, address))
+            memory = memories[process_id]
+
+            if not memory.find_region(address, size):
+                first, last = address & ~0xFFF, (address + size + 0xFFF) & ~0xFFF
+
+                for page in range(first, last, 0x1000):
+                    if not memory.find_region(page, 1):
+                        memory.add_region(page, bytearray(0x1000))
+
+            if found := memory.find_region(address, size):
+                region, offset = found
+                region[offset:offset + size] = value
+
+        return primary
+
+    def create_references(self, directory: str, storage_data: dict, memory) -> dict:
+        """ The components needed by the listener, recording into memory
+        :param directory: (str) for the storage file
+        :param storage_data: (dict) settings and features
+        :param memory: (SimulatedMemory) the primary process
+        :returns: (dict) the references
+        """
+        from src import frontend
+        from src.processing import storage
+        from src.processing.gateway import Gateway
+        from src.processing.pool import GatewayPool
+
+        path = os.path.join(directory, "storage.json")
+
+        # Nothing must be started
+        settings = {**storage_data["settings"], "auto_attach": False, "start_minimized": False}
+
+        with open(path, "w") as f:
+            json.dump({**storage.Storage.STORAGE_TEMPLATE, "mc_version": memory.version, "settings": settings,
+                       "features": storage_data["features"]}, f)
+
+        references = {}
+        events.EventBus(references)
+        frontend.Frontend(references)
+        Recorder(references, io.BytesIO())
+
+        type("ReplayStorage", (storage.Storage,), {"STORAGE_PATH": path})(references)
+
+        gateway = Gateway(references, TracedMemory(memory, references["Recorder"]))
+        pool = GatewayPool(references)
+
+        gateway.open_process_from_name(memory.process_name)
+        gateway.check_version()
+        gateway.get_addresses()
+
+        # Instances of another version would need their offsets from the network
+        if settings.get("multi_instance") and all(x.version == memory.version for x in memory.others):
+            pool.attach_all()
+
+        return references
+
+    def apply_storage(self, references: dict, storage_data: dict):
+        """ The recorded settings and features changed
+        :param references: the references
+        :param storage_data: (dict) settings and features
+        """
+        storage = references["Storage"]
+
+        for name, value in storage_data["settings"].items():
+            if name in storage.settings.data and name not in ("auto_attach", "start_minimized"):
+                storage.settings.data[name] = value
+
+        for feature_id, value in storage_data["features"].items():
+            if feature_id in storage.features.data:
+                storage.features[feature_id].update({x: value[x] for x in ("key", "enabled", "settings") if x in value})
+
+        references["Listener"].register_keys()
+
+    def run(self, *, max_speed: bool = False) -> dict:
+        """ Replay the key events
+        :param max_speed: (bool) without waiting in between, else at the original times
+        :returns: (dict) the report, see report()
+        """
+        from src.processing import listener, keybinds
+        from pynput import keyboard
+
+        buttons = {vk: name for name, vk in keybinds.MOUSE_VKS.items()}
+        first = next(payload for kind, _, payload in self.records if kind == STORAGE)
+
+        with tempfile.TemporaryDirectory() as directory:
+            references = self.create_references(directory, json.loads(first), self.create_memory())
+            recorder = references["Recorder"]
+
+            key_listener = listener.Listener(references)
+            key_listener.register_keys()
+
+            # Only what happens from now on is compared
+            recorder.file.seek(0)
+            recorder.file.truncate()
+            recorder.file.write(MAGIC)
+
+            start = time.perf_counter_ns()
+            offset = None
+
+            try:
+                for kind, at, payload in self.records:
+                    if kind not in INPUTS and kind != STORAGE:
+                        continue
+
+                    # The first key event is the start of the replay
+                    if offset is None and kind in INPUTS:
+                        offset = at
+                        recorder.start = start = time.perf_counter_ns()
+
+                    if not max_speed and offset is not None and (wait := at - offset - (time.perf_counter_ns() - start)) > 0:
+                        time.sleep(wait / 1e9)
+
+                    if kind == STORAGE:
+                        if offset is not None:
+                            self.apply_storage(references, json.loads(payload))
+
+                    elif kind in (KEY_PRESS, KEY_RELEASE):
+                        key = keyboard.KeyCode.from_vk(KEY.unpack(payload)[0])
+                        (key_listener.on_press if kind == KEY_PRESS else key_listener.on_release)(key)
+
+                    elif kind == CLICK:
+                        vk, pressed = CLICK_.unpack(payload)
+                        key_listener.on_click(0, 0, type("Button", (), {"name": buttons.get(vk, "")})(), pressed)
+
+                    elif kind == SCROLL:
+                        key_listener.on_scroll(0, 0, 0, SCROLL_.unpack(payload)[0])
+
+                duration = time.perf_counter_ns() - start
+
+            finally:
+                key_listener.scroll_zoom.stop()
+                key_listener.enforcer.stop()
+
+            recorder.file.seek(0)
+            replayed = read_trace(recorder.file)
+
+        return self.report(replayed, duration)
+
+    def report(self, replayed: list, duration: int) -> dict:
+        """ Compare the original with the replay
+        :param replayed: (list) records of the replay
+        :param duration: (int) nanoseconds the replay took
+        :returns: (dict) counts, latency percentiles in µs and the deltas of the events that wrote in both
+        """
+        original_latencies = latencies(self.records)
+        replayed_latencies = latencies(replayed)
+
+        inputs = [at for kind, at, _ in self.records if kind in INPUTS]
+        pairs = [(x, y) for x, y in zip(original_latencies, replayed_latencies) if x is not None and y is not None]
+
+        names = {KEY.unpack_from(payload)[0]: payload[KEY.size:].decode()
+                 for kind, _, payload in self.records if kind == NAME}
+        tasks = {}
+
+        for kind, _, payload in self.records:
+            if kind == TASK:
+                name_id, task_duration = TASK_.unpack(payload)
+                tasks.setdefault(names.get(name_id, str(name_id)), []).append(task_duration / 1000)
+
+        def count(records: list, kind: int) -> int:
+            """ Number of records of a kind """
+            return sum(1 for x in records if x[0] == kind)
+
+        return {
+            "events": len(inputs),
+            "original_duration_s": (inputs[-1] - inputs[0]) / 1e9 if inputs else 0,
+            "replay_duration_s": duration / 1e9,
+            "writes": {"original": count(self.records, WRITE), "replay": count(replayed, WRITE)},
+            "reads": {"original": count(self.records, READ), "replay": count(replayed, READ)},
+            "latency_us": {
+                "original": percentiles([x / 1000 for x in original_latencies if x is not None]),
+                "replay": percentiles([x / 1000 for x in replayed_latencies if x is not None]),
+                "delta": percentiles([(y - x) / 1000 for x, y in pairs])
+            },
+            "tasks_us": {name: percentiles(values) for name, values in sorted(tasks.items())}
+        }
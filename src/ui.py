@@ -9,16 +9,19 @@ import tkinter.font as tkf
 from tkinter import simpledialog, messagebox
 
 from PIL import Image, ImageTk
-import sv_ttk
 
 from run import VERSION
-from src import exceptions
+from src import events, exceptions, frontend
 from src.processing import storage
 
 
 logger = logging.getLogger(__name__)
 
 
+# Override tkinter exception handler
+tk.Tk.report_callback_exception = lambda self, exc, val, tb: exceptions.handle_error(self.references)
+
+
 def queue_alert_message(references: dict, msg: str, *, warning=False):
     """ Add a alert message to the root thread queue
     :param references: (dict) references
@@ -55,6 +58,145 @@ def queue_quit_message(references: dict, msg: str, title: str):
          "callback": references["SystemTray"].stop_tray})
 
 
+class TkFrontend(frontend.Frontend):
+    """ The frontend for the tkinter gui and the system tray
+        Most of it is queued for the root thread
+    """
+
+    def create_widgets(self):
+        """ See Frontend
+        """
+        self.references["RootThread"].queue.append(
+            {"cmd": "create_widgets", "params": [], "kwargs": {}})
+
+    def create_content(self):
+        """ See Frontend
+        """
+        self.references["RootThread"].queue.append(
+            {"cmd": "create_content", "params": [], "kwargs": {}})
+
+    def create_tab_features(self, features, callback):
+        """ See Frontend
+        """
+        self.references["RootThread"].queue.append(
+            {"cmd": "update_tab_features", "params": [], "kwargs": {}, "callback": lambda t: callback()})
+
+    def dispatch(self, callback, event: events.Event):
+        """ See Frontend, inside the root thread
+        """
+        self.references["RootThread"].call_soon(callback, event)
+
+    def render_status(self, status: dict):
+        """ See Frontend
+        """
+        root = self.references["Root"]
+
+        # Not created yet, it renders the current status itself
+        if root.status_frame:
+            root.render_status(status)
+
+    def alert(self, msg: str, *, warning=False):
+        """ See Frontend
+        """
+        queue_alert_message(self.references, msg, warning=warning)
+
+    def quit(self, msg: str, title: str):
+        """ See Frontend
+        """
+        queue_quit_message(self.references, msg, title)
+
+    def hide(self):
+        """ See Frontend
+        """
+        self.references["RootThread"].queue.append(
+            {"cmd": "hide", "params": [], "kwargs": {"not_exit_all": True}, "wait_for_render": True})
+
+    def after_render(self, cmd):
+        """ See Frontend
+        """
+        self.references["RootThread"].queue.append(
+            {"cmd": cmd, "params": [], "kwargs": {}, "wait_for_render": True})
+
+    def begin_attach(self) -> bool:
+        """ See Frontend, the start button is used for the cooldown
+        """
+        root = self.references["Root"]
+
+        if root.start_button["state"] == "disabled":
+            return False
+
+        root.start_button.configure(state="disabled")
+        root.config(cursor="wait")
+
+        return True
+
+    def end_attach(self, attached: bool, cooldown: int):
+        """ See Frontend
+        """
+        root = self.references["Root"]
+
+        root.after(cooldown, (lambda: root.start_button.configure(state="active")))
+        root.config(cursor="arrow")
+
+    def set_attached(self, attached: bool):
+        """ See Frontend, changes the start button and the tray's enabled button
+        """
+        self.references["Root"].start_button_var.set("■ Stop" if attached else "Start")
+
+        self.references["SystemTray"].states["Enabled"] = attached
+        self.references["SystemTray"].tray.update_menu()
+
+    def settings_changed(self, event: events.SettingsChanged):
+        """ See Frontend, refreshes the tk vars of the changes
+        """
+        root = self.references["Root"]
+
+        # Made inside the ui
+        if event.source in (root, root.feature_edit_manager):
+            return
+
+        storage = self.references["Storage"]
+
+        for feature_id in event.features:
+            if not storage.features or not (tk_vars := storage.features.tk_vars.get(feature_id)):
+                continue
+
+            feature = storage.features[feature_id]
+            tk_vars["enabled"].set(feature["enabled"])
+
+            if tk_vars["key"] is not None:
+                tk_vars["key"].set(feature["key"])
+
+            # Only exist while the edit top level does, see FeatureEditManager
+            for key, tk_var in tk_vars["settings"].items():
+                tk_var.set(temp if (temp := feature["settings"][key]) is not None else "")
+
+        for name in event.settings:
+            if tk_var := storage.settings.tk_vars.get(name):
+                tk_var.set(storage.settings[name])
+
+    def scan_progress(self, name: str, progress: float | None):
+        """ See Frontend, shown inside the tray menu, where it can be cancelled
+        """
+        tray = self.references["SystemTray"]
+
+        tray.scan_text = None if progress is None else f"Cancel {name} ({progress:.0%})"
+        tray.tray.update_menu()
+
+    def bell(self):
+        """ See Frontend
+        """
+        self.references["Root"].bell()
+
+    def crash(self):
+        """ See Frontend
+        """
+        messagebox.showerror(title="Critical Error", message="FOV-Changer crashed! Check log.txt for more insight.\n\nIf you need help, feel free to join our Discord or open up an issue on GitHub. Please make sure to include the log.txt file created next to FOV-Changer.")
+
+        # Kill all
+        self.references["SystemTray"].stop_tray()
+
+
 class ScrollableFrame(tk.Frame):
     """ A frame with a scrollbar
     """
@@ -135,6 +277,22 @@ class RootThread(threading.Thread):
         # Add thread to references
         self.references.update({"RootThread": self})
 
+    def call_soon(self, callback, *args):
+        """ Call something inside this thread, can be called from any thread, e.g. as dispatch of the event bus
+        :param callback: the callable
+        :param args: its arguments
+        """
+        if self.is_mainloop_running:
+            try:
+                self.root.after(0, callback, *args)
+                return
+
+            # The mainloop has just stopped
+            except (RuntimeError, tk.TclError):
+                pass
+
+        self.queue.append({"cmd": callback, "params": list(args), "kwargs": {}})
+
     def run(self) -> None:
         """ Run method of thread
         """
@@ -206,6 +364,11 @@ class Root(tk.Tk):
         self.log_frame = None
         self.log_text = None
         self.info_frame = None
+        self.notebook = None
+
+        # Tabs are built once they are viewed, {tab: method}
+        self.tab_builders = {}
+        self.built_tabs = set()
 
         # TextVariables
         self.start_button_var = tk.StringVar()
@@ -248,7 +411,7 @@ class Root(tk.Tk):
 
         else:
             self.withdraw()
-            self.feature_edit_manager.hide_all()
+            self.release_tabs()
             self.references["Storage"].update_file()
 
     def queue_update(self):
@@ -382,6 +545,7 @@ class Root(tk.Tk):
 
         # Update
         self.rendered = True
+        logger.info("Rendered window!")
 
     def render_status(self, status: dict):
         """ Render a status
@@ -410,33 +574,103 @@ class Root(tk.Tk):
 
     def create_notebook(self):
         """ The notebook which contains settings and more is
-            Gets execute in createContent
+            Gets execute in createContent, the tabs are built once they are viewed
         """
-        notebook = ttk.Notebook(self.main_frame, width=600, takefocus=False)
-        notebook.grid(column=3, row=1, sticky="WENS", ipadx=0)
+        self.notebook = ttk.Notebook(self.main_frame, width=600, takefocus=False)
+        self.notebook.grid(column=3, row=1, sticky="WENS", ipadx=0)
 
         # Create instances
-        self.feature_frame = tk.Frame(notebook)
-        self.settings_frame = tk.Frame(notebook)
-        self.log_frame = tk.Frame(notebook)
-        self.info_frame = tk.Frame(notebook)
+        self.feature_frame = tk.Frame(self.notebook)
+        self.settings_frame = tk.Frame(self.notebook)
+        self.log_frame = tk.Frame(self.notebook)
+        self.info_frame = tk.Frame(self.notebook)
+
+        self.notebook.add(self.feature_frame, text="Features")
+        self.notebook.add(self.settings_frame, text="Settings")
+        self.notebook.add(self.log_frame, text="Log")
+        self.notebook.add(self.info_frame, text="Info")
+
+        self.tab_builders = {
+            str(self.feature_frame): self.build_tab_features,
+            str(self.settings_frame): self.build_tab_settings,
+            str(self.log_frame): self.create_tab_log,
+            str(self.info_frame): self.create_tab_info
+        }
 
-        # Update to get height
-        self.update()
+        # Build a tab on its first view, also once the window gets shown
+        self.notebook.bind("<<NotebookTabChanged>>", lambda e: self.build_selected_tab())
+        self.bind("<Map>", lambda e: self.build_selected_tab() if e.widget is self else None)
+
+        # Will be hidden right away, see Storage
+        if not self.storage.settings["start_minimized"]:
+            self.build_selected_tab()
+
+    def build_selected_tab(self):
+        """ Build the selected tab, if the window is shown and it isn't built already
+        """
+        if not self.notebook or self.state() in ("withdrawn", "iconic"):
+            return
+
+        if (tab := self.notebook.select()) and tab not in self.built_tabs:
+            # Its size is needed for the paddings
+            self.update_idletasks()
+
+            self.tab_builders[tab]()
+            self.built_tabs.add(tab)
+
+    def release_tab(self, tab: str):
+        """ Destroy the widgets of a tab, it gets built again once it is viewed
+        :param tab: (str) the tab, the name of its frame
+        """
+        if tab not in self.built_tabs:
+            return
+
+        if tab == str(self.feature_frame):
+            self.feature_frame_placeholder = None
+            self.feature_edit_manager.release()
+
+            if self.storage.features:
+                self.storage.features.tk_vars = {}
+
+        elif tab == str(self.settings_frame):
+            self.storage.settings.tk_vars = {}
+
+            # Of the scrollable frame
+            self.unbind_all("<MouseWheel>")
+
+        elif tab == str(self.log_frame):
+            logging.getHandlerByName("gui").release_widget()
+            self.log_text = None
+
+        for child in self.nametowidget(tab).winfo_children():
+            child.destroy()
+
+        self.built_tabs.discard(tab)
+
+    def release_tabs(self):
+        """ Release all tabs but the selected one and the edit top levels, e.g. once the window is hidden
+        """
+        self.feature_edit_manager.release()
+
+        if not self.notebook:
+            return
 
-        # Add them before to be then able to calculate the height
-        notebook.add(self.feature_frame, text="Features")
-        notebook.add(self.settings_frame, text="Settings")
-        notebook.add(self.log_frame, text="Log")
-        notebook.add(self.info_frame, text="Info")
+        for tab in self.built_tabs - {self.notebook.select()}:
+            self.release_tab(tab)
+
+    def update_tab_features(self):
+        """ New features were fetched, build the tab again
+        """
+        self.release_tab(str(self.feature_frame))
+        self.build_selected_tab()
 
-        # Notebook Features
-        # If there are features, render them
+    def build_tab_features(self):
+        """ Render the features, or just a placeholder if there aren't any yet
+        """
         if features := self.storage.features:
             self.create_tab_features(features)
             logger.info("Rendered Features!")
 
-        # or just make a placeholder
         else:
             self.feature_frame_placeholder = tk.Label(self.feature_frame,
                                                       text="Please start the FOV Changer once in order to"
@@ -444,25 +678,17 @@ class Root(tk.Tk):
                                                       font=(self.font, 12), fg="#3A606E")
             self.feature_frame_placeholder.place(relx=.5, y=100, anchor="center")
 
-        # Notebook Settings
+    def build_tab_settings(self):
+        """ Render the settings
+        """
         self.storage.settings.tk_vars = self.create_tab_settings()
         logger.info("Rendered Settings!")
 
-        # Notebook Log
-        self.create_tab_log()
-
-        # Notebook Info
-        self.create_tab_info()
-
     def create_tab_features(self, features):
         """ Creates the Tab features + tk_vars
             Own Method to make it better to read
         :param features: (Features) the features object
         """
-        # Remove placeholder
-        if self.feature_frame_placeholder:
-            self.feature_frame_placeholder.place_forget()
-
         # Calculate y padding
         space = round((self.feature_frame.winfo_height() - tkf.Font(font=(self.font, 13)).metrics(
             "linespace") * features.len) / (features.len + 2))
@@ -582,7 +808,7 @@ class Root(tk.Tk):
 
         # Calculate y padding
         length = len(settings) + 1
-        space = round((self.feature_frame.winfo_height() - tkf.Font(font=(self.font, 13)).metrics(
+        space = round((self.settings_frame.winfo_height() - tkf.Font(font=(self.font, 13)).metrics(
             "linespace") * length) / (length + 2))
 
         def render(setting_name: str, setting_value: any, i: int):
@@ -700,20 +926,19 @@ class Root(tk.Tk):
         :param feature_id: (str) if of the feature
         :param p: (str) %P => content
         """
-        # Cache
-        if (p != "" and p == self.cache["validate"]) or len(p) > 1:
+        # Cache, a binding can be a combination like 'ctrl+shift+v', see keybinds
+        if (p != "" and p == self.cache["validate"]) or len(p) > 32:
             self.bell()
             return False
 
         self.cache["validate"] = p
 
-        # Change feature + prepare storage for update queue + register keys in listener new
-        self.storage.features[feature_id]["key"] = p[0] if p else ""
-        with self.storage.edited_lock:
-            self.storage.edited = True
+        # Change feature, it gets saved and the listener registers the keys new
+        self.storage.features[feature_id]["key"] = p
 
-        with self.storage.listener_keys_edited_lock:
-            self.storage.listener_keys_edited = True
+        event_bus = self.references["EventBus"]
+        event_bus.publish(events.SettingsChanged(features=(feature_id,), source=self))
+        event_bus.publish(events.KeysChanged())
 
         return True
 
@@ -729,8 +954,7 @@ class Root(tk.Tk):
             # Reverse it because it's needed + save it
             feature_value["enabled"] = not state
 
-            with self.storage.edited_lock:
-                self.storage.edited = True
+            self.references["EventBus"].publish(events.SettingsChanged(features=(feature_id,), source=self))
 
             # Update status
             if feature_id in self.references["Gateway"].status:
@@ -756,11 +980,15 @@ class Root(tk.Tk):
                     queue_alert_message(self.references, msg, warning=True)
                     return
 
+            event_bus = self.references["EventBus"]
+            event_bus.publish(events.SettingsChanged(settings=tuple(self.storage.settings.tk_vars), source=self))
+
+            # Toggle and scroll zoom change the bindings and the mouse listener
+            event_bus.publish(events.KeysChanged())
+
             logger.info("Saved new settings!")
             queue_alert_message(self.references, "Saved new settings!")
 
-        self.storage.update_file()
-
     def alert(self, mode: str, msg: str, *, warning=False, ask=False, title="Untitled") -> any:
         """ Alert a message or a popup
         :param mode: (str) either 'popup' or 'msg', falls back to msg
@@ -819,7 +1047,10 @@ class FeatureEditManager:
         self.root = root
         self.storage = self.references["Storage"]
 
-        # TopLevels
+        # Features with an edit button, {feature_id: (feature, payload)}
+        self.features = {}
+
+        # TopLevels, created on the first open
         self.top_levels = {}
 
         # Fix bug
@@ -832,11 +1063,23 @@ class FeatureEditManager:
         self.top_levels[feature_id].geometry(f"300x150+{self.root.winfo_x()}+{self.root.winfo_y()}")
 
     def add_feature(self, feature_id: str, feature: dict, payload: dict):
-        """ Add features
+        """ Add features, the top level gets created once it is opened
         :param feature_id: (str) the if of the feature
         :param feature: (dict) the feature
         :param payload: (dict) the payload
         """
+        self.features.update({feature_id: (feature, payload)})
+
+        # Outdated
+        if top := self.top_levels.pop(feature_id, None):
+            top.destroy()
+
+    def create_top_level(self, feature_id: str):
+        """ Create the top level of a feature
+        :param feature_id: (str) the if of the feature
+        """
+        feature, payload = self.features[feature_id]
+
         # Create Top Level
         top = tk.Toplevel(self.root)
         top.withdraw()
@@ -859,6 +1102,9 @@ class FeatureEditManager:
         :param feature_id: the if of the feature
         """
         if not self.open and self.storage.features[feature_id]["available"]:
+            if feature_id not in self.top_levels:
+                self.create_top_level(feature_id)
+
             self.top_levels[feature_id].deiconify()
             self.top_levels[feature_id].grab_set()
             self.position(feature_id)
@@ -885,7 +1131,7 @@ class FeatureEditManager:
             # Also translate the values if needed
             if self.storage.features.check_settings(self.storage.features, feature_id, feature, override=settings):
                 feature["settings"] = settings
-                self.references["Storage"].update_file()
+                self.references["EventBus"].publish(events.SettingsChanged(features=(feature_id,), source=self))
 
                 logger.info(f"Saved new values! [{settings}]")
                 # queue_alert_message(self.references, "Saved new values!")
@@ -916,3 +1162,17 @@ class FeatureEditManager:
         for top_level_obj in self.top_levels.values():
             top_level_obj.withdraw()
             top_level_obj.grab_release()
+
+    def release(self):
+        """ Destroy all top levels, they get created again once opened
+        """
+        self.hide_all()
+
+        for feature_id, top_level_obj in self.top_levels.items():
+            top_level_obj.destroy()
+
+            # Its tk vars went with it
+            self.features[feature_id][1]["settings"].clear()
+
+        self.top_levels.clear()
+        self.open = False
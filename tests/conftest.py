@@ -0,0 +1,22 @@
+""" Fixtures of the tests """
+
+import os
+
+# Without a display, before anything imports pynput
+os.environ.setdefault("PYNPUT_BACKEND", "dummy")
+
+import pytest
+
+from tests import helpers
+
+
+@pytest.fixture
+def references(tmp_path) -> dict:
+    """ References with a simulated Minecraft, not attached """
+    return helpers.create_references(str(tmp_path))
+
+
+@pytest.fixture
+def attached_references(tmp_path) -> dict:
+    """ References attached to a simulated Minecraft """
+    return helpers.create_references(str(tmp_path), attached=True)
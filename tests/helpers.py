@@ -0,0 +1,104 @@
+""" Shared setup of the tests, a simulated Minecraft instead of the real one """
+
+import json
+import os
+import random
+
+from src import events, frontend
+from src.processing import processing, storage
+from src.processing.gateway import Gateway
+from src.processing.pool import GatewayPool
+from src.processing.memory import SimulatedMemory
+
+
+# Like the features inside storage.json, offsets of a real version
+FEATURES = {
+    "0": {"available": True, "offsets": [0x4A0D0B8, 0x10, 0x1D0, 0xF0], "name": "FOV", "enabled": True,
+          "key": "c", "settings": {"before": 70.0, "after": 30.0}, "children": ["1", "2"]},
+    "1": {"available": True, "offsets": [0x4A0D0B8, 0x10, 0x1D0, 0x1C8], "name": "Hide Hand", "enabled": True,
+          "key": None, "settings": {"before": 0, "after": 1}, "children": []},
+    "2": {"available": True, "offsets": [0x4A0C8F0, 0x8, 0x38, 0x18], "name": "Sensitivity", "enabled": True,
+          "key": None, "settings": {"before": 50.0, "after": 16.0}, "children": []},
+    "3": {"available": True, "offsets": [[0x4A12340, 0x28, 0x8, 0x0], [0x4A12340, 0x28, 0x8, 0x20]],
+          "name": "Discord", "enabled": True, "settings": {"show_server": True, "show_version": True},
+          "children": []}
+}
+
+
+def create_references(directory: str, *, attached: bool = False, features: dict = None) -> dict:
+    """ Create storage, gateway and pool with a no-op frontend
+    :param directory: (str) where storage.json is put
+    :param attached: (bool) attach the gateway to a simulated Minecraft
+    :param features: (dict) inside storage.json, defaults to FEATURES
+    :returns: (dict) the references
+    """
+    path = os.path.join(directory, "storage.json")
+
+    with open(path, "w") as f:
+        json.dump({**storage.Storage.STORAGE_TEMPLATE, "mc_version": "1.21.0.3", "features": features or FEATURES}, f)
+
+    references = {}
+    events.EventBus(references)
+    frontend.Frontend(references)
+
+    # Own subclass, instead of changing the path for everything else
+    type("TestStorage", (storage.Storage,), {"STORAGE_PATH": path})(references)
+
+    memory = SimulatedMemory()
+    gateway = Gateway(references, memory)
+    pool = GatewayPool(references)
+
+    if attached:
+        memory.open_process_from_name("Minecraft.Windows.exe")
+
+        # Every offset chain points to a valid value
+        for value in FEATURES.values():
+            for offsets in (value["offsets"] if isinstance(value["offsets"][0], list) else [value["offsets"]]):
+                memory.build_pointer_chain(offsets)
+
+        gateway.check_version()
+        gateway.get_addresses()
+        pool.attach_all()
+
+    return references
+
+
+def signature_module(size: int) -> SimulatedMemory:
+    """ A simulated Minecraft whose module is made of random bytes, containing the code of the features near its end
+    :param size: (int) size of the module
+    """
+    memory = SimulatedMemory(module_size=size)
+    memory.open_process_from_name("Minecraft.Windows.exe")
+
+    module = memory.regions[memory.module_base_address]
+    module[:] = random.Random(size).randbytes(size)
+
+    # (code, where its rip relative address is, the static pointer it loads)
+    codes = [
+        (bytes.fromhex("48 8B 05 00000000 48 8B 48 10 48 8B 81 D0010000 F3 0F 10 80"), 3, 0x4A0D0B8),
+        (bytes.fromhex("C7 80 C8010000 01 00 00 00 EB 07 48 8B 0D"), None, None),
+        (bytes.fromhex("48 8B 0D 00000000 48 8B 49 08 48 8B 41 38 F3 0F 10 40 18"), 3, 0x4A0C8F0),
+        (bytes.fromhex("48 8D 15 00000000 4C 8B 42 28 4D 8B 48 08"), 3, 0x4A12340)
+    ]
+
+    offset = size - 0x10000
+    for code, at, target in codes:
+        module[offset:offset + len(code)] = code
+
+        if at is not None:
+            module[offset + at:offset + at + 4] = (target - offset - 7).to_bytes(4, "little", signed=True)
+
+        offset += 0x1000
+
+    return memory
+
+
+class BuiltProcessingThread(processing.ProcessingThread):
+    """ Processing thread with the components of a simulated Minecraft, instead of building them """
+
+    def at_start(self):
+        self.storage = self.references["Storage"]
+        self.gateway = self.references["Gateway"]
+        self.pool = self.references["GatewayPool"]
+
+        self.event_bus.subscribe(events.SettingsChanged, self.on_settings_changed, dispatch=self.call_soon)
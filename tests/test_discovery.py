@@ -0,0 +1,65 @@
+""" Tests of discovery and auto attaching """
+
+import time
+import types
+
+from src.processing import discovery
+
+from tests.helpers import BuiltProcessingThread
+
+
+class RunningFinder(discovery.ProcessFinder):
+    """ Minecraft is always running """
+
+    def scan(self) -> dict:
+        return {1: discovery.Discovery.PROCESS_NAME}
+
+    def is_running(self, process_id: int, name: str) -> bool:
+        return True
+
+
+def wait_for(condition, timeout: float = 2) -> bool:
+    deadline = time.monotonic() + timeout
+
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    return condition()
+
+
+def test_retry_after_failed_attach():
+    queue = []
+    references = {"Gateway": types.SimpleNamespace(process_handle=None),
+                  "ProcessingThread": types.SimpleNamespace(queue=queue)}
+
+    finder = discovery.Discovery(references, RunningFinder())
+    finder.SETTLE_TIME = 0
+    finder.RETRY_INTERVAL = 0.1
+
+    finder.resume()
+    assert wait_for(lambda: len(queue) == 1)
+    assert wait_for(lambda: not finder.searching.is_set())
+
+    finder.retry()
+    assert wait_for(lambda: len(queue) == 2)
+
+    finder.stop()
+
+
+def test_failed_auto_attach_retries_discovery(references):
+    processing_thread = BuiltProcessingThread(references)
+    retries = []
+
+    def retry():
+        retries.append(True)
+        processing_thread.stop()
+
+    # Cooldown, attaching fails right away
+    references["Frontend"].begin_attach = lambda: False
+    processing_thread.discovery = types.SimpleNamespace(retry=retry)
+    processing_thread.auto_discover = True
+
+    processing_thread.queue.append({"cmd": "attach", "params": [], "kwargs": {}})
+    processing_thread.run()
+
+    assert retries == [True]
@@ -0,0 +1,31 @@
+""" Tests of the scan executor """
+
+import pytest
+
+from src import events, frontend
+from src.processing import executor
+from src.processing.memory import SimulatedMemory
+
+
+def fail_chunk(data: memoryview, address: int, end: int) -> list:
+    """ Scan function of a broken worker """
+    raise RuntimeError("Worker failed")
+
+
+def test_error_of_a_worker_is_raised():
+    references = {}
+    events.EventBus(references)
+    frontend.Frontend(references)
+    scan_executor = executor.ScanExecutor(references, max_workers=1)
+
+    memory = SimulatedMemory()
+    memory.open_process_from_name("Minecraft.Windows.exe")
+
+    try:
+        job = scan_executor.scan(memory, fail_chunk)
+
+        with pytest.raises(RuntimeError, match="Worker failed"):
+            job.wait(30)
+
+    finally:
+        scan_executor.shutdown()
@@ -0,0 +1,57 @@
+""" Tests of the key bindings """
+
+from src.processing import keybinds
+
+C = ord("C")
+LCTRL = 0xA2
+LSHIFT = 0xA0
+
+
+def create(*bindings) -> tuple:
+    changes = []
+    key_bindings = keybinds.KeyBindings(lambda target, active: changes.append((target, active)))
+    key_bindings.compile(list(bindings))
+
+    return key_bindings, changes
+
+
+def test_binding_while_modifier_is_held():
+    key_bindings, changes = create(keybinds.Binding("c", "zoom"))
+
+    for modifier in (LCTRL, LSHIFT):
+        key_bindings.press(modifier)
+        key_bindings.press(C)
+        key_bindings.release(C)
+        key_bindings.release(modifier)
+
+    assert changes == [("zoom", True), ("zoom", False)] * 2
+
+
+def test_exact_modifiers_win():
+    key_bindings, changes = create(keybinds.Binding("c", "zoom"), keybinds.Binding("ctrl+c", "other"))
+
+    key_bindings.press(LCTRL)
+    key_bindings.press(C)
+
+    assert changes == [("other", True)]
+
+
+def test_toggle_kept_when_recompiled():
+    key_bindings, changes = create(keybinds.Binding("c", "zoom", keybinds.TOGGLE))
+    key_bindings.press(C)
+    key_bindings.release(C)
+
+    key_bindings.compile([keybinds.Binding("c", "zoom", keybinds.TOGGLE)])
+    key_bindings.press(C)
+
+    assert changes == [("zoom", True), ("zoom", False)]
+
+
+def test_toggle_released_when_removed():
+    key_bindings, changes = create(keybinds.Binding("c", "zoom", keybinds.TOGGLE))
+    key_bindings.press(C)
+
+    # E.g. 'toggle_zoom' was turned off
+    key_bindings.compile([keybinds.Binding("c", "zoom", keybinds.HOLD)])
+
+    assert changes == [("zoom", True), ("zoom", False)]
@@ -0,0 +1,37 @@
+""" Tests of the listener """
+
+import threading
+
+from pynput import keyboard
+
+from src.processing import listener
+
+C = keyboard.KeyCode.from_vk(ord("C"))
+
+
+def create_listener(references: dict, **settings) -> listener.Listener:
+    references["Storage"].settings.data.update(settings)
+
+    key_listener = listener.Listener(references)
+    key_listener.register_keys()
+
+    return key_listener
+
+
+def test_scroll_zoom_after_game_was_closed(attached_references):
+    key_listener = create_listener(attached_references, scroll_zoom=True)
+    key_listener.on_press(C)
+
+    # The writer thread is the one that notices it
+    key_listener.gateway.memory.close_process()
+    key_listener.on_scroll(0, 0, 0, 1)
+
+    # It stops the listener and scroll zoom, instead of waiting for itself
+    key_listener.scroll_zoom.join(2)
+
+    release = threading.Thread(target=key_listener.on_release, args=(C,), daemon=True)
+    release.start()
+    release.join(2)
+
+    assert not release.is_alive()
+    assert not key_listener.scroll_zoom.is_alive()
@@ -0,0 +1,40 @@
+""" Tests of the processing thread """
+
+from src import events
+
+from tests.helpers import BuiltProcessingThread
+
+
+def test_offload_after_components_are_built(attached_references):
+    processing_thread = BuiltProcessingThread(attached_references)
+    results = []
+
+    def done(operation):
+        results.append(operation.result())
+        processing_thread.stop()
+
+    processing_thread.queue.append({"cmd": processing_thread.offload, "params": [len, (1, 2)],
+                                    "kwargs": {"callback": done}})
+    processing_thread.run()
+
+    assert results == [2]
+    assert processing_thread.workers is None
+
+
+def test_settings_changed_saves_on_worker_pool(attached_references):
+    processing_thread = BuiltProcessingThread(attached_references)
+    saved = []
+
+    storage = attached_references["Storage"]
+    update_file = storage.update_file
+
+    def save():
+        update_file()
+        saved.append(True)
+        processing_thread.call_soon(processing_thread.stop)
+
+    storage.update_file = save
+    processing_thread.call_soon(attached_references["EventBus"].publish, events.SettingsChanged(features=("0",)))
+    processing_thread.run()
+
+    assert saved == [True]
@@ -0,0 +1,23 @@
+""" Tests of reloading the storage file """
+
+import copy
+
+from src.processing import reload
+
+from tests import helpers
+
+
+def test_wrong_key_and_enabled_types_are_ignored(references):
+    reloader = reload.StorageReloader(references)
+    features = references["Storage"].features
+
+    data = {"settings": {}, "features": copy.deepcopy(helpers.FEATURES)}
+    data["features"]["0"].update({"key": 67, "enabled": True})
+    data["features"]["1"]["enabled"] = "no"
+    data["features"]["2"]["enabled"] = False
+
+    reloader.apply(data)
+
+    assert features["0"]["key"] == "c"
+    assert features["1"]["enabled"] is True
+    assert features["2"]["enabled"] is False
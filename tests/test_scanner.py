@@ -0,0 +1,27 @@
+""" Tests of searching offsets with signatures """
+
+import os
+
+from src.processing import scanner
+
+from tests import helpers
+
+SIGNATURES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "res", "signatures.json")
+
+
+def test_shipped_signatures_find_the_offsets():
+    signatures = scanner.load_signatures((SIGNATURES_PATH,))
+    module_scanner = scanner.Scanner(helpers.signature_module(0x200000))
+
+    features = module_scanner.scan_features(signatures, list(helpers.FEATURES))
+
+    assert features == {feature_id: {"a": True, "o": value["offsets"]}
+                        for feature_id, value in helpers.FEATURES.items()}
+
+
+def test_signatures_of_the_user_come_first(tmp_path):
+    path = tmp_path / "signatures.json"
+    path.write_text('{"0": {"offsets": [1, 2]}}')
+
+    assert scanner.load_signatures((str(path), SIGNATURES_PATH)) == {"0": {"offsets": [1, 2]}}
+    assert scanner.load_signatures((str(tmp_path / "missing.json"), SIGNATURES_PATH))["0"]["offsets"][1] == 0x10
@@ -0,0 +1,47 @@
+""" Tests of the snapshots """
+
+import pytest
+
+from src.processing import snapshots
+from src.processing.memory import SimulatedMemory
+
+
+def create_memory() -> SimulatedMemory:
+    memory = SimulatedMemory()
+    memory.open_process_from_name("Minecraft.Windows.exe")
+
+    return memory
+
+
+def test_existing_snapshot_is_not_overwritten(tmp_path):
+    memory = create_memory()
+    store = snapshots.SnapshotStore(str(tmp_path))
+    before = store.take(memory, "before")
+
+    memory.write_float(memory.base_address + 0x1000, 90.0)
+
+    with pytest.raises(FileExistsError):
+        store.take(memory, "before")
+
+    assert before.read_float(memory.base_address + 0x1000) == 0
+    assert store.names() == ["before"]
+
+
+def test_default_names_are_unique(tmp_path):
+    memory = create_memory()
+    store = snapshots.SnapshotStore(str(tmp_path))
+
+    assert store.take(memory).name != store.take(memory).name
+    assert len(store.names()) == 2
+
+
+def test_diff_of_many_regions(tmp_path):
+    memory = create_memory()
+    addresses = [memory.allocate(0x1000) for _ in range(200)]
+    store = snapshots.SnapshotStore(str(tmp_path))
+
+    before = store.take(memory, "before")
+    memory.write_float(addresses[150] + 8, 90.0)
+    after = store.take(memory, "after")
+
+    assert [(address, list(offsets)) for address, offsets in snapshots.diff(before, after)] == [(addresses[150], [8])]
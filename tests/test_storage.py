@@ -0,0 +1,65 @@
+""" Tests of the storage """
+
+import os
+import json
+import types
+import threading
+
+from src.processing import storage
+
+
+def test_offsets_cache_concurrent_puts(tmp_path):
+    cache = storage.OffsetsCache(str(tmp_path))
+    versions = [str(i) for i in range(50)]
+    errors = []
+
+    def put(version_ids: list):
+        try:
+            for version_id in version_ids:
+                cache.put(version_id, f"offsets of {version_id}")
+
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=put, args=(versions[i::2],)) for i in range(2)]
+
+    for x in threads:
+        x.start()
+
+    for x in threads:
+        x.join()
+
+    assert not errors
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+    with open(tmp_path / storage.OffsetsCache.INDEX_NAME) as f:
+        assert sorted(json.load(f)) == sorted(versions)
+
+    loaded = storage.OffsetsCache(str(tmp_path))
+    loaded.load_index()
+
+    assert all(loaded.get(version_id) == f"offsets of {version_id}" for version_id in versions)
+
+
+def test_whole_numbers_for_float_settings(references):
+    storage_file = types.SimpleNamespace(get=lambda key: {"scroll_zoom_step": 5, "scroll_zoom_max": 100.0,
+                                                          "attach_cooldown": 1000})
+    settings = storage.Settings.from_storage_file(references, storage_file)
+
+    assert settings["scroll_zoom_step"] == 5.0 and isinstance(settings["scroll_zoom_step"], float)
+    assert settings["scroll_zoom_max"] == 100.0
+    assert settings["attach_cooldown"] == 1000
+
+
+def test_wrong_setting_types_are_refused(references):
+    settings = storage.Settings(references)
+
+    for name, value in (("scroll_zoom_step", True), ("scroll_zoom_step", "5"), ("attach_cooldown", 1.5),
+                        ("unknown", 1)):
+        try:
+            settings.parse(name, value)
+
+        except ValueError:
+            continue
+
+        raise AssertionError(f"{name}={value!r} was accepted")
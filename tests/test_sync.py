@@ -0,0 +1,71 @@
+""" Tests of the offsets sync """
+
+import json
+import time
+import types
+
+from src.network import sync
+from src.processing import storage
+
+from tests import helpers
+
+
+class Response:
+    """ Response of the api """
+
+    def __init__(self, data: dict):
+        self.status_code = 200
+        self.data = data
+
+    def json(self) -> dict:
+        return self.data
+
+
+class Api:
+    """ Session serving one version """
+
+    OFFSETS = json.dumps({feature_id: {"a": value["available"], "o": value["offsets"]}
+                          for feature_id, value in helpers.FEATURES.items()})
+
+    def get(self, url: str, timeout: float) -> Response:
+        if url.endswith("manifest"):
+            return Response({"status": 200, "versions": {"1": storage.OffsetsCache.hash_offsets(self.OFFSETS)}})
+
+        return Response({"status": 200, "offsets": self.OFFSETS})
+
+    def close(self):
+        pass
+
+
+class FullCache(storage.OffsetsCache):
+    """ Cache on a full disk """
+
+    def __init__(self, directory: str):
+        super().__init__(directory)
+        self.tries = 0
+
+    def put(self, version_id: str, offsets: str):
+        self.tries += 1
+        raise OSError("No space left on device")
+
+
+def test_failed_sync_is_retried(references, tmp_path):
+    references["Storage"].settings.data["offsets_sync"] = True
+    cache = FullCache(str(tmp_path / "features"))
+    references["Network"] = types.SimpleNamespace(cache=cache)
+
+    offsets_sync = sync.OffsetsSync(references, api="", session=Api())
+    offsets_sync.RETRY_INTERVAL = 0.01
+    offsets_sync.start()
+
+    try:
+        deadline = time.monotonic() + 2
+        while cache.tries < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert cache.tries >= 2
+        assert offsets_sync.is_alive()
+
+    finally:
+        offsets_sync.stop()
+        offsets_sync.join(2)
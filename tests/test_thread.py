@@ -0,0 +1,36 @@
+""" Tests of the threads and the component graph """
+
+import time
+
+from src import thread
+
+
+def test_component_graph_mixed_dependencies():
+    graph = thread.ComponentGraph()
+    graph.add("a", lambda: "a")
+    graph.add("b", lambda: "b")
+    graph.add("c", lambda: "c", after=("a",))
+
+    assert graph.run() == {"a": "a", "b": "b", "c": "c"}
+
+
+def test_component_graph_finished_before_callback():
+    # Most components finish before their done callback is added
+    graph = thread.ComponentGraph(max_workers=8)
+
+    for i in range(20):
+        graph.add(str(i), lambda i=i: i, after=(str(i - 3),) if i >= 3 and i % 2 else ())
+
+    for _ in range(20):
+        assert graph.run() == {str(i): i for i in range(20)}
+
+
+def test_component_graph_order():
+    order = []
+    graph = thread.ComponentGraph()
+    graph.add("slow", lambda: (time.sleep(0.05), order.append("slow")))
+    graph.add("fast", lambda: order.append("fast"))
+    graph.add("last", lambda: order.append("last"), after=("slow", "fast"))
+    graph.run()
+
+    assert order[-1] == "last"
@@ -0,0 +1,36 @@
+""" Tests of scroll zoom """
+
+from src.processing import zoom
+
+
+def create_scroll_zoom(references: dict, writes: list) -> zoom.ScrollZoom:
+    references["Storage"].settings.data["scroll_zoom"] = True
+
+    return zoom.ScrollZoom(references, writes.append)
+
+
+def test_not_activated_without_zoomed_fov(references):
+    scroll_zoom = create_scroll_zoom(references, [])
+
+    for after in (0, "a", None, float("nan")):
+        references["Storage"].features["0"]["settings"]["after"] = after
+        scroll_zoom.activate(["0", "2"])
+
+        assert not scroll_zoom.active
+        assert not scroll_zoom.is_alive()
+
+
+def test_zoomed_fov_changed_to_0_while_zooming(references):
+    scroll_zoom = create_scroll_zoom(references, [])
+    scroll_zoom.activate(["0", "2"])
+
+    try:
+        assert [x for x, _ in scroll_zoom.writes(35.0)] == ["0", "2"]
+
+        # Only the FOV then, the sensitivity can't be scaled
+        references["Storage"].features["0"]["settings"]["after"] = 0
+        assert scroll_zoom.writes(35.0) == [("0", 35.0)]
+
+    finally:
+        scroll_zoom.stop()
+        scroll_zoom.join(2)